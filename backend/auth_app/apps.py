@@ -4,3 +4,12 @@ from django.apps import AppConfig
 class AuthAppConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'auth_app'
+
+    def ready(self):
+        from django.contrib.auth import get_user_model
+        from django.db.models.signals import post_delete, post_save
+        from .authentication import invalidate_cached_user
+
+        User = get_user_model()
+        post_save.connect(invalidate_cached_user, sender=User, dispatch_uid='user_cache_post_save')
+        post_delete.connect(invalidate_cached_user, sender=User, dispatch_uid='user_cache_post_delete')
@@ -0,0 +1,80 @@
+import logging
+import random
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from rest_framework import status
+from auth_app.models import CustomUser
+from auth_app.otp_store import get_otp_store
+from auth_app.outbox import aenqueue_email
+from auth_app.serializers import ForgotPasswordSerializer, OTPRequestSerializer
+from auth_app.views import ForgotPasswordView, OtpRequestView
+from backend.async_api import AsyncAPIView
+
+logger = logging.getLogger(__name__)
+
+
+async def store_otp(key, otp):
+    # The SQLite store keeps a connection per thread, so use the shared pool
+    await sync_to_async(get_otp_store().set, thread_sensitive=False)(key, otp, 600)
+
+
+class AsyncOtpRequestView(AsyncAPIView):
+    authentication_class = None
+    require_authentication = False
+    sync_view_class = OtpRequestView
+
+    async def post(self, request):
+        serializer = OTPRequestSerializer(data=request.data)
+        if not serializer.is_valid():
+            logger.error("OTP request validation failed: %s", serializer.errors)
+            return self.render(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+        email = serializer.validated_data['email']
+        if not await CustomUser.objects.filter(email=email).aexists():
+            logger.error("User not found for OTP request: %s", email)
+            return self.render({'error': 'User not found.'}, status=status.HTTP_400_BAD_REQUEST)
+
+        otp = str(random.randint(100000, 999999))
+        context = request.data.get('context', 'register')
+        await store_otp(f'otp_{email}_{context}', otp)
+        subject = (
+            'Your OTP for Registration' if context == 'register'
+            else 'Your OTP for Password Reset'
+        )
+        await aenqueue_email(
+            subject=subject,
+            message=f'Your OTP is: {otp}. It is valid for 10 minutes.',
+            from_email=settings.DEFAULT_FROM_EMAIL,
+            recipient_list=[email],
+        )
+        logger.info("OTP queued successfully for %s to %s", context, email)
+        return self.render({'message': 'OTP sent to email.'})
+
+
+class AsyncForgotPasswordView(AsyncAPIView):
+    authentication_class = None
+    require_authentication = False
+    sync_view_class = ForgotPasswordView
+
+    async def post(self, request):
+        logger.info("Password reset request for email: %s", request.data.get('email'))
+        serializer = ForgotPasswordSerializer(data=request.data)
+        if not serializer.is_valid():
+            logger.error("Password reset request validation failed: %s", serializer.errors)
+            return self.render(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+        email = serializer.validated_data['email']
+        if not await CustomUser.objects.filter(email=email).aexists():
+            logger.error("User not found for password reset: %s", email)
+            return self.render({'error': 'User not found.'}, status=status.HTTP_400_BAD_REQUEST)
+
+        otp = str(random.randint(100000, 999999))
+        await store_otp(f'otp_{email}_forgot_password', otp)
+        await aenqueue_email(
+            subject='Your OTP for Password Reset',
+            message=f'Your OTP for password reset is: {otp}. It is valid for 10 minutes.',
+            from_email=settings.DEFAULT_FROM_EMAIL,
+            recipient_list=[email],
+        )
+        logger.info("Password reset OTP queued for %s", email)
+        return self.render({'message': 'Password reset OTP sent to email.'})
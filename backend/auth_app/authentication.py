@@ -1,11 +1,76 @@
 # auth_app/authentication.py
+import copy
+import threading
+import time
+from collections import OrderedDict
+from asgiref.sync import sync_to_async
+from django.conf import settings
 from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.settings import api_settings
 from rest_framework_simplejwt.tokens import UntypedToken
 from rest_framework_simplejwt.exceptions import InvalidToken, TokenError
 from django.contrib.auth import get_user_model
 
 User = get_user_model()
 
+class UserCache:
+    """
+    Small per-process LRU of authenticated users keyed by the token's user
+    id. Entries live for AUTH_USER_CACHE_TTL seconds; a TTL of 0 disables
+    the cache. Saving or deleting a user drops its entry in the process that
+    made the change only: other workers keep authenticating a deactivated
+    or deleted user until their entry expires, so the TTL bounds how long
+    a revoked account stays usable there.
+    """
+    def __init__(self):
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+
+    @property
+    def ttl(self):
+        return getattr(settings, 'AUTH_USER_CACHE_TTL', 30)
+
+    @property
+    def max_size(self):
+        return getattr(settings, 'AUTH_USER_CACHE_SIZE', 1024)
+
+    def get(self, user_id):
+        with self.lock:
+            entry = self.entries.get(user_id)
+            if entry is None:
+                return None
+            user, expires_at = entry
+            if expires_at <= time.monotonic():
+                del self.entries[user_id]
+                return None
+            self.entries.move_to_end(user_id)
+        # Each request gets its own copy so in-place edits never leak
+        return copy.copy(user)
+
+    def set(self, user_id, user):
+        if self.ttl <= 0:
+            return
+        with self.lock:
+            self.entries[user_id] = (copy.copy(user), time.monotonic() + self.ttl)
+            self.entries.move_to_end(user_id)
+            while len(self.entries) > self.max_size:
+                self.entries.popitem(last=False)
+
+    def invalidate(self, user_id):
+        with self.lock:
+            self.entries.pop(user_id, None)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+user_cache = UserCache()
+
+
+def invalidate_cached_user(sender, instance, **kwargs):
+    # post_save / post_delete handler for the user model
+    user_cache.invalidate(instance.pk)
+
 class JWTCookieAuthentication(JWTAuthentication):
     """
     Custom JWT authentication that reads tokens from cookies
@@ -27,4 +92,49 @@ class JWTCookieAuthentication(JWTAuthentication):
             user = self.get_user(validated_token)
             return (user, validated_token)
         except TokenError:
-            return None
\ No newline at end of file
+            return None
+
+    async def aauthenticate(self, request):
+        """
+        `authenticate` for async views, on a plain HttpRequest. Tokens are
+        checked in the event loop and only a user cache miss goes to the
+        database.
+        """
+        header = self.get_header(request)
+        raw_token = self.get_raw_token(header) if header is not None else None
+        if raw_token is None:
+            raw_token = request.COOKIES.get('access_token')
+            if not raw_token:
+                return None
+        try:
+            validated_token = self.get_validated_token(raw_token)
+        except TokenError:
+            return None
+        return await self.aget_user(validated_token), validated_token
+
+    async def aget_user(self, validated_token):
+        user = user_cache.get(validated_token.get(api_settings.USER_ID_CLAIM))
+        if user is None:
+            user = await sync_to_async(self.get_user)(validated_token)
+        return user
+
+    def get_user(self, validated_token):
+        user_id = validated_token.get(api_settings.USER_ID_CLAIM)
+        if user_id is None:
+            return super().get_user(validated_token)
+        user = user_cache.get(user_id)
+        if user is None:
+            user = super().get_user(validated_token)
+            user_cache.set(user_id, user)
+        return user
+
+class JWTCookieStatelessAuthentication(JWTCookieAuthentication):
+    """
+    Builds a lightweight `TokenUser` from the token claims without touching
+    the database. Only for views that need nothing but `request.user.id`.
+    """
+    def get_user(self, validated_token):
+        return api_settings.TOKEN_USER_CLASS(validated_token)
+
+    async def aget_user(self, validated_token):
+        return self.get_user(validated_token)
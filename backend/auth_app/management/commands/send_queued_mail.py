@@ -0,0 +1,32 @@
+import time
+from django.core.management.base import BaseCommand
+from auth_app.outbox import purge_finished_emails, send_queued_emails
+
+PURGE_INTERVAL = 3600
+
+
+class Command(BaseCommand):
+    help = 'Delivers queued outbound emails, retrying failures with backoff, and purges old ones.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=50)
+        parser.add_argument('--interval', type=float, default=2.0,
+                            help='Seconds to sleep when the outbox is empty.')
+        parser.add_argument('--once', action='store_true',
+                            help='Drain the due emails and exit.')
+
+    def handle(self, *args, **options):
+        last_purge = None
+        while True:
+            if last_purge is None or time.monotonic() - last_purge >= PURGE_INTERVAL:
+                purged = purge_finished_emails()
+                if purged:
+                    self.stdout.write(f'Purged {purged} old emails')
+                last_purge = time.monotonic()
+            sent = send_queued_emails(batch_size=options['batch_size'])
+            if sent:
+                self.stdout.write(f'Processed {sent} emails')
+                continue
+            if options['once']:
+                return
+            time.sleep(options['interval'])
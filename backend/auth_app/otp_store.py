@@ -0,0 +1,130 @@
+import sqlite3
+import threading
+import time
+from django.conf import settings
+from django.core.cache import caches
+from django.core.exceptions import ImproperlyConfigured
+from django.utils.module_loading import import_string
+
+_store = None
+_store_lock = threading.Lock()
+
+
+class BaseOTPStore:
+    """
+    Holds one-time passwords until they are verified or expire. Stores must
+    be visible to every worker process, and `verify` must consume the code
+    atomically so a code can only ever be used once.
+    """
+    def set(self, key, code, timeout):
+        raise NotImplementedError
+
+    def verify(self, key, code):
+        """
+        Deletes the stored code and returns True if it matches `code` and
+        has not expired. A wrong code leaves the stored one in place.
+        """
+        raise NotImplementedError
+
+
+class CacheOTPStore(BaseOTPStore):
+    """
+    Keeps codes in a Django cache. Only safe across workers with a shared
+    cache backend, and the check-then-delete is not atomic.
+    """
+    def __init__(self, alias='default'):
+        self.cache = caches[alias]
+
+    def set(self, key, code, timeout):
+        self.cache.set(key, code, timeout=timeout)
+
+    def verify(self, key, code):
+        stored = self.cache.get(key)
+        if stored and stored == code:
+            self.cache.delete(key)
+            return True
+        return False
+
+
+class SQLiteOTPStore(BaseOTPStore):
+    """
+    File-backed store shared by every process on the host. Verification is
+    a single conditional DELETE, which SQLite executes atomically.
+    """
+    def __init__(self, path):
+        self.path = str(path)
+        self.local = threading.local()
+
+    def get_connection(self):
+        conn = getattr(self.local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute(
+                'CREATE TABLE IF NOT EXISTS otp ('
+                'key TEXT PRIMARY KEY, code TEXT NOT NULL, expires_at REAL NOT NULL)'
+            )
+            self.local.conn = conn
+        return conn
+
+    def set(self, key, code, timeout):
+        now = time.time()
+        conn = self.get_connection()
+        conn.execute('DELETE FROM otp WHERE expires_at <= ?', (now,))
+        conn.execute(
+            'INSERT OR REPLACE INTO otp (key, code, expires_at) VALUES (?, ?, ?)',
+            (key, code, now + timeout),
+        )
+
+    def verify(self, key, code):
+        cursor = self.get_connection().execute(
+            'DELETE FROM otp WHERE key = ? AND code = ? AND expires_at > ?',
+            (key, code, time.time()),
+        )
+        return cursor.rowcount == 1
+
+
+class RedisOTPStore(BaseOTPStore):
+    """
+    Redis-protocol store for deployments spanning several hosts. Expiry uses
+    key TTLs and verification runs as a compare-and-delete Lua script.
+    """
+    VERIFY_SCRIPT = """
+    if redis.call('GET', KEYS[1]) == ARGV[1] then
+        return redis.call('DEL', KEYS[1])
+    end
+    return 0
+    """
+
+    def __init__(self, url, key_prefix='otp'):
+        try:
+            import redis
+        except ImportError:
+            raise ImproperlyConfigured('RedisOTPStore requires the redis package.')
+        self.client = redis.Redis.from_url(url)
+        self.key_prefix = key_prefix
+        self.verify_script = self.client.register_script(self.VERIFY_SCRIPT)
+
+    def make_key(self, key):
+        return f'{self.key_prefix}:{key}'
+
+    def set(self, key, code, timeout):
+        self.client.set(self.make_key(key), code, ex=timeout)
+
+    def verify(self, key, code):
+        return self.verify_script(keys=[self.make_key(key)], args=[code]) == 1
+
+
+def get_otp_store():
+    """
+    Returns the store configured by `settings.OTP_STORE`, a dict with the
+    dotted `BACKEND` path and keyword `OPTIONS` for it.
+    """
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                config = getattr(settings, 'OTP_STORE', {})
+                backend = import_string(config.get('BACKEND', 'auth_app.otp_store.CacheOTPStore'))
+                _store = backend(**config.get('OPTIONS', {}))
+    return _store
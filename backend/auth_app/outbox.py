@@ -0,0 +1,128 @@
+import logging
+from datetime import timedelta
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.db import transaction
+from django.utils import timezone
+from auth_app.models import OutboundEmail
+
+logger = logging.getLogger(__name__)
+
+
+def enqueue_email(subject, message, from_email, recipient_list):
+    """
+    Stores an email in the outbox instead of sending it inline. The
+    `send_queued_mail` worker delivers it.
+    """
+    return OutboundEmail.objects.create(
+        subject=subject,
+        body=message,
+        from_email=from_email or settings.DEFAULT_FROM_EMAIL,
+        to=list(recipient_list),
+    )
+
+
+async def aenqueue_email(subject, message, from_email, recipient_list):
+    """
+    `enqueue_email` for async views.
+    """
+    return await OutboundEmail.objects.acreate(
+        subject=subject,
+        body=message,
+        from_email=from_email or settings.DEFAULT_FROM_EMAIL,
+        to=list(recipient_list),
+    )
+
+
+def retry_delay(attempts):
+    base = getattr(settings, 'EMAIL_OUTBOX_RETRY_DELAY', 30)
+    maximum = getattr(settings, 'EMAIL_OUTBOX_MAX_RETRY_DELAY', 3600)
+    return timedelta(seconds=min(base * 2 ** (attempts - 1), maximum))
+
+
+def schedule_retry(email, error, now):
+    email.attempts += 1
+    email.last_error = str(error)
+    if email.attempts >= getattr(settings, 'EMAIL_OUTBOX_MAX_ATTEMPTS', 5):
+        email.status = OutboundEmail.STATUS_FAILED
+        email.body = ''
+        logger.error("Giving up on email ID %s after %s attempts: %s", email.pk, email.attempts, error)
+    else:
+        email.next_attempt_at = now + retry_delay(email.attempts)
+        logger.warning("Email ID %s failed, retrying at %s: %s", email.pk, email.next_attempt_at, error)
+
+
+def claim_due_emails(batch_size, now):
+    """
+    Leases up to `batch_size` due emails to this worker by moving their
+    next attempt EMAIL_OUTBOX_LEASE seconds ahead. Row locks (SKIP LOCKED)
+    are only held for this short transaction, not while talking to the
+    mail server; if the worker dies mid-batch, the emails come due again
+    when the lease runs out.
+    """
+    lease = timedelta(seconds=getattr(settings, 'EMAIL_OUTBOX_LEASE', 300))
+    with transaction.atomic():
+        emails = list(
+            OutboundEmail.objects.select_for_update(skip_locked=True)
+            .filter(status=OutboundEmail.STATUS_PENDING, next_attempt_at__lte=now)
+            .order_by('next_attempt_at')[:batch_size]
+        )
+        OutboundEmail.objects.filter(pk__in=[email.pk for email in emails]).update(next_attempt_at=now + lease)
+    return emails
+
+
+def send_queued_emails(batch_size=50):
+    """
+    Sends one batch of due emails over a single backend connection and
+    returns how many were processed. Several workers can drain the outbox
+    side by side. Bodies (which carry OTP codes) are cleared once an
+    email is sent or given up on.
+    """
+    now = timezone.now()
+    emails = claim_due_emails(batch_size, now)
+    if not emails:
+        return 0
+
+    connection = get_connection(fail_silently=False)
+    try:
+        connection.open()
+    except Exception as e:
+        logger.error("Could not open email connection: %s", e)
+        for email in emails:
+            schedule_retry(email, e, now)
+    else:
+        try:
+            for email in emails:
+                message = EmailMessage(
+                    subject=email.subject,
+                    body=email.body,
+                    from_email=email.from_email,
+                    to=email.to,
+                    connection=connection,
+                )
+                try:
+                    message.send()
+                    email.attempts += 1
+                    email.status = OutboundEmail.STATUS_SENT
+                    email.sent_at = timezone.now()
+                    email.body = ''
+                except Exception as e:
+                    schedule_retry(email, e, now)
+        finally:
+            connection.close()
+
+    OutboundEmail.objects.bulk_update(
+        emails, ['status', 'attempts', 'next_attempt_at', 'last_error', 'sent_at', 'body']
+    )
+    return len(emails)
+
+
+def purge_finished_emails():
+    """
+    Deletes sent and given-up emails older than EMAIL_OUTBOX_RETENTION_DAYS.
+    """
+    cutoff = timezone.now() - timedelta(days=getattr(settings, 'EMAIL_OUTBOX_RETENTION_DAYS', 7))
+    deleted, _ = OutboundEmail.objects.filter(
+        status__in=[OutboundEmail.STATUS_SENT, OutboundEmail.STATUS_FAILED], created_at__lt=cutoff
+    ).delete()
+    return deleted
@@ -1,3 +1,176 @@
-from django.test import TestCase
+import json
+import os
+import shutil
+import tempfile
+from datetime import timedelta
+from asgiref.sync import sync_to_async
+from django.core import mail
+from django.core.mail.backends.base import BaseEmailBackend
+from django.test import AsyncRequestFactory, SimpleTestCase, TestCase, override_settings
+from django.utils import timezone
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.tokens import AccessToken
+from auth_app.async_views import AsyncOtpRequestView
+from auth_app.authentication import JWTCookieAuthentication, UserCache, user_cache
+from auth_app.models import CustomUser, OutboundEmail
+from auth_app.otp_store import SQLiteOTPStore
+from auth_app.outbox import claim_due_emails, enqueue_email, purge_finished_emails, send_queued_emails
 
-# Create your tests here.
+
+class FailingEmailBackend(BaseEmailBackend):
+    def send_messages(self, email_messages):
+        raise ConnectionError('SMTP server unavailable')
+
+
+class SQLiteOTPStoreTests(SimpleTestCase):
+    def setUp(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory, ignore_errors=True)
+        self.path = os.path.join(directory, 'otp.sqlite3')
+        self.store = SQLiteOTPStore(self.path)
+
+    def test_code_is_visible_to_another_process_store(self):
+        self.store.set('otp_reader@example.com_register', '123456', 600)
+        other_worker = SQLiteOTPStore(self.path)
+        self.assertTrue(other_worker.verify('otp_reader@example.com_register', '123456'))
+
+    def test_code_can_only_be_used_once(self):
+        self.store.set('otp_reader@example.com_register', '123456', 600)
+        self.assertTrue(self.store.verify('otp_reader@example.com_register', '123456'))
+        self.assertFalse(self.store.verify('otp_reader@example.com_register', '123456'))
+
+    def test_wrong_code_keeps_stored_code(self):
+        self.store.set('otp_reader@example.com_register', '123456', 600)
+        self.assertFalse(self.store.verify('otp_reader@example.com_register', '000000'))
+        self.assertTrue(self.store.verify('otp_reader@example.com_register', '123456'))
+
+    def test_expired_code_is_rejected(self):
+        self.store.set('otp_reader@example.com_register', '123456', -1)
+        self.assertFalse(self.store.verify('otp_reader@example.com_register', '123456'))
+
+
+class UserCacheTests(TestCase):
+    def setUp(self):
+        user_cache.clear()
+        self.addCleanup(user_cache.clear)
+        self.user = CustomUser.objects.create_user(
+            email='reader@example.com', username='reader1', password='Password1'
+        )
+        self.token = AccessToken.for_user(self.user)
+
+    def authenticate(self):
+        return JWTCookieAuthentication().get_user(self.token)
+
+    def test_cached_user_is_served_as_a_copy(self):
+        self.authenticate().first_name = 'Changed'
+        with self.assertNumQueries(0):
+            self.assertEqual(self.authenticate().first_name, self.user.first_name)
+
+    @override_settings(AUTH_USER_CACHE_SIZE=2)
+    def test_least_recently_used_entry_is_evicted(self):
+        cache = UserCache()
+        cache.set(1, self.user)
+        cache.set(2, self.user)
+        cache.get(1)
+        cache.set(3, self.user)
+        self.assertIsNone(cache.get(2))
+        self.assertIsNotNone(cache.get(1))
+        self.assertIsNotNone(cache.get(3))
+
+    @override_settings(AUTH_USER_CACHE_TTL=0)
+    def test_zero_ttl_disables_the_cache(self):
+        self.authenticate()
+        with self.assertNumQueries(1):
+            self.authenticate()
+
+    def test_deactivating_a_user_invalidates_the_entry(self):
+        self.authenticate()
+        self.user.is_active = False
+        self.user.save()
+        with self.assertRaises(AuthenticationFailed):
+            self.authenticate()
+
+    def test_deleting_a_user_invalidates_the_entry(self):
+        self.authenticate()
+        self.user.delete()
+        with self.assertRaises(AuthenticationFailed):
+            self.authenticate()
+
+
+@override_settings(EMAIL_BACKEND='django.core.mail.backends.locmem.EmailBackend')
+class EmailOutboxTests(TestCase):
+    def test_queued_emails_are_sent_in_one_batch(self):
+        for index in range(3):
+            enqueue_email('Your OTP', f'Code {index}', 'noreply@example.com', [f'user{index}@example.com'])
+        self.assertEqual(len(mail.outbox), 0)
+
+        self.assertEqual(send_queued_emails(batch_size=10), 3)
+        self.assertEqual(len(mail.outbox), 3)
+        self.assertEqual(OutboundEmail.objects.filter(status=OutboundEmail.STATUS_SENT).count(), 3)
+        self.assertEqual(send_queued_emails(batch_size=10), 0)
+        self.assertEqual(mail.outbox[0].body, 'Code 0')
+        self.assertFalse(OutboundEmail.objects.exclude(body='').exists())
+
+    def test_claimed_emails_are_leased_to_one_worker(self):
+        enqueue_email('Your OTP', 'Code', 'noreply@example.com', ['user@example.com'])
+        now = timezone.now()
+        self.assertEqual(len(claim_due_emails(10, now)), 1)
+        # Until the lease runs out, another worker does not see the email
+        self.assertEqual(send_queued_emails(), 0)
+        self.assertEqual(claim_due_emails(10, now + timedelta(hours=1))[0].body, 'Code')
+
+    @override_settings(EMAIL_OUTBOX_RETENTION_DAYS=7)
+    def test_old_finished_emails_are_purged(self):
+        emails = [
+            enqueue_email('Your OTP', f'Code {index}', 'noreply@example.com', [f'user{index}@example.com'])
+            for index in range(3)
+        ]
+        send_queued_emails()
+        pending = enqueue_email('Your OTP', 'Later', 'noreply@example.com', ['late@example.com'])
+        OutboundEmail.objects.update(created_at=timezone.now() - timedelta(days=8))
+        OutboundEmail.objects.filter(pk=emails[0].pk).update(created_at=timezone.now())
+
+        self.assertEqual(purge_finished_emails(), 2)
+        self.assertEqual(set(OutboundEmail.objects.values_list('pk', flat=True)), {emails[0].pk, pending.pk})
+
+    @override_settings(EMAIL_BACKEND='auth_app.tests.FailingEmailBackend', EMAIL_OUTBOX_MAX_ATTEMPTS=2)
+    def test_failed_email_is_retried_then_given_up(self):
+        email = enqueue_email('Your OTP', 'Code', 'noreply@example.com', ['user@example.com'])
+
+        send_queued_emails()
+        email.refresh_from_db()
+        self.assertEqual(email.status, OutboundEmail.STATUS_PENDING)
+        self.assertEqual(email.attempts, 1)
+        self.assertGreater(email.next_attempt_at, email.created_at)
+
+        OutboundEmail.objects.update(next_attempt_at=email.created_at)
+        send_queued_emails()
+        email.refresh_from_db()
+        self.assertEqual(email.status, OutboundEmail.STATUS_FAILED)
+        self.assertIn('SMTP server unavailable', email.last_error)
+        self.assertEqual(email.body, '')
+
+
+class AsyncOtpViewTests(TestCase):
+    async def test_otp_request_queues_an_email(self):
+        await sync_to_async(CustomUser.objects.create_user)(
+            email='reader@example.com', username='reader1', password='Password1'
+        )
+        request = AsyncRequestFactory().post(
+            '/api/auth/otp/request/', json.dumps({'email': 'reader@example.com', 'context': 'forgot_password'}),
+            content_type='application/json',
+        )
+        response = await AsyncOtpRequestView.as_view()(request)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(json.loads(response.content), {'message': 'OTP sent to email.'})
+        email = await OutboundEmail.objects.aget()
+        self.assertEqual(email.to, ['reader@example.com'])
+        self.assertEqual(email.subject, 'Your OTP for Password Reset')
+
+    async def test_unknown_email_is_rejected(self):
+        request = AsyncRequestFactory().post(
+            '/api/auth/otp/request/', json.dumps({'email': 'nobody@example.com'}), content_type='application/json',
+        )
+        response = await AsyncOtpRequestView.as_view()(request)
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(await OutboundEmail.objects.aexists())
@@ -1,6 +1,11 @@
+from django.conf import settings
 from django.urls import path
 from auth_app.views import *
 
+if settings.ASYNC_VIEWS:
+    from auth_app.async_views import AsyncForgotPasswordView, AsyncOtpRequestView
+    OtpRequestView, ForgotPasswordView = AsyncOtpRequestView, AsyncForgotPasswordView
+
 urlpatterns = [
     path('auth/register/', RegisterView.as_view(), name='register'),
     path('auth/otp/request/', OtpRequestView.as_view(), name='otp_request'),
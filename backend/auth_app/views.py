@@ -2,9 +2,10 @@ import random
 from django.conf import settings
 from django.shortcuts import render
 from rest_framework.views import APIView
-from django.core.cache import cache
+from auth_app.otp_store import get_otp_store
 from auth_app.serializers import *
-from django.core.mail import send_mail
+from auth_app.outbox import enqueue_email
+from auth_app.authentication import user_cache
 from rest_framework.response import Response
 from rest_framework import status
 from rest_framework.permissions import IsAuthenticated, AllowAny
@@ -29,34 +30,33 @@ class RegisterView(APIView):
                 }, status=status.HTTP_400_BAD_REQUEST)
             
             else:
-                logger.info(f"Updating existing unverified user: {email}")
+                logger.info("Updating existing unverified user: %s", email)
                 serializer = UserRegisterSerializer(existing_user, data=request.data, partial=True)
                 if serializer.is_valid():
                     user = serializer.save()
                     otp = str(random.randint(100000, 999999))
-                    cache.set(f'otp_{user.email}_register', otp, timeout=600)
+                    get_otp_store().set(f'otp_{user.email}_register', otp, 600)
                     
                     try:
-                        send_mail(
+                        enqueue_email(
                             subject='Your OTP for Our Application',
                             message=f'Your OTP for registration is {otp}',
                             from_email=settings.DEFAULT_FROM_EMAIL,
                             recipient_list=[user.email],
-                            fail_silently=False,
                         )
-                        logger.info(f"OTP sent successfully for user: {user.email}")
+                        logger.info("OTP queued successfully for user: %s", user.email)
                         return Response({
                             'user': UserRegisterSerializer(user).data,
                             'message': 'User information updated. Please verify using OTP'
                         }, status=status.HTTP_200_OK)
                     except Exception as e:
-                        logger.error(f"Failed to send email for user {user.email}: {str(e)}")
+                        logger.error("Failed to queue email for user %s: %s", user.email, e)
                         return Response({
                             'user': UserRegisterSerializer(user).data,
                             'message': 'User information updated, but failed to send OTP email'
                         }, status=status.HTTP_200_OK)
                 else:
-                    logger.error(f"User update validation failed for {email}: {serializer.errors}")
+                    logger.error("User update validation failed for %s: %s", email, serializer.errors)
                     return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
                     
         except CustomUser.DoesNotExist:
@@ -64,29 +64,28 @@ class RegisterView(APIView):
             if serializer.is_valid():
                 user = serializer.save()
                 otp = str(random.randint(100000, 999999))
-                cache.set(f'otp_{user.email}_register', otp, timeout=600)
+                get_otp_store().set(f'otp_{user.email}_register', otp, 600)
                 
                 try:
-                    send_mail(
+                    enqueue_email(
                         subject='Your OTP for Our Application',
                         message=f'Your OTP for registration is {otp}',
                         from_email=settings.DEFAULT_FROM_EMAIL,
                         recipient_list=[user.email],
-                        fail_silently=False,
                     )
-                    logger.info(f"OTP sent successfully for new user: {user.email}")
+                    logger.info("OTP queued successfully for new user: %s", user.email)
                     return Response({
                         'user': UserRegisterSerializer(user).data,
                         'message': 'User registration successful. Now verify using OTP'
                     }, status=status.HTTP_201_CREATED)
                 except Exception as e:
-                    logger.error(f"Failed to send OTP email for new user {user.email}: {str(e)}")
+                    logger.error("Failed to queue OTP email for new user %s: %s", user.email, e)
                     return Response({
                         'user': UserRegisterSerializer(user).data,
                         'message': 'User registered, but failed to send OTP email'
                     }, status=status.HTTP_201_CREATED)
             else:
-                logger.error(f"User registration validation failed for {email}: {serializer.errors}")
+                logger.error("User registration validation failed for %s: %s", email, serializer.errors)
                 return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 class OtpVerifyView(APIView):
@@ -99,27 +98,25 @@ class OtpVerifyView(APIView):
             password = serializer.validated_data['password']
             try:
                 user = CustomUser.objects.get(email=email)
-                cached_otp = cache.get(f'otp_{email}_register')
-                if cached_otp and cached_otp == code:
-                    cache.delete(f'otp_{email}_register')
+                if get_otp_store().verify(f'otp_{email}_register', code):
                     user.is_verified = True
                     user.set_password(password)
                     user.save()
-                    logger.info(f"User {email} verified successfully")
+                    logger.info("User %s verified successfully", email)
                     return Response({
                         'user': UserProfileSerializer(user).data,
                         'message': 'The user is verified successfully'
                     }, status=status.HTTP_200_OK)
-                logger.warning(f"Invalid or expired OTP for user {email}")
+                logger.warning("Invalid or expired OTP for user %s", email)
                 return Response({
                     'error': 'OTP is not matching or expired'
                 }, status=status.HTTP_400_BAD_REQUEST)
             except CustomUser.DoesNotExist:
-                logger.error(f"User not found for OTP verification: {email}")
+                logger.error("User not found for OTP verification: %s", email)
                 return Response({
                     'error': 'User does not exist'
                 }, status=status.HTTP_400_BAD_REQUEST)
-        logger.error(f"OTP verification data invalid: {serializer.errors}")
+        logger.error("OTP verification data invalid: %s", serializer.errors)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 class OtpRequestView(APIView):
@@ -133,67 +130,65 @@ class OtpRequestView(APIView):
                 otp = str(random.randint(100000, 999999))
                 context = request.data.get('context', 'register')
                 cache_key = f'otp_{email}_{context}'
-                cache.set(cache_key, otp, timeout=600)
+                get_otp_store().set(cache_key, otp, 600)
                 subject = (
                     'Your OTP for Registration' if context == 'register'
                     else 'Your OTP for Password Reset'
                 )
                 message = f'Your OTP is: {otp}. It is valid for 10 minutes.'
                 try:
-                    send_mail(
+                    enqueue_email(
                         subject=subject,
                         message=message,
                         from_email=settings.DEFAULT_FROM_EMAIL,
                         recipient_list=[email],
-                        fail_silently=False,
                     )
-                    logger.info(f"OTP sent successfully for {context} to {email}")
+                    logger.info("OTP queued successfully for %s to %s", context, email)
                     return Response({
                         'message': 'OTP sent to email.'
                     }, status=status.HTTP_200_OK)
                 except Exception as e:
-                    logger.error(f"Failed to send OTP email for {context} to {email}: {str(e)}")
+                    logger.error("Failed to queue OTP email for %s to %s: %s", context, email, e)
                     raise
             except CustomUser.DoesNotExist:
-                logger.error(f"User not found for OTP request: {email}")
+                logger.error("User not found for OTP request: %s", email)
                 return Response({
                     'error': 'User not found.'
                 }, status=status.HTTP_400_BAD_REQUEST)
-        logger.error(f"OTP request validation failed: {serializer.errors}")
+        logger.error("OTP request validation failed: %s", serializer.errors)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 class ForgotPasswordView(APIView):
     permission_classes = [AllowAny]
     def post(self, request):
-        logger.info(f"Password reset request for email: {request.data.get('email')}")
+        logger.info("Password reset request for email: %s", request.data.get('email'))
         serializer = ForgotPasswordSerializer(data=request.data)
         if serializer.is_valid():
             email = serializer.validated_data['email']
             try:
                 user = CustomUser.objects.get(email=email)
                 otp = str(random.randint(100000, 999999))
-                cache.set(f'otp_{email}_forgot_password', otp, timeout=600)
+                get_otp_store().set(f'otp_{email}_forgot_password', otp, 600)
                 try:
-                    send_mail(
+                    enqueue_email(
                         subject='Your OTP for Password Reset',
                         message=f'Your OTP for password reset is: {otp}. It is valid for 10 minutes.',
                         from_email=settings.DEFAULT_FROM_EMAIL,
                         recipient_list=[email],
-                        fail_silently=False,
                     )
-                    logger.info(f"Password reset OTP sent to {email}")
+                    logger.info("Password reset OTP queued for %s", email)
                     return Response({
                         'message': 'Password reset OTP sent to email.'
                     }, status=status.HTTP_200_OK)
                 except Exception as e:
-                    logger.error(f"Failed to send password reset OTP to {email}: {str(e)}")
+                    logger.error("Failed to queue password reset OTP for %s: %s", email, e)
                     raise
             except CustomUser.DoesNotExist:
-                logger.error(f"User not found for password reset: {email}")
+                logger.error("User not found for password reset: %s", email)
                 return Response({
                     'error': 'User not found.'
                 }, status=status.HTTP_400_BAD_REQUEST)
-        logger.error(f"Password reset request validation failed: {serializer.errors}")
+        logger.error("Password reset request validation failed: %s", serializer.errors)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 class ForgotPasswordResetView(APIView):
@@ -206,25 +201,23 @@ class ForgotPasswordResetView(APIView):
             password = serializer.validated_data['password']
             try:
                 user = CustomUser.objects.get(email=email)
-                cached_otp = cache.get(f'otp_{email}_forgot_password')
-                if cached_otp and cached_otp == code:
-                    cache.delete(f'otp_{email}_forgot_password')
+                if get_otp_store().verify(f'otp_{email}_forgot_password', code):
                     user.set_password(password)
                     user.save()
-                    logger.info(f"Password reset successful for user: {email}")
+                    logger.info("Password reset successful for user: %s", email)
                     return Response({
                         'message': 'Password reset successful.'
                     }, status=status.HTTP_200_OK)
-                logger.warning(f"Invalid or expired OTP for password reset: {email}")
+                logger.warning("Invalid or expired OTP for password reset: %s", email)
                 return Response({
                     'error': 'OTP is not matching or expired.'
                 }, status=status.HTTP_400_BAD_REQUEST)
             except CustomUser.DoesNotExist:
-                logger.error(f"User not found for password reset: {email}")
+                logger.error("User not found for password reset: %s", email)
                 return Response({
                     'error': 'User does not exist.'
                 }, status=status.HTTP_400_BAD_REQUEST)
-        logger.error(f"Password reset validation failed: {serializer.errors}")
+        logger.error("Password reset validation failed: %s", serializer.errors)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 class ProfileView(APIView):
@@ -239,7 +232,7 @@ class ProfileView(APIView):
         if serializer.is_valid():
             serializer.save()
             return Response(serializer.data)
-        logger.error(f"Profile update failed for user {request.user.email}: {serializer.errors}")
+        logger.error("Profile update failed for user %s: %s", request.user.email, serializer.errors)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 class LoginView(APIView):
@@ -272,9 +265,9 @@ class LoginView(APIView):
                 secure=settings.DEBUG is False,
                 samesite='Lax'
             )
-            logger.info(f"Login successful for user: {user.email}")
+            logger.info("Login successful for user: %s", user.email)
             return response
-        logger.error(f"Login failed: {serializer.errors}")
+        logger.error("Login failed: %s", serializer.errors)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 class CustomTokenRefreshView(TokenRefreshView):
@@ -322,12 +315,12 @@ class CustomTokenRefreshView(TokenRefreshView):
             return response
             
         except TokenError as e:
-            logger.error(f"Token refresh failed: {str(e)}")
+            logger.error("Token refresh failed: %s", e)
             return Response({
                 'detail': f'Token is invalid or expired: {str(e)}'
             }, status=status.HTTP_401_UNAUTHORIZED)
         except Exception as e:
-            logger.error(f"Unexpected error during token refresh: {str(e)}")
+            logger.error("Unexpected error during token refresh: %s", e)
             return Response({
                 'detail': 'Token refresh failed'
             }, status=status.HTTP_400_BAD_REQUEST)
@@ -336,15 +329,15 @@ class LogoutView(APIView):
     permission_classes = [IsAuthenticated]
     
     def post(self, request):
-        logger.info(f"Logout attempt for user: {request.user.email}")
+        logger.info("Logout attempt for user: %s", request.user.email)
         try:
             refresh_token = request.COOKIES.get('refresh_token')
             if refresh_token:
                 token = RefreshToken(refresh_token)
                 token.blacklist()
-                logger.info(f"Token blacklisted successfully for user: {request.user.email}")
+                logger.info("Token blacklisted successfully for user: %s", request.user.email)
         except Exception as e:
-            logger.error(f"Error during logout for user {request.user.email}: {str(e)}")
+            logger.error("Error during logout for user %s: %s", request.user.email, e)
         
         response = Response({
             'message': 'Logout successful'
@@ -352,6 +345,7 @@ class LogoutView(APIView):
         
         response.delete_cookie('access_token')
         response.delete_cookie('refresh_token')
+        user_cache.invalidate(request.user.pk)
         
-        logger.info(f"Logout successful for user: {request.user.email}")
+        logger.info("Logout successful for user: %s", request.user.email)
         return response
\ No newline at end of file
@@ -0,0 +1,67 @@
+from asgiref.sync import iscoroutinefunction, sync_to_async
+from django.http import HttpResponse
+from django.views import View
+from django.views.decorators.csrf import csrf_exempt
+from rest_framework import status
+from rest_framework.exceptions import APIException, AuthenticationFailed, NotAuthenticated
+from rest_framework.parsers import FormParser, JSONParser, MultiPartParser
+from rest_framework.request import Request
+from auth_app.authentication import JWTCookieAuthentication
+from .renderers import FastJSONRenderer
+
+
+class AsyncAPIView(View):
+    """
+    Native async counterpart of a DRF APIView for ASGI deployments. The
+    async handlers defined on the subclass (usually `get`) run in the
+    event loop and use the async ORM; every other method is handed to
+    `sync_view_class`, the regular DRF view for the same URL, so writes
+    keep their serializers and permissions unchanged.
+
+    Handlers receive a DRF Request (for `query_params` and `data`) and
+    return JSON rendered with FastJSONRenderer; DRF exceptions raised
+    inside them become the same error bodies DRF would send. There is no
+    browsable API on the async paths.
+    """
+    authentication_class = JWTCookieAuthentication
+    require_authentication = True
+    sync_view_class = None
+    sync_view = None
+    parser_classes = (JSONParser, FormParser, MultiPartParser)
+
+    @classmethod
+    def as_view(cls, **initkwargs):
+        initkwargs.setdefault('sync_view', cls.sync_view_class.as_view())
+        # Token authentication only, like the DRF views
+        return csrf_exempt(super().as_view(**initkwargs))
+
+    async def dispatch(self, request, *args, **kwargs):
+        handler = getattr(self, request.method.lower(), None)
+        if request.method.lower() not in self.http_method_names or not iscoroutinefunction(handler):
+            return await sync_to_async(self.sync_view)(request, *args, **kwargs)
+
+        request = Request(request, parsers=[parser() for parser in self.parser_classes])
+        try:
+            await self.authenticate(request)
+            return await handler(request, *args, **kwargs)
+        except APIException as exc:
+            return self.handle_exception(request, exc)
+
+    async def authenticate(self, request):
+        result = None
+        if self.authentication_class is not None:
+            result = await self.authentication_class().aauthenticate(request._request)
+        if result is not None:
+            request.user, request.auth = result
+        elif self.require_authentication:
+            raise NotAuthenticated()
+
+    def handle_exception(self, request, exc):
+        data = exc.detail if isinstance(exc.detail, (list, dict)) else {'detail': exc.detail}
+        response = self.render(data, status=exc.status_code)
+        if isinstance(exc, (NotAuthenticated, AuthenticationFailed)) and self.authentication_class is not None:
+            response['WWW-Authenticate'] = self.authentication_class().authenticate_header(request)
+        return response
+
+    def render(self, data, status=status.HTTP_200_OK):
+        return HttpResponse(FastJSONRenderer().render(data), status=status, content_type='application/json')
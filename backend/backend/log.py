@@ -0,0 +1,118 @@
+import atexit
+import copy
+import itertools
+import json
+import logging
+import os
+import queue
+import threading
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+
+
+class JSONFormatter(logging.Formatter):
+    """
+    One JSON object per line: time, level, logger, message, and the
+    traceback when there is one.
+    """
+    def format(self, record):
+        entry = {
+            'time': datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+            'process': record.process,
+            'thread': record.threadName,
+        }
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            entry['exception'] = record.exc_text
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class SamplingFilter(logging.Filter):
+    """
+    Keeps one in every 1/`rate` records per message template for levels up
+    to `level`; warnings and errors always pass. Counting per template
+    (the unformatted `msg`) means a chatty "PDF served" line is thinned
+    out without hiding rare info messages.
+    """
+    max_templates = 10000
+
+    def __init__(self, rate=1.0, level='INFO'):
+        super().__init__()
+        self.every = max(1, round(1 / rate)) if rate > 0 else 0
+        self.level = logging.getLevelName(level) if isinstance(level, str) else level
+        self.counters = {}
+
+    def filter(self, record):
+        if record.levelno > self.level or self.every == 1:
+            return True
+        if self.every == 0:
+            return False
+        if len(self.counters) > self.max_templates:
+            self.counters = {}
+        counter = self.counters.setdefault((record.name, record.msg), itertools.count())
+        return next(counter) % self.every == 0
+
+
+class QueueListenerHandler(QueueHandler):
+    """
+    Puts records on an in-memory queue and lets a background thread pass
+    them to `handlers` (file, console), so request threads never wait on
+    disk I/O. In dictConfig, list the handlers as 'cfg://handlers.<name>'.
+    The message and traceback are rendered on the calling thread; JSON
+    encoding and writes happen on the listener. When the queue is full,
+    records are dropped and counted rather than blocking.
+    """
+    def __init__(self, handlers, queue_size=10000, respect_handler_level=True):
+        super().__init__(queue.Queue(maxsize=queue_size))
+        # Indexing resolves dictConfig's cfg:// references to the handlers
+        self.target_handlers = [handlers[index] for index in range(len(handlers))]
+        self.respect_handler_level = respect_handler_level
+        self.listener = None
+        self.listener_pid = None
+        self.start_lock = threading.Lock()
+        self.dropped = 0
+        atexit.register(self.stop)
+
+    def start(self):
+        with self.start_lock:
+            # A forked worker inherits the listener object but not its thread
+            if self.listener is None or self.listener_pid != os.getpid():
+                self.listener = QueueListener(
+                    self.queue, *self.target_handlers, respect_handler_level=self.respect_handler_level,
+                )
+                self.listener.start()
+                self.listener_pid = os.getpid()
+
+    def stop(self):
+        with self.start_lock:
+            if self.listener is not None and self.listener_pid == os.getpid():
+                self.listener.stop()
+            self.listener = None
+
+    def prepare(self, record):
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+    def emit(self, record):
+        if self.listener is None or self.listener_pid != os.getpid():
+            self.start()
+        super().emit(record)
+
+    def close(self):
+        self.stop()
+        super().close()
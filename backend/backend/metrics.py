@@ -0,0 +1,204 @@
+import contextvars
+import hmac
+import threading
+import time
+from contextlib import contextmanager
+from django.conf import settings
+from django.db import connections
+from django.http import HttpResponse, HttpResponseForbidden
+
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+MAX_RECORDED_QUERIES = 200
+
+_current = contextvars.ContextVar('request_metrics', default=None)
+
+
+class RequestMetrics:
+    """
+    What one request spent its time on. Filled in by PerformanceMiddleware's
+    query wrapper, the book cache and `timed()` blocks.
+    """
+    __slots__ = ('queries', 'db_time', 'cache_hits', 'cache_misses', 'timings', 'sql')
+
+    def __init__(self):
+        self.queries = 0
+        self.db_time = 0.0
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.timings = {}
+        self.sql = []
+
+    def record_query(self, sql, duration):
+        self.queries += 1
+        self.db_time += duration
+        if len(self.sql) < MAX_RECORDED_QUERIES:
+            self.sql.append((sql, duration))
+
+
+def start_request():
+    metrics = RequestMetrics()
+    return metrics, _current.set(metrics)
+
+
+def end_request(token):
+    _current.reset(token)
+
+
+def current():
+    return _current.get()
+
+
+@contextmanager
+def timed(name):
+    """
+    Adds the block's duration to the current request's `name` timing
+    (reported in Server-Timing and the metrics). A no-op outside requests.
+    """
+    metrics = _current.get()
+    if metrics is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        metrics.timings[name] = metrics.timings.get(name, 0.0) + time.perf_counter() - start
+
+
+def record_cache(outcome):
+    metrics = _current.get()
+    if metrics is not None:
+        if outcome == 'hits':
+            metrics.cache_hits += 1
+        else:
+            metrics.cache_misses += 1
+
+
+class Registry:
+    """
+    In-process Prometheus counters and a duration histogram per view,
+    method and status class. Each worker process keeps its own registry, so
+    scrape every worker or run one per metrics port.
+    """
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.series = {}
+
+    def observe(self, view, method, status, duration, metrics, response_bytes):
+        labels = (view, method, f'{status // 100}xx')
+        with self.lock:
+            series = self.series.get(labels)
+            if series is None:
+                series = self.series[labels] = {
+                    'count': 0, 'duration': 0.0, 'buckets': [0] * len(DURATION_BUCKETS),
+                    'db_queries': 0, 'db_time': 0.0, 'cache_hits': 0, 'cache_misses': 0,
+                    'timings': {}, 'response_bytes': 0,
+                }
+            series['count'] += 1
+            series['duration'] += duration
+            for index, bound in enumerate(DURATION_BUCKETS):
+                if duration <= bound:
+                    series['buckets'][index] += 1
+            series['db_queries'] += metrics.queries
+            series['db_time'] += metrics.db_time
+            series['cache_hits'] += metrics.cache_hits
+            series['cache_misses'] += metrics.cache_misses
+            for name, seconds in metrics.timings.items():
+                series['timings'][name] = series['timings'].get(name, 0.0) + seconds
+            series['response_bytes'] += response_bytes
+
+    def reset(self):
+        with self.lock:
+            self.series = {}
+
+    def render(self):
+        with self.lock:
+            series = {labels: {**values, 'buckets': list(values['buckets']), 'timings': dict(values['timings'])}
+                      for labels, values in self.series.items()}
+        lines = []
+
+        def family(name, kind, help_text):
+            lines.append(f'# HELP {name} {help_text}')
+            lines.append(f'# TYPE {name} {kind}')
+
+        def label_text(labels, **extra):
+            view, method, status = labels
+            pairs = {'view': view, 'method': method, 'status': status, **extra}
+            return ','.join(f'{key}="{value}"' for key, value in pairs.items())
+
+        family('http_request_duration_seconds', 'histogram', 'Request wall time.')
+        for labels, values in series.items():
+            for bound, count in zip(DURATION_BUCKETS, values['buckets']):
+                lines.append(f'http_request_duration_seconds_bucket{{{label_text(labels, le=bound)}}} {count}')
+            lines.append(f'http_request_duration_seconds_bucket{{{label_text(labels, le="+Inf")}}} {values["count"]}')
+            lines.append(f'http_request_duration_seconds_sum{{{label_text(labels)}}} {values["duration"]}')
+            lines.append(f'http_request_duration_seconds_count{{{label_text(labels)}}} {values["count"]}')
+
+        counters = (
+            ('http_db_queries_total', 'db_queries', 'Database queries run.'),
+            ('http_db_query_seconds_total', 'db_time', 'Time spent in database queries.'),
+            ('http_cache_hits_total', 'cache_hits', 'Book response cache hits.'),
+            ('http_cache_misses_total', 'cache_misses', 'Book response cache misses.'),
+            ('http_response_bytes_total', 'response_bytes', 'Response body bytes sent (streaming excluded).'),
+        )
+        for name, key, help_text in counters:
+            family(name, 'counter', help_text)
+            for labels, values in series.items():
+                lines.append(f'{name}{{{label_text(labels)}}} {values[key]}')
+
+        family('http_phase_seconds_total', 'counter', 'Time spent in timed phases such as serialize and render.')
+        for labels, values in series.items():
+            for phase, seconds in sorted(values['timings'].items()):
+                lines.append(f'http_phase_seconds_total{{{label_text(labels, phase=phase)}}} {seconds}')
+        return '\n'.join(lines) + '\n'
+
+
+registry = Registry()
+
+POOL_METRICS = (
+    ('db_pool_size', 'gauge', 'pool_size', 'Connections held by the pool, busy or idle.'),
+    ('db_pool_available', 'gauge', 'pool_available', 'Idle connections ready to be handed out.'),
+    ('db_pool_requests_waiting', 'gauge', 'requests_waiting', 'Requests waiting for a connection right now.'),
+    ('db_pool_requests_total', 'counter', 'requests_num', 'Connections handed out.'),
+    ('db_pool_requests_queued_total', 'counter', 'requests_queued', 'Requests that had to wait for a connection.'),
+    ('db_pool_wait_milliseconds_total', 'counter', 'requests_wait_ms', 'Time requests spent waiting for a connection.'),
+    ('db_pool_timeouts_total', 'counter', 'requests_errors', 'Requests that gave up waiting for a connection.'),
+)
+
+
+def render_pool_metrics():
+    """
+    psycopg pool statistics for every database configured with
+    OPTIONS['pool']. Queued requests and timeouts show pool exhaustion.
+    """
+    pools = {}
+    for alias in connections:
+        if connections.settings[alias].get('OPTIONS', {}).get('pool'):
+            pool = getattr(connections[alias], 'pool', None)
+            if pool is not None:
+                pools[alias] = pool.get_stats()
+    if not pools:
+        return ''
+    lines = []
+    for name, kind, key, help_text in POOL_METRICS:
+        lines.append(f'# HELP {name} {help_text}')
+        lines.append(f'# TYPE {name} {kind}')
+        for alias, stats in pools.items():
+            # psycopg leaves counters that are still zero out of the stats
+            lines.append(f'{name}{{database="{alias}"}} {stats.get(key, 0)}')
+    return ''.join(line + '\n' for line in lines)
+
+
+def metrics_view(request):
+    """
+    Prometheus scrape endpoint. Needs `Authorization: Bearer <METRICS_TOKEN>`
+    from one of METRICS_ALLOWED_IPS; behind a reverse proxy every client
+    has the proxy's address, so the token is what keeps it private.
+    """
+    token = getattr(settings, 'METRICS_TOKEN', '')
+    supplied = request.META.get('HTTP_AUTHORIZATION', '').removeprefix('Bearer ')
+    if not token or not hmac.compare_digest(supplied.encode(), token.encode()):
+        return HttpResponseForbidden()
+    if request.META.get('REMOTE_ADDR') not in getattr(settings, 'METRICS_ALLOWED_IPS', ['127.0.0.1', '::1']):
+        return HttpResponseForbidden()
+    return HttpResponse(registry.render() + render_pool_metrics(), content_type='text/plain; version=0.0.4; charset=utf-8')
@@ -0,0 +1,249 @@
+import gzip
+import logging
+import random
+import time
+import zlib
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.db import connection
+from django.utils.cache import patch_vary_headers
+from django.utils.text import compress_sequence
+from . import metrics
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+perf_logger = logging.getLogger('backend.perf')
+
+DEFAULT_SKIP_TYPES = (
+    'application/pdf', 'application/zip', 'application/gzip', 'application/x-gzip',
+    'image/', 'video/', 'audio/', 'font/woff',
+)
+
+
+def accepted_encodings(header):
+    """
+    Codings from an Accept-Encoding header with a non-zero q-value.
+    """
+    accepted = set()
+    for part in header.split(','):
+        coding, _, params = part.strip().partition(';')
+        q = 1.0
+        if params.strip().startswith('q='):
+            try:
+                q = float(params.strip()[2:])
+            except ValueError:
+                q = 0.0
+        if coding and q > 0:
+            accepted.add(coding.strip().lower())
+    return accepted
+
+
+def compress_brotli_sequence(sequence, quality):
+    compressor = brotli.Compressor(quality=quality)
+    for chunk in sequence:
+        data = compressor.process(chunk)
+        if data:
+            yield data
+    yield compressor.finish()
+
+
+async def compress_async_sequence(sequence, coding, gzip_level, brotli_quality):
+    # Async streaming bodies; each chunk is flushed so it goes out at once
+    if coding == 'br':
+        compressor = brotli.Compressor(quality=brotli_quality)
+        compress, flush, finish = compressor.process, compressor.flush, compressor.finish
+    else:
+        compressor = zlib.compressobj(gzip_level, zlib.DEFLATED, 31)
+        compress, finish = compressor.compress, compressor.flush
+        flush = lambda: compressor.flush(zlib.Z_SYNC_FLUSH)
+    async for chunk in sequence:
+        data = compress(chunk) + flush()
+        if data:
+            yield data
+    yield finish()
+
+
+class CompressionMiddleware:
+    """
+    Brotli (when installed) or gzip compression for responses of at least
+    COMPRESSION_MIN_SIZE bytes. Content types listed in
+    COMPRESSION_SKIP_TYPES, such as PDFs and images, are passed through
+    untouched, as are partial responses and anything already encoded.
+    Streaming responses such as the JSONL export are compressed on the fly.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+        self.min_size = getattr(settings, 'COMPRESSION_MIN_SIZE', 1024)
+        self.skip_types = tuple(getattr(settings, 'COMPRESSION_SKIP_TYPES', DEFAULT_SKIP_TYPES))
+        self.gzip_level = getattr(settings, 'COMPRESSION_GZIP_LEVEL', 6)
+        self.brotli_quality = getattr(settings, 'COMPRESSION_BROTLI_QUALITY', 4)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        return self.process_response(request, self.get_response(request))
+
+    async def __acall__(self, request):
+        return self.process_response(request, await self.get_response(request))
+
+    def process_response(self, request, response):
+        if not self.is_compressible(response):
+            return response
+        # Caches must key on Accept-Encoding even when this client gets identity
+        patch_vary_headers(response, ('Accept-Encoding',))
+        coding = self.choose_coding(request)
+        if coding is None:
+            return response
+
+        if response.streaming and response.is_async:
+            response.streaming_content = compress_async_sequence(
+                response.streaming_content, coding, self.gzip_level, self.brotli_quality
+            )
+            del response.headers['Content-Length']
+        elif response.streaming:
+            if coding == 'br':
+                response.streaming_content = compress_brotli_sequence(response.streaming_content, self.brotli_quality)
+            else:
+                response.streaming_content = compress_sequence(response.streaming_content)
+            del response.headers['Content-Length']
+        else:
+            if coding == 'br':
+                content = brotli.compress(response.content, quality=self.brotli_quality)
+            else:
+                content = gzip.compress(response.content, compresslevel=self.gzip_level, mtime=0)
+            if len(content) >= len(response.content):
+                return response
+            response.content = content
+            response.headers['Content-Length'] = str(len(content))
+
+        # The body changed, so a strong validator no longer applies
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            response.headers['ETag'] = 'W/' + etag
+        response.headers['Content-Encoding'] = coding
+        return response
+
+    def is_compressible(self, response):
+        if response.status_code != 200 or response.has_header('Content-Encoding'):
+            return False
+        content_type = response.get('Content-Type', '').split(';')[0].strip().lower()
+        if not content_type or content_type.startswith(self.skip_types):
+            return False
+        return response.streaming or len(response.content) >= self.min_size
+
+    def choose_coding(self, request):
+        accepted = accepted_encodings(request.META.get('HTTP_ACCEPT_ENCODING', ''))
+        if brotli is not None and 'br' in accepted:
+            return 'br'
+        if 'gzip' in accepted:
+            return 'gzip'
+        return None
+
+
+class PerformanceMiddleware:
+    """
+    Records wall time, database queries and their time, book cache hits
+    and misses, timed phases (serialize, render) and response bytes for
+    every request. Totals per view are exposed at /internal/metrics in
+    Prometheus format and each response gets a Server-Timing header.
+    Requests slower than PERF_SLOW_REQUEST_MS are logged with their
+    queries, for a PERF_SLOW_SAMPLE_RATE share of them.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+        self.enabled = getattr(settings, 'PERF_METRICS_ENABLED', True)
+        self.slow_seconds = getattr(settings, 'PERF_SLOW_REQUEST_MS', 500) / 1000
+        self.sample_rate = getattr(settings, 'PERF_SLOW_SAMPLE_RATE', 1.0)
+        self.server_timing = getattr(settings, 'PERF_SERVER_TIMING', True)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        if not self.enabled:
+            return self.get_response(request)
+
+        request_metrics, token = metrics.start_request()
+        start = time.perf_counter()
+        try:
+            with connection.execute_wrapper(self.query_recorder(request_metrics)):
+                response = self.get_response(request)
+        finally:
+            metrics.end_request(token)
+        return self.process_response(request, response, time.perf_counter() - start, request_metrics)
+
+    async def __acall__(self, request):
+        if not self.enabled:
+            return await self.get_response(request)
+
+        request_metrics, token = metrics.start_request()
+        # Async ORM calls run on the request's thread-sensitive executor
+        # thread, so the wrapper goes on that thread's connection.
+        recorder = self.query_recorder(request_metrics)
+        await sync_to_async(connection.execute_wrappers.append)(recorder)
+        start = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            await sync_to_async(connection.execute_wrappers.remove)(recorder)
+            metrics.end_request(token)
+        return self.process_response(request, response, time.perf_counter() - start, request_metrics)
+
+    def query_recorder(self, request_metrics):
+        def record_query(execute, sql, params, many, context):
+            start = time.perf_counter()
+            try:
+                return execute(sql, params, many, context)
+            finally:
+                request_metrics.record_query(sql, time.perf_counter() - start)
+        return record_query
+
+    def process_response(self, request, response, duration, request_metrics):
+        view = self.view_name(request)
+        response_bytes = 0 if response.streaming else len(response.content)
+        metrics.registry.observe(view, request.method, response.status_code, duration, request_metrics, response_bytes)
+        if self.server_timing:
+            response.headers['Server-Timing'] = self.server_timing_header(duration, request_metrics)
+        if duration >= self.slow_seconds and random.random() < self.sample_rate:
+            self.log_slow_request(request, view, duration, request_metrics)
+        return response
+
+    def view_name(self, request):
+        # Taken from the resolver match rather than a process_view hook,
+        # which Django would run through a thread for async requests
+        match = getattr(request, 'resolver_match', None)
+        if match is None:
+            return 'unresolved'
+        view_class = getattr(match.func, 'view_class', None)
+        return view_class.__name__ if view_class else match.func.__name__
+
+    def server_timing_header(self, duration, request_metrics):
+        entries = [
+            f'app;dur={duration * 1000:.1f}',
+            f'db;dur={request_metrics.db_time * 1000:.1f};desc="{request_metrics.queries} queries"',
+        ]
+        if request_metrics.cache_hits or request_metrics.cache_misses:
+            entries.append(f'cache;desc="{request_metrics.cache_hits} hit {request_metrics.cache_misses} miss"')
+        for name, seconds in request_metrics.timings.items():
+            entries.append(f'{name};dur={seconds * 1000:.1f}')
+        return ', '.join(entries)
+
+    def log_slow_request(self, request, view, duration, request_metrics):
+        queries = '\n'.join(f'  {seconds * 1000:.1f}ms {sql}' for sql, seconds in request_metrics.sql)
+        perf_logger.warning(
+            "Slow request %s %s (%s): %.0fms, %s queries in %.0fms\n%s",
+            request.method, request.get_full_path(), view, duration * 1000,
+            request_metrics.queries, request_metrics.db_time * 1000, queries,
+        )
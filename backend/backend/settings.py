@@ -11,12 +11,16 @@ https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 
 from pathlib import Path
-from decouple import config
+from decouple import Csv, config
 import logging
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 
+# Files written at runtime (OTP store, logs) live here, outside the source
+DATA_DIR = Path(config('DATA_DIR', default=str(BASE_DIR / 'var')))
+DATA_DIR.mkdir(parents=True, exist_ok=True)
+
 
 # Quick-start development settings - unsuitable for production
 # See https://docs.djangoproject.com/en/5.2/howto/deployment/checklist/
@@ -44,11 +48,19 @@ INSTALLED_APPS = [
     'rest_framework_simplejwt.token_blacklist',
     'corsheaders',
     'auth_app',
-    'book_app'
+    'book_app',
 ]
 
+# Benchmark commands (seed_catalog, run_benchmarks, ...), see bench_app.
+# seed_catalog --reset wipes the catalog, so keep it out of production.
+BENCHMARKS = config('BENCHMARKS', default=DEBUG, cast=bool)
+if BENCHMARKS:
+    INSTALLED_APPS.append('bench_app')
+
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'backend.middleware.PerformanceMiddleware',
+    'backend.middleware.CompressionMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -84,6 +96,12 @@ TEMPLATES = [
 ]
 
 WSGI_APPLICATION = 'backend.wsgi.application'
+ASGI_APPLICATION = 'backend.asgi.application'
+
+# Native async views for the book list/detail, PDF download, reading lists
+# and OTP emails. Only worth it under an ASGI server; under WSGI each async
+# view would run in its own event loop.
+ASYNC_VIEWS = config('ASYNC_VIEWS', default=False, cast=bool)
 
 
 # Database
@@ -97,9 +115,28 @@ DATABASES = {
         'PASSWORD': config('DB_PASSWORD'),
         'HOST': config('DB_HOST'),
         'PORT': config('DB_PORT'),
+        # Keep each worker thread's connection instead of reconnecting per
+        # request; it is checked before reuse after sitting idle
+        'CONN_MAX_AGE': config('DB_CONN_MAX_AGE', default=60, cast=int),
+        'CONN_HEALTH_CHECKS': config('DB_CONN_HEALTH_CHECKS', default=True, cast=bool),
     }
 }
 
+# psycopg's connection pool, shared by all threads of a worker process.
+# Replaces persistent connections (Django requires CONN_MAX_AGE=0 with it)
+# and suits ASGI, where connections are not tied to a long-lived thread.
+if config('DB_POOL', default=False, cast=bool):
+    DATABASES['default']['CONN_MAX_AGE'] = 0
+    DATABASES['default']['OPTIONS'] = {
+        'pool': {
+            'min_size': config('DB_POOL_MIN_SIZE', default=2, cast=int),
+            'max_size': config('DB_POOL_MAX_SIZE', default=10, cast=int),
+            # Seconds a request waits for a free connection before failing
+            'timeout': config('DB_POOL_TIMEOUT', default=10, cast=float),
+            'max_idle': config('DB_POOL_MAX_IDLE', default=300, cast=float),
+        },
+    }
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
@@ -120,15 +157,52 @@ AUTH_PASSWORD_VALIDATORS = [
 ]
 
 REST_FRAMEWORK = {
+    # JWTCookieAuthentication also accepts the Authorization header
     'DEFAULT_AUTHENTICATION_CLASSES': [
         'auth_app.authentication.JWTCookieAuthentication',
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
     ],
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticated',
     ],
+    # orjson when installed, DRF's stdlib encoder otherwise
+    'DEFAULT_RENDERER_CLASSES': [
+        'backend.renderers.FastJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
 }
 
+# Per-view request metrics, see backend.middleware.PerformanceMiddleware.
+# Prometheus scrapes /internal/metrics with METRICS_TOKEN as a bearer token,
+# from METRICS_ALLOWED_IPS. Behind a reverse proxy REMOTE_ADDR is the
+# proxy's, so the IP list alone does not protect the endpoint.
+PERF_METRICS_ENABLED = config('PERF_METRICS_ENABLED', default=True, cast=bool)
+PERF_SERVER_TIMING = config('PERF_SERVER_TIMING', default=True, cast=bool)
+PERF_SLOW_REQUEST_MS = config('PERF_SLOW_REQUEST_MS', default=500, cast=int)
+PERF_SLOW_SAMPLE_RATE = config('PERF_SLOW_SAMPLE_RATE', default=1.0, cast=float)
+METRICS_ALLOWED_IPS = config('METRICS_ALLOWED_IPS', default='127.0.0.1,::1', cast=Csv())
+# The endpoint is disabled while this is empty
+METRICS_TOKEN = config('METRICS_TOKEN', default='')
+
+# Brotli/gzip for responses of at least this many bytes, see backend.middleware
+COMPRESSION_MIN_SIZE = config('COMPRESSION_MIN_SIZE', default=1024, cast=int)
+COMPRESSION_GZIP_LEVEL = config('COMPRESSION_GZIP_LEVEL', default=6, cast=int)
+COMPRESSION_BROTLI_QUALITY = config('COMPRESSION_BROTLI_QUALITY', default=4, cast=int)
+# Already compressed content is sent as is (prefixes of the content type)
+COMPRESSION_SKIP_TYPES = [
+    'application/pdf', 'application/zip', 'application/gzip', 'application/x-gzip',
+    'image/', 'video/', 'audio/', 'font/woff',
+]
+
+# Authenticated users are cached per process for a short time
+AUTH_USER_CACHE_TTL = config('AUTH_USER_CACHE_TTL', default=30, cast=int)
+AUTH_USER_CACHE_SIZE = config('AUTH_USER_CACHE_SIZE', default=1024, cast=int)
+
+# Keyset pagination for book and reading-list collections
+API_PAGE_SIZE = config('API_PAGE_SIZE', default=20, cast=int)
+API_MAX_PAGE_SIZE = config('API_MAX_PAGE_SIZE', default=100, cast=int)
+# 'exact', 'estimate' or empty to omit the total count by default
+API_PAGINATION_COUNT = config('API_PAGINATION_COUNT', default='')
+
 from datetime import timedelta
 
 
@@ -181,16 +255,102 @@ EMAIL_HOST_USER = config('EMAIL_USER')
 EMAIL_HOST_PASSWORD = config('EMAIL_PASSWORD')
 DEFAULT_FROM_EMAIL = EMAIL_HOST_USER
 
-CACHES = {
-    'default': {
-        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
-        'LOCATION': 'unique-snowflake',  
+# Outbox delivered by `manage.py send_queued_mail`
+EMAIL_OUTBOX_MAX_ATTEMPTS = config('EMAIL_OUTBOX_MAX_ATTEMPTS', default=5, cast=int)
+EMAIL_OUTBOX_RETRY_DELAY = config('EMAIL_OUTBOX_RETRY_DELAY', default=30, cast=int)
+EMAIL_OUTBOX_MAX_RETRY_DELAY = config('EMAIL_OUTBOX_MAX_RETRY_DELAY', default=3600, cast=int)
+# Seconds a worker holds claimed emails before another worker may retry them
+EMAIL_OUTBOX_LEASE = config('EMAIL_OUTBOX_LEASE', default=300, cast=int)
+# Sent and given-up emails are deleted after this many days
+EMAIL_OUTBOX_RETENTION_DAYS = config('EMAIL_OUTBOX_RETENTION_DAYS', default=7, cast=int)
+
+REDIS_URL = config('REDIS_URL', default='')
+
+if REDIS_URL:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': REDIS_URL,
+        },
+        # Bound its size on the server with maxmemory/allkeys-lru
+        'books': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': REDIS_URL,
+            'KEY_PREFIX': 'books',
+        },
     }
-}
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'LOCATION': 'unique-snowflake',  
+        },
+        'books': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'LOCATION': 'book-responses',
+            'OPTIONS': {
+                'MAX_ENTRIES': config('BOOK_CACHE_MAX_ENTRIES', default=1000, cast=int),
+            },
+        },
+    }
+
+# One-time passwords must be visible to every worker process
+if REDIS_URL:
+    OTP_STORE = {
+        'BACKEND': 'auth_app.otp_store.RedisOTPStore',
+        'OPTIONS': {'url': REDIS_URL},
+    }
+else:
+    OTP_STORE = {
+        'BACKEND': 'auth_app.otp_store.SQLiteOTPStore',
+        'OPTIONS': {'path': config('OTP_STORE_PATH', default=str(DATA_DIR / 'otp.sqlite3'))},
+    }
+
+# Versioned response cache for book list/detail GETs
+BOOK_CACHE_ALIAS = 'books'
+BOOK_CACHE_TIMEOUT = config('BOOK_CACHE_TIMEOUT', default=300, cast=int)
+# Responses are only cached when every worker sees the same cache (Redis,
+# or a single-process deployment). Otherwise the catalog version lives in
+# a one-row database table (book_app.CatalogVersion) and nothing is cached.
+BOOK_CACHE_SHARED = config('BOOK_CACHE_SHARED', default=bool(REDIS_URL), cast=bool)
 
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
+
+# Resumable chunked PDF uploads (sizes in bytes). Part files are kept in
+# MEDIA_ROOT/uploads unless CHUNKED_UPLOAD_DIR is set.
+CHUNKED_UPLOAD_DIR = config('CHUNKED_UPLOAD_DIR', default='')
+CHUNKED_UPLOAD_CHUNK_SIZE = config('CHUNKED_UPLOAD_CHUNK_SIZE', default=5 * 1024 * 1024, cast=int)
+CHUNKED_UPLOAD_MAX_CHUNK_SIZE = config('CHUNKED_UPLOAD_MAX_CHUNK_SIZE', default=64 * 1024 * 1024, cast=int)
+CHUNKED_UPLOAD_MAX_SIZE = config('CHUNKED_UPLOAD_MAX_SIZE', default=1024 * 1024 * 1024, cast=int)
+
+# Characters of extracted PDF text kept for search indexing
+PDF_TEXT_MAX_CHARS = config('PDF_TEXT_MAX_CHARS', default=200000, cast=int)
+# `process_pdfs --retry-failed` only requeues books processing for longer than this (seconds)
+PDF_PROCESSING_STALE_AFTER = config('PDF_PROCESSING_STALE_AFTER', default=3600, cast=int)
+
+# Let the front proxy send PDFs: 'x-accel-redirect' (nginx), 'x-sendfile'
+# (Apache/lighttpd) or empty to stream them from Django.
+PDF_SENDFILE_MODE = config('PDF_SENDFILE_MODE', default='')
+PDF_SENDFILE_URL_PREFIX = config('PDF_SENDFILE_URL_PREFIX', default='/protected-media/')
+
+# Unreferenced content-addressed PDFs and covers are kept this long before
+# `manage.py gc_blobs` deletes them
+BLOB_GC_GRACE_HOURS = config('BLOB_GC_GRACE_HOURS', default=24, cast=int)
+
+# POST /api/books/import/ (staff only) rejects files with more rows than
+# this; larger catalogs go through `manage.py import_books`
+BOOK_IMPORT_MAX_ROWS = config('BOOK_IMPORT_MAX_ROWS', default=1000, cast=int)
 import os
+# Request threads only enqueue log records; a listener thread writes them
+# to the console and a size-rotated JSON file, see backend.log.
+LOG_LEVEL = config('LOG_LEVEL', default='DEBUG' if DEBUG else 'INFO')
+LOG_FILE = config('LOG_FILE', default=str(DATA_DIR / 'debug.log'))
+LOG_FILE_MAX_BYTES = config('LOG_FILE_MAX_BYTES', default=10 * 1024 * 1024, cast=int)
+LOG_FILE_BACKUP_COUNT = config('LOG_FILE_BACKUP_COUNT', default=5, cast=int)
+# Share of INFO-and-below records kept per message template (1.0 keeps all)
+LOG_SAMPLE_RATE = config('LOG_SAMPLE_RATE', default=1.0, cast=float)
+LOG_QUEUE_SIZE = config('LOG_QUEUE_SIZE', default=10000, cast=int)
 LOGGING = {
     'version': 1,
     'disable_existing_loggers': False,
@@ -200,6 +360,16 @@ LOGGING = {
             'format': '{levelname} {asctime} {name} {message}',
             'style': '{',
         },
+        'json': {
+            '()': 'backend.log.JSONFormatter',
+        },
+    },
+
+    'filters': {
+        'sampling': {
+            '()': 'backend.log.SamplingFilter',
+            'rate': LOG_SAMPLE_RATE,
+        },
     },
 
     'handlers': {
@@ -208,14 +378,22 @@ LOGGING = {
             'formatter': 'simple',
         },
         'file': {
-            'class': 'logging.FileHandler',
-            'filename': os.path.join(BASE_DIR, 'debug.log'),
-            'formatter': 'simple',
+            'class': 'logging.handlers.RotatingFileHandler',
+            'filename': LOG_FILE,
+            'maxBytes': LOG_FILE_MAX_BYTES,
+            'backupCount': LOG_FILE_BACKUP_COUNT,
+            'formatter': 'json',
+        },
+        'queue': {
+            '()': 'backend.log.QueueListenerHandler',
+            'handlers': ['cfg://handlers.console', 'cfg://handlers.file'],
+            'queue_size': LOG_QUEUE_SIZE,
+            'filters': ['sampling'],
         },
     },
 
     'root': {
-        'handlers': ['console', 'file'],
-        'level': 'DEBUG',
+        'handlers': ['queue'],
+        'level': LOG_LEVEL,
     },
 }
\ No newline at end of file
@@ -18,8 +18,10 @@ from django.contrib import admin
 from django.urls import path, include
 from django.conf.urls.static import static
 from django.conf import settings
+from .metrics import metrics_view
 urlpatterns = [
     path('admin/', admin.site.urls),
+    path('internal/metrics', metrics_view, name='metrics'),
     path('api/',include('auth_app.urls')),
     path('api/',include('book_app.urls'))
 ]+ static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT )
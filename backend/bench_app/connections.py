@@ -0,0 +1,115 @@
+import copy
+import threading
+import time
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.db.utils import load_backend
+from .stats import summarize
+
+MODES = ('new', 'persistent', 'pool')
+
+
+def pool_supported(alias='default'):
+    if connections[alias].vendor != 'postgresql':
+        return False
+    from django.db.backends.postgresql.psycopg_any import is_psycopg3
+    try:
+        import psycopg_pool  # noqa: F401
+    except ImportError:
+        return False
+    return is_psycopg3
+
+
+def database_wrapper(alias, mode, pool_size=4, pool_timeout=5.0):
+    """
+    A private connection to `alias`'s database set up for `mode`: `new`
+    connects for every request (CONN_MAX_AGE=0), `persistent` keeps the
+    connection and health-checks it, `pool` borrows from a psycopg pool.
+    Each mode gets its own alias, so pools are never shared with the app.
+    """
+    settings_dict = copy.deepcopy(connections.settings[alias])
+    options = settings_dict.setdefault('OPTIONS', {})
+    options.pop('pool', None)
+    if mode == 'pool':
+        settings_dict['CONN_MAX_AGE'] = 0
+        options['pool'] = {'min_size': 1, 'max_size': pool_size, 'timeout': pool_timeout}
+    else:
+        settings_dict['CONN_MAX_AGE'] = 0 if mode == 'new' else 600
+        settings_dict['CONN_HEALTH_CHECKS'] = mode == 'persistent'
+    backend = load_backend(settings_dict['ENGINE'])
+    return backend.DatabaseWrapper(settings_dict, f'bench_{mode}')
+
+
+def simulate_request(wrapper):
+    # close_old_connections() runs on request_started and request_finished
+    wrapper.close_if_unusable_or_obsolete()
+    with wrapper.cursor() as cursor:
+        cursor.execute('SELECT 1')
+        cursor.fetchone()
+    wrapper.close_if_unusable_or_obsolete()
+
+
+def run_mode(alias, mode, requests, threads, pool_size=4, pool_timeout=5.0):
+    """
+    Runs `requests` simulated requests (connection checkout, one query,
+    release) over `threads` threads with their own connection handles, as
+    in a threaded WSGI worker. A pool smaller than `threads` shows what
+    happens when it runs dry: queued requests, wait time and timeouts.
+    """
+    latencies = []
+    errors = [0]
+    opened = [0]
+    lock = threading.Lock()
+    bench_alias = f'bench_{mode}'
+
+    def count_connection(sender, connection, **kwargs):
+        if connection.alias == bench_alias:
+            with lock:
+                opened[0] += 1
+
+    def worker(count):
+        wrapper = database_wrapper(alias, mode, pool_size, pool_timeout)
+        local, failures = [], 0
+        try:
+            for _ in range(count):
+                start = time.perf_counter()
+                try:
+                    simulate_request(wrapper)
+                except Exception:
+                    failures += 1
+                    continue
+                local.append(time.perf_counter() - start)
+        finally:
+            wrapper.close()
+            with lock:
+                latencies.extend(local)
+                errors[0] += failures
+
+    counts = [requests // threads + (1 if index < requests % threads else 0) for index in range(threads)]
+    workers = [threading.Thread(target=worker, args=(count,)) for count in counts if count]
+    connection_created.connect(count_connection)
+    start = time.perf_counter()
+    try:
+        for thread in workers:
+            thread.start()
+        for thread in workers:
+            thread.join()
+    finally:
+        connection_created.disconnect(count_connection)
+    elapsed = time.perf_counter() - start
+
+    result = {'mode': mode, **summarize(latencies, elapsed, errors[0])}
+    if mode == 'pool':
+        wrapper = database_wrapper(alias, mode, pool_size, pool_timeout)
+        stats = wrapper.pool.get_stats()
+        wrapper.close_pool()
+        result['connections_opened'] = stats.get('connections_num', 0)
+        result['pool'] = {
+            'max_size': pool_size,
+            'requests_queued': stats.get('requests_queued', 0),
+            'wait_ms': stats.get('requests_wait_ms', 0),
+            'timeouts': stats.get('requests_errors', 0),
+        }
+    else:
+        result['connections_opened'] = opened[0]
+    return result
@@ -0,0 +1,61 @@
+import json
+from django.core.management.base import BaseCommand, CommandError
+from bench_app.connections import MODES, pool_supported, run_mode
+from bench_app.management.commands.run_benchmarks import fmt
+from bench_app.runner import run_metadata
+
+
+class Command(BaseCommand):
+    help = (
+        'Compares connecting per request, persistent connections and a psycopg '
+        'pool by running simulated requests (checkout, SELECT 1, release) from '
+        'several threads. With --pool-size below --threads it also shows pool '
+        'exhaustion: queued requests, total wait time and timeouts.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=2000, help='Simulated requests per mode.')
+        parser.add_argument('--threads', type=int, default=8, help='Concurrent threads, each with its own connection handle.')
+        parser.add_argument('--modes', nargs='+', choices=MODES, default=list(MODES))
+        parser.add_argument('--pool-size', type=int, default=4, help='max_size of the benchmark pool.')
+        parser.add_argument('--pool-timeout', type=float, default=5.0,
+                            help='Seconds a request waits for a pooled connection.')
+        parser.add_argument('--database', default='default')
+        parser.add_argument('--output', help='Write the results to this JSON file.')
+
+    def handle(self, *args, **options):
+        modes = options['modes']
+        if 'pool' in modes and not pool_supported(options['database']):
+            if modes == ['pool']:
+                raise CommandError('The pool needs PostgreSQL with psycopg 3 and psycopg_pool.')
+            self.stderr.write('Skipping pool: needs PostgreSQL with psycopg 3 and psycopg_pool.')
+            modes = [mode for mode in modes if mode != 'pool']
+
+        results = {
+            'meta': run_metadata('connections', options['requests'], options['threads'], None),
+            'modes': {},
+        }
+        self.stdout.write(
+            f"{'mode':<12} {'p50':>8} {'p95':>8} {'p99':>8} {'req/s':>9} {'opened':>7} {'errors':>7}"
+        )
+        for mode in modes:
+            result = run_mode(
+                options['database'], mode, options['requests'], options['threads'],
+                options['pool_size'], options['pool_timeout'],
+            )
+            results['modes'][mode] = result
+            self.stdout.write(
+                f"{mode:<12} {fmt(result['p50_ms'])} {fmt(result['p95_ms'])} {fmt(result['p99_ms'])} "
+                f"{fmt(result['throughput_rps'], 9)} {result['connections_opened']:>7} {result['errors']:>7}"
+            )
+            if 'pool' in result:
+                pool = result['pool']
+                self.stdout.write(
+                    f"  pool of {pool['max_size']}: {pool['requests_queued']} requests queued, "
+                    f"{pool['wait_ms']} ms waiting, {pool['timeouts']} timeouts"
+                )
+
+        if options['output']:
+            with open(options['output'], 'w') as f:
+                json.dump(results, f, indent=2)
+            self.stdout.write(f"Results written to {options['output']}")
@@ -0,0 +1,21 @@
+import json
+from django.core.management.base import BaseCommand
+from bench_app.management.commands.run_benchmarks import report_regressions
+from bench_app.stats import compare
+
+
+class Command(BaseCommand):
+    help = 'Compares two run_benchmarks result files and fails when the second regressed.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('baseline', help='Stored results, e.g. from the main branch.')
+        parser.add_argument('current', help='Results to check.')
+        parser.add_argument('--threshold', type=float, default=0.10,
+                            help='Relative change in latency or throughput that counts as a regression.')
+
+    def handle(self, *args, **options):
+        with open(options['baseline']) as f:
+            baseline = json.load(f)
+        with open(options['current']) as f:
+            current = json.load(f)
+        report_regressions(self, compare(baseline, current, options['threshold']))
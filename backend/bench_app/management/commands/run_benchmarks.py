@@ -0,0 +1,91 @@
+import json
+from functools import partial
+from django.core.management.base import BaseCommand, CommandError
+from django.urls import get_resolver
+from bench_app.runner import ClientDriver, HTTPDriver, run_metadata, run_scenario
+from bench_app.scenarios import SCENARIOS, BenchContext
+from bench_app.seed import bench_email, bench_users
+from bench_app.stats import compare
+
+
+def api_url_names():
+    names = set()
+    for module in ('book_app.urls', 'auth_app.urls'):
+        names.update(pattern.name for pattern in get_resolver(module).url_patterns if pattern.name)
+    return names
+
+
+class Command(BaseCommand):
+    help = (
+        'Drives every book_app and auth_app endpoint through the Django test '
+        'client (--mode client) or a running server (--mode http --url ...) and '
+        'records p50/p95/p99 latency, throughput, queries per request and peak '
+        'RSS. Run seed_catalog first. Scenarios create and delete their own data.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--mode', choices=['client', 'http'], default='client')
+        parser.add_argument('--url', default='http://127.0.0.1:8000', help='Server for --mode http.')
+        parser.add_argument('--iterations', type=int, default=200, help='Timed requests per scenario.')
+        parser.add_argument('--concurrency', type=int, default=8,
+                            help='Concurrent workers in http mode, each as its own benchmark user.')
+        parser.add_argument('--warmup', type=int, default=5, help='Untimed requests per scenario.')
+        parser.add_argument('--scenarios', nargs='+', help='Only run these scenarios.')
+        parser.add_argument('--output', help='Write the results to this JSON file.')
+        parser.add_argument('--baseline', help='Compare against a stored results file and fail on regressions.')
+        parser.add_argument('--threshold', type=float, default=0.10,
+                            help='Relative change that counts as a regression.')
+
+    def handle(self, *args, **options):
+        scenarios = SCENARIOS
+        if options['scenarios']:
+            unknown = set(options['scenarios']) - {scenario.name for scenario in SCENARIOS}
+            if unknown:
+                raise CommandError(f"Unknown scenarios: {', '.join(sorted(unknown))}")
+            scenarios = [scenario for scenario in SCENARIOS if scenario.name in options['scenarios']]
+        missing = api_url_names() - {scenario.url_name for scenario in SCENARIOS}
+        if missing:
+            self.stderr.write(f"No scenario covers: {', '.join(sorted(missing))}")
+
+        concurrency = options['concurrency'] if options['mode'] == 'http' else 1
+        users = list(bench_users().filter(email__in=[bench_email(index) for index in range(concurrency)]).order_by('id'))
+        if len(users) < concurrency:
+            raise CommandError(f'Need {concurrency} benchmark users; run seed_catalog first.')
+        contexts = [BenchContext(user) for user in users]
+        make_driver = partial(HTTPDriver, base_url=options['url']) if options['mode'] == 'http' else ClientDriver
+
+        results = {
+            'meta': run_metadata(options['mode'], options['iterations'], concurrency,
+                                 options['url'] if options['mode'] == 'http' else None),
+            'scenarios': {},
+        }
+        self.stdout.write(f"{'scenario':<30} {'p50':>8} {'p95':>8} {'p99':>8} {'req/s':>9} {'queries':>8} {'errors':>7}")
+        for scenario in scenarios:
+            summary = run_scenario(make_driver, scenario, contexts, options['iterations'], options['warmup'])
+            results['scenarios'][scenario.name] = summary
+            self.stdout.write(
+                f"{scenario.name:<30} {fmt(summary['p50_ms'])} {fmt(summary['p95_ms'])} {fmt(summary['p99_ms'])} "
+                f"{fmt(summary['throughput_rps'], 9)} {fmt(summary['queries_per_request'])} {summary['errors']:>7}"
+            )
+        self.stdout.write(f"Peak RSS: {results['scenarios'][scenarios[-1].name]['peak_rss_kb']} KB")
+
+        if options['output']:
+            with open(options['output'], 'w') as f:
+                json.dump(results, f, indent=2)
+            self.stdout.write(f"Results written to {options['output']}")
+        if options['baseline']:
+            with open(options['baseline']) as f:
+                baseline = json.load(f)
+            report_regressions(self, compare(baseline, results, options['threshold']))
+
+
+def fmt(value, width=8):
+    return f'{value:>{width}.1f}' if value is not None else f"{'-':>{width}}"
+
+
+def report_regressions(command, regressions):
+    for name, metric, old, new in regressions:
+        command.stderr.write(f'REGRESSION {name} {metric}: {old} -> {new}')
+    if regressions:
+        raise CommandError(f'{len(regressions)} regressions against the baseline')
+    command.stdout.write(command.style.SUCCESS('No regressions against the baseline.'))
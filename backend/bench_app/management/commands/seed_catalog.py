@@ -0,0 +1,37 @@
+from django.core.management.base import BaseCommand
+from bench_app.seed import PRESETS, bench_users, reset_catalog, seed_catalog
+
+
+class Command(BaseCommand):
+    help = (
+        'Seeds a synthetic catalog for benchmarks: verified users @bench.local, '
+        'books and reading lists, all created with bulk_create.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--preset', choices=sorted(PRESETS), default='small',
+                            help='small: 1k books, medium: 100k, large: 1M.')
+        parser.add_argument('--books', type=int, help='Overrides the preset book count.')
+        parser.add_argument('--users', type=int, help='Overrides the preset user count.')
+        parser.add_argument('--lists-per-user', type=int, help='Overrides the preset reading lists per user.')
+        parser.add_argument('--books-per-list', type=int, help='Overrides the preset books per reading list.')
+        parser.add_argument('--batch-size', type=int, default=5000, help='Rows per bulk_create.')
+        parser.add_argument('--seed', type=int, default=42, help='Random seed for reading-list contents.')
+        parser.add_argument('--reset', action='store_true', help='Delete the previous benchmark data first.')
+
+    def handle(self, *args, **options):
+        if options['reset']:
+            self.stdout.write(f'Deleted {reset_catalog()} benchmark rows.')
+        elif bench_users().exists():
+            self.stderr.write('Benchmark users already exist; pass --reset to replace them.')
+            return
+
+        sizes = dict(PRESETS[options['preset']])
+        for key in sizes:
+            if options[key] is not None:
+                sizes[key] = options[key]
+        seed_catalog(**sizes, batch_size=options['batch_size'], seed=options['seed'], progress=self.stdout.write)
+        self.stdout.write(self.style.SUCCESS(
+            f"Seeded {sizes['books']} books, {sizes['users']} users with {sizes['lists_per_user']} "
+            f"reading lists of {sizes['books_per_list']} books each."
+        ))
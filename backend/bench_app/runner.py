@@ -0,0 +1,171 @@
+import http.client
+import json
+import platform
+import re
+import subprocess
+import threading
+import time
+from datetime import datetime, timezone
+from http.cookies import SimpleCookie
+from urllib.parse import urlsplit
+import django
+from django.db import connection, connections
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from book_app.models import Book
+from .stats import summarize
+
+SERVER_TIMING_QUERIES = re.compile(r'db;[^,]*desc="(\d+) queries"')
+
+
+class ClientDriver:
+    """
+    Sends requests through Django's test client, in process. Query counts
+    come from capturing the queries on the default connection.
+    """
+    def __init__(self, context):
+        self.context = context
+        # 'testserver' is only an allowed host under the test runner
+        self.client = Client(HTTP_HOST='localhost')
+
+    def login(self):
+        self.client.post(reverse('login'), {'email': self.context.email, 'password': self.context.password},
+                         content_type='application/json')
+
+    def request(self, method, path, body, content_type, headers):
+        extra = {f"HTTP_{name.upper().replace('-', '_')}": value for name, value in headers.items()}
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.generic(method, path, body, content_type or 'application/octet-stream', **extra)
+            if response.streaming:
+                b''.join(response.streaming_content)
+        return response.status_code, len(queries.captured_queries)
+
+    def close(self):
+        pass
+
+
+class HTTPDriver:
+    """
+    Sends requests over a keep-alive HTTP connection to a running server,
+    keeping its own JWT cookies. Query counts are read from the
+    Server-Timing header that PerformanceMiddleware adds.
+    """
+    def __init__(self, context, base_url):
+        self.context = context
+        parts = urlsplit(base_url)
+        connection_class = http.client.HTTPSConnection if parts.scheme == 'https' else http.client.HTTPConnection
+        self.connection = connection_class(parts.netloc, timeout=60)
+        self.prefix = parts.path.rstrip('/')
+        self.cookies = {}
+
+    def login(self):
+        body = json.dumps({'email': self.context.email, 'password': self.context.password}).encode()
+        self.request('POST', reverse('login'), body, 'application/json', {})
+
+    def request(self, method, path, body, content_type, headers):
+        headers = dict(headers)
+        if content_type:
+            headers['Content-Type'] = content_type
+        if self.cookies:
+            headers['Cookie'] = '; '.join(f'{name}={value}' for name, value in self.cookies.items())
+        try:
+            self.connection.request(method, self.prefix + path, body=body or None, headers=headers)
+            response = self.connection.getresponse()
+            response.read()
+        except (http.client.HTTPException, OSError):
+            # Dropped keep-alive connection; reconnect on the next request
+            self.connection.close()
+            raise
+        for header in response.headers.get_all('Set-Cookie') or []:
+            for name, morsel in SimpleCookie(header).items():
+                if morsel.value:
+                    self.cookies[name] = morsel.value
+                else:
+                    self.cookies.pop(name, None)
+        match = SERVER_TIMING_QUERIES.search(response.headers.get('Server-Timing', ''))
+        return response.status, int(match.group(1)) if match else None
+
+    def close(self):
+        self.connection.close()
+
+
+def run_worker(make_driver, scenario, context, iterations, results):
+    driver = make_driver(context)
+    latencies, queries, errors = [], [], 0
+    try:
+        driver.login()
+        for _ in range(iterations):
+            if scenario.relogin:
+                driver.login()
+            method, path, body, content_type, headers = scenario.build(context)
+            start = time.perf_counter()
+            try:
+                status, query_count = driver.request(method, path, body, content_type, headers)
+            except Exception:
+                errors += 1
+                continue
+            latencies.append(time.perf_counter() - start)
+            if status not in scenario.expect:
+                errors += 1
+            if query_count is not None:
+                queries.append(query_count)
+    finally:
+        driver.close()
+        # Worker threads have their own database connections
+        if threading.current_thread() is not threading.main_thread():
+            connections.close_all()
+    results.append((latencies, queries, errors))
+
+
+def run_scenario(make_driver, scenario, contexts, iterations, warmup=0):
+    """
+    Runs `iterations` timed requests split over one thread per context
+    (each context is a different benchmark user, so stateful scenarios do
+    not race), after `warmup` untimed ones, and returns the summary.
+    """
+    if warmup:
+        run_worker(make_driver, scenario, contexts[0], warmup, [])
+    results = []
+    concurrency = len(contexts)
+    shares = [iterations // concurrency + (1 if index < iterations % concurrency else 0) for index in range(concurrency)]
+    start = time.perf_counter()
+    if concurrency == 1:
+        run_worker(make_driver, scenario, contexts[0], iterations, results)
+    else:
+        threads = [
+            threading.Thread(target=run_worker, args=(make_driver, scenario, context, share, results))
+            for context, share in zip(contexts, shares) if share
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    elapsed = time.perf_counter() - start
+    latencies = [value for result in results for value in result[0]]
+    queries = [value for result in results for value in result[1]]
+    errors = sum(result[2] for result in results)
+    return summarize(latencies, elapsed, errors, queries)
+
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_metadata(mode, iterations, concurrency, base_url=None):
+    return {
+        'started_at': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'mode': mode,
+        'base_url': base_url,
+        'iterations': iterations,
+        'concurrency': concurrency,
+        'git_commit': git_commit(),
+        'database': connection.vendor,
+        'books': Book.objects.count(),
+        'python': platform.python_version(),
+        'django': django.get_version(),
+    }
@@ -0,0 +1,257 @@
+import hashlib
+import io
+import json
+import uuid
+import zipfile
+from django.core.files.base import ContentFile
+from django.test.client import BOUNDARY, MULTIPART_CONTENT, encode_multipart
+from django.urls import reverse
+from book_app.benchmarks import bench_book
+from book_app.models import Book, BookUpload, ReadingList, ReadingListBook
+from book_app.ordering import next_order
+from book_app.progress import change_progress
+from book_app.uploads import create_part_file, write_chunk
+from .seed import BENCH_PASSWORD
+
+PDF_BYTES = b'%PDF-1.4\n' + b'0' * 4096 + b'\n%%EOF\n'
+CHUNK_SIZE = 64 * 1024
+
+
+def named_file(content, name):
+    file = io.BytesIO(content)
+    file.name = name
+    return file
+
+
+def encode(format, data):
+    """
+    (body, content type) for a scenario payload.
+    """
+    if data is None:
+        return b'', None
+    if format == 'multipart':
+        return encode_multipart(BOUNDARY, data), MULTIPART_CONTENT
+    if format == 'raw':
+        return data, 'application/octet-stream'
+    return json.dumps(data).encode(), 'application/json'
+
+
+class BenchContext:
+    """
+    Fixtures one benchmark user needs: a catalog book, one of their own
+    books with a real PDF, a reading list with a spare book to add and
+    remove, and an open chunked upload.
+    """
+    def __init__(self, user):
+        self.user = user
+        self.email = user.email
+        self.password = BENCH_PASSWORD
+        self.book_id = Book.objects.exclude(created_by=user).values_list('id', flat=True).first()
+        my_book = Book.objects.filter(created_by=user).order_by('id').first()
+        if my_book is None:
+            my_book = Book.objects.create(**bench_fields(user))
+        my_book.pdf_file.save('bench.pdf', ContentFile(PDF_BYTES))
+        self.my_book_id = my_book.pk
+
+        self.reading_list = ReadingList.objects.filter(user=user).order_by('id').first()
+        if self.reading_list is None:
+            self.reading_list = ReadingList.objects.create(name='Bench list', user=user)
+        listed = set(self.reading_list.reading_list_books.values_list('book_id', flat=True))
+        spare = Book.objects.exclude(pk__in=listed).order_by('id')[:2]
+        self.spare_book_id, self.completed_book_id = [book.pk for book in spare]
+        _, created = ReadingListBook.objects.get_or_create(
+            reading_list=self.reading_list, book_id=self.completed_book_id,
+            defaults={'order': next_order(self.reading_list)},
+        )
+        if created:
+            change_progress(self.reading_list.pk, total=1)
+        self.upload = self.new_upload()
+
+    def new_upload(self, chunks=False):
+        upload = BookUpload.objects.create(
+            user=self.user, filename='bench.pdf', total_size=len(PDF_BYTES), chunk_size=CHUNK_SIZE
+        )
+        create_part_file(upload)
+        if chunks:
+            write_chunk(upload, 0, io.BytesIO(PDF_BYTES), hashlib.sha256(PDF_BYTES).hexdigest())
+        return upload
+
+
+def bench_fields(user):
+    book = bench_book(0, user)
+    return {field: getattr(book, field) for field in (
+        'title', 'authors', 'genre', 'publication_date', 'description', 'created_by',
+    )}
+
+
+class Scenario:
+    """
+    One request shape against one URL name. `path` and `data` are callables
+    taking (context, prepared) where `prepared` is what `prepare` returned;
+    `prepare` runs before every request and is not timed. With `relogin`
+    the driver logs in again (untimed) before each request.
+    """
+    def __init__(self, name, url_name, method, path, data=None, format='json', prepare=None,
+                 expect=(200, 201, 204), headers=None, relogin=False):
+        self.name = name
+        self.url_name = url_name
+        self.method = method
+        self.path = path
+        self.data = data
+        self.format = format
+        self.prepare = prepare
+        self.expect = expect
+        self.headers = headers
+        self.relogin = relogin
+
+    def build(self, context):
+        prepared = self.prepare(context) if self.prepare else None
+        data = self.data(context, prepared) if self.data else None
+        body, content_type = encode(self.format, data)
+        headers = self.headers(context, prepared) if self.headers else {}
+        return self.method, self.path(context, prepared), body, content_type, headers
+
+
+def url(name, *args):
+    return lambda context, prepared: reverse(name, args=[arg(context, prepared) for arg in args])
+
+
+def attr(name):
+    return lambda context, prepared: getattr(context, name)
+
+
+def prepared_value(context, prepared):
+    return prepared
+
+
+def create_book(context):
+    return Book.objects.create(**bench_fields(context.user)).pk
+
+
+def create_reading_list(context):
+    return ReadingList.objects.create(name='Bench scratch list', user=context.user).pk
+
+
+# The fixtures below keep the reading list's progress counters in step,
+# as the views do.
+
+def remove_spare_book(context):
+    deleted, _ = ReadingListBook.objects.filter(
+        reading_list=context.reading_list, book_id=context.spare_book_id
+    ).delete()
+    if deleted:
+        change_progress(context.reading_list.pk, total=-1)
+
+
+def add_spare_book(context):
+    _, created = ReadingListBook.objects.get_or_create(
+        reading_list=context.reading_list, book_id=context.spare_book_id,
+        defaults={'order': next_order(context.reading_list)},
+    )
+    if created:
+        change_progress(context.reading_list.pk, total=1)
+
+
+def reset_completed(context):
+    if ReadingListBook.objects.filter(
+        reading_list=context.reading_list, book_id=context.completed_book_id, is_completed=True
+    ).update(is_completed=False, completed_at=None):
+        change_progress(context.reading_list.pk, completed=-1)
+
+
+def book_form(context, prepared):
+    return {
+        'title': 'Bench Created Book', 'authors': 'Bench Author', 'genre': 'Fiction',
+        'publication_date': '2020-01-01', 'pdf_file': named_file(PDF_BYTES, 'bench.pdf'),
+    }
+
+
+def import_form(context, prepared):
+    rows = ''.join(f'Bench Import {index},Bench Author,Fiction,2020-01-01,,bench.pdf\n' for index in range(10))
+    archive = io.BytesIO()
+    with zipfile.ZipFile(archive, 'w') as zip_file:
+        zip_file.writestr('bench.pdf', PDF_BYTES)
+    return {
+        'file': named_file(('title,authors,genre,publication_date,description,pdf_file\n' + rows).encode(), 'books.csv'),
+        'archive': named_file(archive.getvalue(), 'books.zip'),
+    }
+
+
+def unique_email(context, prepared):
+    return f'new-{uuid.uuid4().hex[:12]}@bench.local'
+
+
+SCENARIOS = [
+    # book_app
+    Scenario('book_list', 'book_list', 'GET', url('book_list')),
+    Scenario('book_list_search', 'book_list', 'GET',
+             lambda context, prepared: reverse('book_list') + '?search=benchmark'),
+    Scenario('book_create', 'book_list', 'POST', url('book_list'), data=book_form, format='multipart'),
+    Scenario('my_books', 'my_books', 'GET', url('my_books')),
+    Scenario('book_detail', 'book_detail', 'GET', url('book_detail', attr('book_id'))),
+    Scenario('book_update', 'book_detail', 'PUT', url('book_detail', attr('my_book_id')),
+             data=lambda context, prepared: {'description': 'Updated by the benchmark'}),
+    Scenario('book_delete', 'book_detail', 'DELETE', url('book_detail', prepared_value), prepare=create_book),
+    Scenario('book_pdf', 'book_pdf', 'GET', url('book_pdf', attr('my_book_id'))),
+    Scenario('book_import', 'book_import', 'POST', url('book_import'), data=import_form, format='multipart'),
+    Scenario('book_export', 'book_export', 'GET', lambda context, prepared: reverse('book_export') + '?mine=true'),
+    Scenario('book_upload', 'book_upload', 'POST', url('book_upload'),
+             data=lambda context, prepared: {'filename': 'bench.pdf', 'total_size': len(PDF_BYTES),
+                                             'chunk_size': CHUNK_SIZE}),
+    Scenario('book_upload_detail', 'book_upload_detail', 'GET',
+             url('book_upload_detail', lambda context, prepared: context.upload.pk)),
+    Scenario('book_upload_chunk', 'book_upload_chunk', 'PUT',
+             url('book_upload_chunk', lambda context, prepared: context.upload.pk, lambda context, prepared: 0),
+             data=lambda context, prepared: PDF_BYTES, format='raw',
+             headers=lambda context, prepared: {'X-Chunk-SHA256': hashlib.sha256(PDF_BYTES).hexdigest()}),
+    Scenario('book_upload_complete', 'book_upload_complete', 'POST',
+             url('book_upload_complete', lambda context, prepared: prepared.pk),
+             prepare=lambda context: context.new_upload(chunks=True),
+             data=lambda context, prepared: {'title': 'Bench Upload', 'authors': 'Bench Author', 'genre': 'Fiction',
+                                             'publication_date': '2020-01-01'}),
+    Scenario('reading_list', 'reading_list', 'GET', url('reading_list')),
+    Scenario('reading_list_summary', 'reading_list_summary', 'GET', url('reading_list_summary')),
+    Scenario('reading_list_create', 'reading_list', 'POST', url('reading_list'),
+             data=lambda context, prepared: {'name': 'Bench created list'}),
+    Scenario('reading_list_update', 'reading_list_detail', 'PUT',
+             url('reading_list_detail', lambda context, prepared: context.reading_list.pk),
+             data=lambda context, prepared: {'name': 'Bench renamed list'}),
+    Scenario('reading_list_delete', 'reading_list_detail', 'DELETE',
+             url('reading_list_detail', prepared_value), prepare=create_reading_list),
+    Scenario('reading_list_add_book', 'reading_list_add_book', 'POST',
+             url('reading_list_add_book', lambda context, prepared: context.reading_list.pk),
+             prepare=remove_spare_book, data=lambda context, prepared: {'book_id': context.spare_book_id}),
+    Scenario('reading_list_remove_book', 'reading_list_remove_book', 'DELETE',
+             url('reading_list_remove_book', lambda context, prepared: context.reading_list.pk, attr('spare_book_id')),
+             prepare=add_spare_book),
+    Scenario('reading_list_reorder_books', 'reading_list_reorder_books', 'POST',
+             url('reading_list_reorder_books', lambda context, prepared: context.reading_list.pk),
+             data=lambda context, prepared: {'book_id': context.completed_book_id, 'after_book_id': None},
+             prepare=reset_completed),
+    Scenario('reading_list_mark_completed', 'reading_list_mark_completed', 'POST',
+             url('reading_list_mark_completed', lambda context, prepared: context.reading_list.pk,
+                 attr('completed_book_id')),
+             prepare=reset_completed),
+    # auth_app
+    Scenario('login', 'login', 'POST', url('login'),
+             data=lambda context, prepared: {'email': context.email, 'password': context.password}),
+    Scenario('profile', 'profile', 'GET', url('profile')),
+    Scenario('profile_update', 'profile', 'PUT', url('profile'),
+             data=lambda context, prepared: {'username': context.user.username}),
+    Scenario('token_refresh', 'token_refresh', 'POST', url('token_refresh')),
+    Scenario('register', 'register', 'POST', url('register'),
+             data=lambda context, prepared: {'email': unique_email(context, prepared), 'username': uuid.uuid4().hex[:12]}),
+    Scenario('otp_request', 'otp_request', 'POST', url('otp_request'),
+             data=lambda context, prepared: {'email': context.email, 'context': 'register'}, expect=(200, 400)),
+    # Wrong codes on purpose: measures the verification path without real OTPs
+    Scenario('otp_verify', 'otp_verify', 'POST', url('otp_verify'),
+             data=lambda context, prepared: {'email': context.email, 'code': '000000', 'password': context.password},
+             expect=(400,)),
+    Scenario('forgot_password', 'forgot_password', 'POST', url('forgot_password'),
+             data=lambda context, prepared: {'email': context.email}),
+    Scenario('forgot_password_reset', 'forgot_password_reset', 'POST', url('forgot_password_reset'),
+             data=lambda context, prepared: {'email': context.email, 'code': '000000', 'password': context.password},
+             expect=(400,)),
+    # Logging out blacklists the refresh token, so every request needs a fresh login
+    Scenario('logout', 'logout', 'POST', url('logout'), relogin=True),
+]
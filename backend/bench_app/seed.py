@@ -0,0 +1,80 @@
+import random
+from django.contrib.auth.hashers import make_password
+from auth_app.models import CustomUser
+from book_app.benchmarks import bench_book
+from book_app.cache import bump_catalog_version
+from book_app.models import Book, ReadingList, ReadingListBook
+from book_app.ordering import ORDER_GAP
+from book_app.progress import repair_progress
+
+BENCH_DOMAIN = 'bench.local'
+BENCH_PASSWORD = 'Bench-pass1'
+
+PRESETS = {
+    'small': {'books': 1000, 'users': 10, 'lists_per_user': 5, 'books_per_list': 20},
+    'medium': {'books': 100000, 'users': 100, 'lists_per_user': 10, 'books_per_list': 50},
+    'large': {'books': 1000000, 'users': 1000, 'lists_per_user': 20, 'books_per_list': 100},
+}
+
+
+def bench_users():
+    return CustomUser.objects.filter(email__endswith=f'@{BENCH_DOMAIN}')
+
+
+def bench_email(index):
+    return f'user{index}@{BENCH_DOMAIN}'
+
+
+def reset_catalog():
+    """
+    Deletes every benchmark user; their books and reading lists cascade.
+    """
+    deleted, _ = bench_users().delete()
+    bump_catalog_version()
+    return deleted
+
+
+def seed_catalog(books, users, lists_per_user, books_per_list, batch_size=5000, seed=42, progress=None):
+    """
+    Creates verified users (all with BENCH_PASSWORD), `books` books spread
+    over them and `lists_per_user` reading lists each, using bulk_create
+    throughout. The same arguments and seed give the same catalog.
+    """
+    report = progress or (lambda message: None)
+    rng = random.Random(seed)
+    password = make_password(BENCH_PASSWORD)
+    CustomUser.objects.bulk_create([
+        CustomUser(email=bench_email(index), username=f'bench{index}', password=password, is_verified=True)
+        for index in range(users)
+    ], batch_size=batch_size)
+    user_list = list(bench_users().order_by('id'))
+    report(f'Created {len(user_list)} users')
+
+    for start in range(0, books, batch_size):
+        Book.objects.bulk_create([
+            bench_book(index, user_list[index % len(user_list)])
+            for index in range(start, min(start + batch_size, books))
+        ], batch_size=batch_size)
+        report(f'Created {min(start + batch_size, books)}/{books} books')
+
+    book_ids = list(Book.objects.filter(created_by__in=user_list).values_list('id', flat=True))
+    ReadingList.objects.bulk_create([
+        ReadingList(name=f'Bench list {index}', user=user)
+        for user in user_list for index in range(lists_per_user)
+    ], batch_size=batch_size)
+    entries = []
+    for reading_list in ReadingList.objects.filter(user__in=user_list).iterator():
+        chosen = rng.sample(book_ids, min(books_per_list, len(book_ids)))
+        entries.extend(
+            ReadingListBook(reading_list=reading_list, book_id=book_id, order=(position + 1) * ORDER_GAP)
+            for position, book_id in enumerate(chosen)
+        )
+        if len(entries) >= batch_size:
+            ReadingListBook.objects.bulk_create(entries, batch_size=batch_size)
+            entries = []
+    ReadingListBook.objects.bulk_create(entries, batch_size=batch_size)
+    # bulk_create bypasses the views that maintain the progress counters
+    repair_progress(ReadingList.objects.filter(user__in=user_list), batch_size=batch_size)
+    report(f'Created {len(user_list) * lists_per_user} reading lists')
+
+    bump_catalog_version()
@@ -0,0 +1,70 @@
+import math
+import resource
+import sys
+
+
+def percentile(sorted_values, fraction):
+    """
+    Nearest-rank percentile of an already sorted list.
+    """
+    if not sorted_values:
+        return None
+    rank = max(1, math.ceil(fraction * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+
+def peak_rss_kb():
+    usage = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return usage // 1024 if sys.platform == 'darwin' else usage
+
+
+def summarize(latencies, elapsed, errors, queries=None):
+    """
+    Latencies are seconds per request; `elapsed` is the wall time of the
+    whole run, so throughput reflects any concurrency.
+    """
+    values = sorted(latencies)
+    count = len(values)
+
+    def ms(value):
+        return round(value * 1000, 3) if value is not None else None
+
+    return {
+        'requests': count,
+        'errors': errors,
+        'p50_ms': ms(percentile(values, 0.50)),
+        'p95_ms': ms(percentile(values, 0.95)),
+        'p99_ms': ms(percentile(values, 0.99)),
+        'mean_ms': ms(sum(values) / count) if count else None,
+        'throughput_rps': round(count / elapsed, 2) if elapsed > 0 else None,
+        'queries_per_request': round(sum(queries) / len(queries), 2) if queries else None,
+        'peak_rss_kb': peak_rss_kb(),
+    }
+
+
+def compare(baseline, current, threshold=0.10):
+    """
+    Returns (scenario, metric, baseline value, current value) for every
+    scenario that got worse by more than `threshold`: higher p95/p99
+    latency, lower throughput or more queries per request.
+    """
+    regressions = []
+    for name, result in current['scenarios'].items():
+        before = baseline.get('scenarios', {}).get(name)
+        if not before:
+            continue
+        for metric, higher_is_worse in (('p95_ms', True), ('p99_ms', True), ('throughput_rps', False),
+                                        ('queries_per_request', True)):
+            old, new = before.get(metric), result.get(metric)
+            if old is None or new is None:
+                continue
+            if metric == 'queries_per_request':
+                worse = new > old
+            elif higher_is_worse:
+                worse = new > old * (1 + threshold)
+            else:
+                worse = new < old * (1 - threshold)
+            if worse:
+                regressions.append((name, metric, old, new))
+    return regressions
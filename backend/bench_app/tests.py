@@ -0,0 +1,60 @@
+import shutil
+import tempfile
+from unittest import skipUnless
+from django.db import connection
+from django.test import TestCase, override_settings
+from .connections import run_mode
+from .runner import ClientDriver, run_scenario
+from .scenarios import SCENARIOS, BenchContext
+from .seed import bench_users, seed_catalog
+from .stats import compare, percentile
+
+
+class StatsTests(TestCase):
+    def test_nearest_rank_percentiles(self):
+        values = list(range(1, 101))
+        self.assertEqual(percentile(values, 0.50), 50)
+        self.assertEqual(percentile(values, 0.99), 99)
+        self.assertIsNone(percentile([], 0.5))
+
+    def test_regressions_are_flagged_beyond_the_threshold(self):
+        baseline = {'scenarios': {'book_list': {'p95_ms': 10.0, 'throughput_rps': 100.0, 'queries_per_request': 2}}}
+        current = {'scenarios': {'book_list': {'p95_ms': 10.5, 'throughput_rps': 80.0, 'queries_per_request': 3}}}
+        self.assertEqual(compare(baseline, current, threshold=0.10), [
+            ('book_list', 'throughput_rps', 100.0, 80.0),
+            ('book_list', 'queries_per_request', 2, 3),
+        ])
+
+
+class ScenarioSmokeTests(TestCase):
+    def test_every_scenario_runs_against_a_seeded_catalog(self):
+        # Upload part files follow MEDIA_ROOT when CHUNKED_UPLOAD_DIR is empty
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root, ignore_errors=True)
+        override = override_settings(MEDIA_ROOT=media_root, CHUNKED_UPLOAD_DIR='')
+        override.enable()
+        self.addCleanup(override.disable)
+        seed_catalog(books=40, users=2, lists_per_user=2, books_per_list=5)
+        context = BenchContext(bench_users().order_by('id').first())
+        for scenario in SCENARIOS:
+            with self.subTest(scenario=scenario.name):
+                summary = run_scenario(ClientDriver, scenario, [context], iterations=2)
+                self.assertEqual(summary['requests'], 2)
+                self.assertEqual(summary['errors'], 0)
+
+
+class ConnectionBenchmarkTests(TestCase):
+    def test_every_mode_runs_all_requests(self):
+        for mode in ('new', 'persistent'):
+            with self.subTest(mode=mode):
+                result = run_mode('default', mode, requests=6, threads=2)
+                self.assertEqual((result['requests'], result['errors']), (6, 0))
+
+    # Django never closes in-memory SQLite connections, so only PostgreSQL
+    # shows the difference between the modes
+    @skipUnless(connection.vendor == 'postgresql', 'connection counts need PostgreSQL')
+    def test_persistent_connections_are_opened_once_per_thread(self):
+        new = run_mode('default', 'new', requests=6, threads=2)
+        persistent = run_mode('default', 'persistent', requests=6, threads=2)
+        self.assertEqual((new['requests'], new['errors'], new['connections_opened']), (6, 0, 6))
+        self.assertEqual((persistent['requests'], persistent['errors'], persistent['connections_opened']), (6, 0, 2))
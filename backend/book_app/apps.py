@@ -4,3 +4,18 @@ from django.apps import AppConfig
 class BookAppConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'book_app'
+
+    def ready(self):
+        from django.db.models.signals import post_delete, post_save, pre_delete, pre_save
+        from .blobs import release_blob_references, remember_blob_names, update_blob_references
+        from .images import delete_book_renditions
+        from .models import Book
+        from .pdf_processing import delete_book_preview
+        from .progress import release_book_entries
+
+        pre_save.connect(remember_blob_names, sender=Book, dispatch_uid='book_blob_pre_save')
+        post_save.connect(update_blob_references, sender=Book, dispatch_uid='book_blob_post_save')
+        post_delete.connect(release_blob_references, sender=Book, dispatch_uid='book_blob_post_delete')
+        post_delete.connect(delete_book_renditions, sender=Book, dispatch_uid='book_renditions_post_delete')
+        post_delete.connect(delete_book_preview, sender=Book, dispatch_uid='book_preview_post_delete')
+        pre_delete.connect(release_book_entries, sender=Book, dispatch_uid='book_reading_list_pre_delete')
@@ -0,0 +1,128 @@
+import logging
+import os
+from asgiref.sync import sync_to_async
+from rest_framework import status
+from auth_app.authentication import JWTCookieStatelessAuthentication
+from backend.async_api import AsyncAPIView
+from backend.metrics import timed
+from .cache import acached_data, aget_catalog_version
+from .conditional import aconditional_response, areading_list_validators, make_etag
+from .fast_serializers import BOOK_FIELDS, FastBookSerializer, in_id_order, requested_fields, requested_ids
+from .models import Book, ReadingList
+from .pagination import KeysetPagination
+from .search import get_search_engine
+from .serializers import BookSerializer, ReadingListSerializer
+from .streaming import serve_file
+from .views import BookDetailView, BookListView, BookPDFView, ReadingListView
+
+logger = logging.getLogger(__name__)
+
+# Used instead of the sync views for these URLs when ASYNC_VIEWS is set.
+# They return the same JSON as the sync views and share their cache entries.
+
+
+class AsyncBookListView(AsyncAPIView):
+    authentication_class = None
+    require_authentication = False
+    sync_view_class = BookListView
+
+    async def get(self, request):
+        etag = make_etag(request, await aget_catalog_version())
+        return await aconditional_response(request, lambda: self.cached_books(request), etag)
+
+    async def cached_books(self, request):
+        return self.render(await acached_data(request, lambda: self.list_books(request)))
+
+    async def list_books(self, request):
+        fields = requested_fields(request)
+        ids = requested_ids(request)
+        if ids is not None:
+            books = FastBookSerializer.values(Book.objects.filter(pk__in=ids), fields=fields)
+            rows = in_id_order([row async for row in books], ids)
+            return {'next': None, 'results': FastBookSerializer(fields=fields).serialize(rows)}
+
+        search_query = request.query_params.get('search', '')
+        books = Book.objects.all()
+        paginator = KeysetPagination()
+
+        if search_query:
+            books = get_search_engine().search(books, search_query)
+            paginator = KeysetPagination(ordering=('-rank', '-created_at', '-id'))
+
+        rows = FastBookSerializer.values(books, *paginator.ordering_fields(), fields=fields)
+        page = await paginator.apaginate_queryset(rows, request)
+        return paginator.get_paginated_data(FastBookSerializer(fields=fields).serialize(page))
+
+
+class AsyncBookDetailView(AsyncAPIView):
+    sync_view_class = BookDetailView
+
+    async def get(self, request, pk):
+        etag = make_etag(request, await aget_catalog_version())
+        return await aconditional_response(request, lambda: self.retrieve_book(request, pk), etag)
+
+    async def retrieve_book(self, request, pk):
+        data = await acached_data(request, lambda: self.book_data(request, pk))
+        if data is None:
+            logger.error("Book not found: ID %s", pk)
+            return self.render({'detail': 'Book not found'}, status=status.HTTP_404_NOT_FOUND)
+        return self.render(data)
+
+    async def book_data(self, request, pk):
+        fields = requested_fields(request)
+        try:
+            book = await Book.objects.only(*(fields or BOOK_FIELDS)).aget(pk=pk)
+        except Book.DoesNotExist:
+            return None
+        return BookSerializer(book, fields=fields).data
+
+
+class AsyncBookPDFView(AsyncAPIView):
+    """
+    Streams the PDF from an async iterator, so a slow download holds no
+    worker thread.
+    """
+    authentication_class = JWTCookieStatelessAuthentication
+    sync_view_class = BookPDFView
+
+    async def get(self, request, pk):
+        logger.info("User %s requesting PDF for book ID %s", request.user, pk)
+        try:
+            book = await Book.objects.only('title', 'pdf_file').aget(pk=pk)
+        except Book.DoesNotExist:
+            logger.error("Book not found for PDF request: ID %s", pk)
+            return self.render({'detail': 'Book not found'}, status=status.HTTP_404_NOT_FOUND)
+
+        if not book.pdf_file:
+            logger.warning("No PDF file available for book ID %s", pk)
+            return self.render({'detail': 'PDF file not available'}, status=status.HTTP_404_NOT_FOUND)
+        try:
+            stat = await sync_to_async(os.stat, thread_sensitive=False)(book.pdf_file.path)
+        except FileNotFoundError:
+            logger.error("PDF file not found on server for book ID %s", pk)
+            return self.render({'detail': 'PDF file not found'}, status=status.HTTP_404_NOT_FOUND)
+
+        try:
+            return serve_file(
+                request, book.pdf_file, 'application/pdf', f'{book.title}.pdf', asynchronous=True, stat=stat
+            )
+        except Exception as e:
+            logger.error("Error serving PDF for book ID %s: %s", pk, e)
+            return self.render({'detail': 'Error serving PDF file'}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+class AsyncReadingListView(AsyncAPIView):
+    sync_view_class = ReadingListView
+
+    async def get(self, request):
+        validators, updated = await areading_list_validators(request.user)
+        etag = make_etag(request, request.user.pk, validators)
+        return await aconditional_response(request, lambda: self.list_reading_lists(request), etag, updated)
+
+    async def list_reading_lists(self, request):
+        reading_lists = ReadingList.objects.filter(user=request.user).with_books()
+        paginator = KeysetPagination()
+        page = await paginator.apaginate_queryset(reading_lists, request)
+        with timed('serialize'):
+            data = ReadingListSerializer(page, many=True).data
+        return self.render(paginator.get_paginated_data(data))
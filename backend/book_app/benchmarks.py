@@ -0,0 +1,68 @@
+import time
+from datetime import date
+from django.db import transaction
+from auth_app.models import CustomUser
+from .models import Book
+
+
+class Rollback(Exception):
+    pass
+
+
+def rolled_back(run):
+    """
+    Runs `run()` in a transaction that is always rolled back, so benchmarks
+    can seed data without leaving anything behind. Returns its result.
+    """
+    result = None
+    try:
+        with transaction.atomic():
+            result = run()
+            raise Rollback
+    except Rollback:
+        pass
+    return result
+
+
+def bench_book(index, user):
+    """
+    An unsaved book that looks like a real catalog entry (files, renditions,
+    description). The file names are placeholders; nothing is on disk.
+    """
+    return Book(
+        title=f'Benchmark Book {index}', authors='Bench Author', genre='Fiction',
+        publication_date=date(2000 + index % 25, 1, 1),
+        description=f'Book {index} of a generated catalog, used to benchmark list responses. ' * 3,
+        cover_image=f'book_covers/cover_{index}.jpg', pdf_file=f'book_pdfs/book_{index}.pdf',
+        cover_renditions={
+            rendition: {
+                extension: f'book_covers/cover_{index}_{rendition}.{extension}' for extension in ('webp', 'jpeg')
+            }
+            for rendition in ('thumbnail', 'card', 'full')
+        },
+        pdf_status=Book.PDF_READY, pdf_page_count=100 + index % 400, pdf_file_size=1000000 + index,
+        created_by=user,
+    )
+
+
+def seed_books(rows, email='bench@example.com'):
+    """
+    Creates a user with `rows` catalog-like books and returns the user's
+    books, newest first.
+    """
+    user = CustomUser.objects.create_user(email=email, username=email.split('@')[0], password='Bench-pass1')
+    Book.objects.bulk_create([bench_book(index, user) for index in range(rows)], batch_size=1000)
+    return Book.objects.filter(created_by=user).order_by('-created_at', '-id')
+
+
+def best_of(repeat, run):
+    """
+    Returns (best wall time in seconds, output of the last run).
+    """
+    timings = []
+    output = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        output = run()
+        timings.append(time.perf_counter() - start)
+    return min(timings), output
@@ -0,0 +1,154 @@
+import os
+import time
+from collections import Counter
+from django.db.models import F
+from django.utils import timezone
+from .models import Book, StoredBlob
+from .storage import TMP_DIR, get_book_file_storage, is_blob_name
+
+BLOB_FIELDS = ('pdf_file', 'cover_image')
+
+
+def blob_names(values):
+    return [name for name in values if is_blob_name(name)]
+
+
+def book_blob_names(book):
+    return blob_names(getattr(book, field).name for field in BLOB_FIELDS)
+
+
+def change_references(added=(), removed=()):
+    """
+    Applies reference count deltas for blob names. Both arguments may repeat
+    names. Bulk writes that bypass the Book signals (bulk_create,
+    queryset.update) must call this themselves.
+    """
+    deltas = Counter(blob_names(added))
+    deltas.subtract(blob_names(removed))
+    now = timezone.now()
+    missing = set(deltas) - set(StoredBlob.objects.filter(name__in=deltas).values_list('name', flat=True))
+    StoredBlob.objects.bulk_create([StoredBlob(name=name) for name in missing], ignore_conflicts=True)
+    for name, delta in deltas.items():
+        if delta:
+            StoredBlob.objects.filter(name=name).update(ref_count=F('ref_count') + delta, updated_at=now)
+
+
+def track_unreferenced(names):
+    """
+    Records stored blobs that no book ended up referencing, e.g. files saved
+    for an insert that failed, so gc_blobs removes them after the grace
+    period. Counts of blobs that are already tracked are left alone.
+    """
+    StoredBlob.objects.bulk_create(
+        [StoredBlob(name=name) for name in set(blob_names(names))], ignore_conflicts=True
+    )
+
+
+def recount_references():
+    """
+    Rebuilds every reference count from the books table. Returns the number
+    of blobs whose count changed.
+    """
+    counts = Counter()
+    for row in Book.objects.values_list(*BLOB_FIELDS).iterator():
+        counts.update(blob_names(row))
+    StoredBlob.objects.bulk_create([StoredBlob(name=name) for name in counts], ignore_conflicts=True)
+    changed = []
+    now = timezone.now()
+    for blob in StoredBlob.objects.all().iterator():
+        if blob.ref_count != counts.get(blob.name, 0):
+            blob.ref_count = counts.get(blob.name, 0)
+            blob.updated_at = now
+            changed.append(blob)
+    StoredBlob.objects.bulk_update(changed, ['ref_count', 'updated_at'], batch_size=500)
+    return len(changed)
+
+
+def remember_blob_names(sender, instance, update_fields=None, **kwargs):
+    if instance.pk is None or (update_fields is not None and not set(update_fields) & set(BLOB_FIELDS)):
+        instance._stored_blob_names = None
+        return
+    row = Book.objects.filter(pk=instance.pk).values_list(*BLOB_FIELDS).first()
+    instance._stored_blob_names = blob_names(row or ())
+
+
+def update_blob_references(sender, instance, created, update_fields=None, **kwargs):
+    old_names = getattr(instance, '_stored_blob_names', None)
+    if old_names is None and not created:
+        return
+    change_references(added=book_blob_names(instance), removed=old_names or ())
+    instance._stored_blob_names = None
+
+
+def release_blob_references(sender, instance, **kwargs):
+    change_references(removed=book_blob_names(instance))
+
+
+def file_age(storage, name):
+    return timezone.now() - storage.get_modified_time(name)
+
+
+def unreferenced_files(storage, directory):
+    """
+    Yields blob names under `directory` (e.g. 'book_pdfs') that have no
+    StoredBlob row at all, typically files saved for a book whose
+    transaction rolled back.
+    """
+    def unknown(names):
+        known = set(StoredBlob.objects.filter(name__in=names).values_list('name', flat=True))
+        return [name for name in names if name not in known]
+
+    batch = []
+    for root, _, files in os.walk(storage.path(directory)):
+        for filename in files:
+            name = os.path.relpath(os.path.join(root, filename), storage.location).replace(os.sep, '/')
+            if is_blob_name(name):
+                batch.append(name)
+            if len(batch) >= 500:
+                yield from unknown(batch)
+                batch = []
+    if batch:
+        yield from unknown(batch)
+
+
+def collect_garbage(grace, dry_run=False):
+    """
+    Deletes blobs that have been unreferenced for longer than `grace`
+    (a timedelta). The grace period, checked against both the count's last
+    change and the file's mtime, covers uploads that are saved to storage
+    just before their book row is committed. Returns the deleted names.
+    """
+    storage = get_book_file_storage()
+    cutoff = timezone.now() - grace
+    deleted = []
+
+    orphans = StoredBlob.objects.filter(ref_count__lte=0, updated_at__lt=cutoff)
+    for blob in orphans.iterator():
+        if storage.exists(blob.name) and file_age(storage, blob.name) < grace:
+            continue
+        if dry_run:
+            deleted.append(blob.name)
+            continue
+        # Re-check the count in the DELETE itself in case it was just reused
+        if StoredBlob.objects.filter(pk=blob.pk, ref_count__lte=0).delete()[0]:
+            storage.purge(blob.name)
+            deleted.append(blob.name)
+
+    for field in BLOB_FIELDS:
+        directory = Book._meta.get_field(field).upload_to.strip('/')
+        if not storage.exists(directory):
+            continue
+        for name in list(unreferenced_files(storage, directory)):
+            if file_age(storage, name) >= grace:
+                if not dry_run:
+                    storage.purge(name)
+                deleted.append(name)
+
+    tmp_dir = storage.path(TMP_DIR)
+    if not dry_run and os.path.isdir(tmp_dir):
+        # Leftovers from interrupted uploads
+        for filename in os.listdir(tmp_dir):
+            path = os.path.join(tmp_dir, filename)
+            if time.time() - os.path.getmtime(path) >= grace.total_seconds():
+                os.remove(path)
+    return deleted
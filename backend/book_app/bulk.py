@@ -0,0 +1,209 @@
+import csv
+import io
+import itertools
+import json
+import os
+import zipfile
+from django.core.files import File
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from .blobs import change_references, track_unreferenced
+from .cache import bump_catalog_version
+from .models import Book
+from .serializers import BookSerializer
+
+FILE_FIELDS = ('pdf_file', 'cover_image')
+
+EXPORT_FIELDS = (
+    'id', 'title', 'authors', 'genre', 'publication_date', 'description', 'cover_image', 'pdf_file',
+    'pdf_status', 'pdf_page_count', 'pdf_file_size', 'created_by', 'created_at',
+)
+
+
+class BulkImportError(Exception):
+    pass
+
+
+class ZipSource:
+    """
+    Files referenced by the import rows, read from a zip archive.
+    """
+    def __init__(self, fileobj):
+        try:
+            self.archive = zipfile.ZipFile(fileobj)
+        except zipfile.BadZipFile:
+            raise BulkImportError('The archive is not a valid zip file.')
+
+    def open(self, name):
+        info = self.archive.getinfo(name)
+        file = File(self.archive.open(info), name=os.path.basename(name))
+        file.size = info.file_size
+        return file
+
+    def close(self):
+        self.archive.close()
+
+
+class DirectorySource:
+    """
+    Files referenced by the import rows, read from a local directory.
+    """
+    def __init__(self, root):
+        self.root = os.path.realpath(root)
+
+    def open(self, name):
+        path = os.path.realpath(os.path.join(self.root, name))
+        if not path.startswith(self.root + os.sep) or not os.path.isfile(path):
+            raise KeyError(name)
+        return File(open(path, 'rb'), name=os.path.basename(name))
+
+    def close(self):
+        pass
+
+
+def detect_format(filename, format=None):
+    format = (format or os.path.splitext(filename or '')[1].lstrip('.')).lower()
+    if format == 'csv':
+        return 'csv'
+    if format in ('jsonl', 'ndjson'):
+        return 'jsonl'
+    if format == 'json':
+        raise BulkImportError('JSON arrays are not supported, use JSONL with one book object per line.')
+    raise BulkImportError('Unsupported format, use csv or jsonl.')
+
+
+def read_rows(fileobj, format):
+    """
+    Yields one dict per CSV row or JSONL line from a binary file object.
+    A JSONL line that cannot be parsed is yielded as an BulkImportError;
+    a file that is not UTF-8 or not valid CSV raises one.
+    """
+    text = io.TextIOWrapper(fileobj, encoding='utf-8-sig', newline='')
+    try:
+        if format == 'csv':
+            yield from csv.DictReader(text)
+        else:
+            yield from read_jsonl(text)
+    except UnicodeDecodeError:
+        raise BulkImportError('The file is not UTF-8 encoded.')
+    except csv.Error as e:
+        raise BulkImportError(f'Invalid CSV: {e}')
+
+
+def limit_rows(rows, max_rows):
+    """
+    Reads at most `max_rows` rows up front, so an oversized file is
+    rejected before anything is imported.
+    """
+    rows = list(itertools.islice(rows, max_rows + 1))
+    if len(rows) > max_rows:
+        raise BulkImportError(f'At most {max_rows} rows can be imported at once, use manage.py import_books.')
+    return rows
+
+
+def read_jsonl(text):
+    for line in text:
+        if not line.strip():
+            continue
+        try:
+            row = json.loads(line)
+        except ValueError as e:
+            yield BulkImportError(f'Invalid JSON: {e}')
+            continue
+        yield row if isinstance(row, dict) else BulkImportError('Each line must be a JSON object.')
+
+
+def row_data(row, source):
+    """
+    Turns an import row into serializer input, replacing file names with
+    the files from `source`. Returns (data, open_files, errors).
+    """
+    data = {key: value for key, value in row.items() if key not in FILE_FIELDS and value not in (None, '')}
+    files, errors = [], {}
+    for field in FILE_FIELDS:
+        name = row.get(field)
+        if not name:
+            continue
+        if source is None:
+            errors[field] = ['No archive was provided for the referenced file.']
+            continue
+        try:
+            data[field] = source.open(name)
+            files.append(data[field])
+        except KeyError:
+            errors[field] = [f'{name} is not in the archive.']
+    return data, files, errors
+
+
+def store_file(field, file):
+    field = Book._meta.get_field(field)
+    return field.storage.save(field.generate_filename(None, file.name), file)
+
+
+def batch_file_names(books):
+    return [getattr(book, field).name for book in books for field in FILE_FIELDS]
+
+
+def save_batch(books):
+    with transaction.atomic():
+        Book.objects.bulk_create(books)
+        # bulk_create bypasses the Book signals that count blob references
+        change_references(added=batch_file_names(books))
+    return len(books)
+
+
+def import_books(rows, user, source=None, batch_size=1000):
+    """
+    Validates each row with BookSerializer's rules and inserts the valid
+    ones with bulk_create, `batch_size` books per transaction. Files are
+    stored as rows are validated; if the import stops before a batch is
+    inserted, its files are handed to gc_blobs. Returns
+    {'created': n, 'errors': [{'row', 'errors'}]} with 1-based row numbers.
+    """
+    created = 0
+    errors = []
+    batch = []
+    try:
+        for number, row in enumerate(rows, start=1):
+            if isinstance(row, Exception):
+                errors.append({'row': number, 'errors': {'non_field_errors': [str(row)]}})
+                continue
+            data, files, file_errors = row_data(row, source)
+            try:
+                serializer = BookSerializer(data=data)
+                valid = serializer.is_valid()
+                if file_errors or not valid:
+                    errors.append({'row': number, 'errors': {**serializer.errors, **file_errors}})
+                    continue
+                values = dict(serializer.validated_data)
+                for field in FILE_FIELDS:
+                    if values.get(field):
+                        values[field] = store_file(field, values[field])
+            finally:
+                for file in files:
+                    file.close()
+            batch.append(Book(created_by=user, **values))
+            if len(batch) >= batch_size:
+                created += save_batch(batch)
+                batch = []
+        if batch:
+            created += save_batch(batch)
+            batch = []
+    except Exception:
+        # Nothing references the files stored for the batch being built
+        track_unreferenced(batch_file_names(batch))
+        raise
+    finally:
+        if created:
+            bump_catalog_version()
+    return {'created': created, 'errors': errors}
+
+
+def export_books(queryset, fields=EXPORT_FIELDS, chunk_size=2000):
+    """
+    Yields the books as JSONL lines. Rows are streamed from a database
+    cursor, so memory use does not grow with the catalog.
+    """
+    rows = queryset.order_by('id').values_list(*fields).iterator(chunk_size=chunk_size)
+    for row in rows:
+        yield json.dumps(dict(zip(fields, row)), cls=DjangoJSONEncoder) + '\n'
@@ -0,0 +1,141 @@
+import hashlib
+import threading
+import time
+from django.conf import settings
+from django.core.cache import caches
+from django.db.models import F
+from rest_framework.response import Response
+from backend.metrics import record_cache
+from .models import CatalogVersion
+
+VERSION_KEY = 'book_catalog_version'
+COUNTER_ID = 1
+
+_stats = {'hits': 0, 'misses': 0}
+_stats_lock = threading.Lock()
+
+
+def get_cache():
+    return caches[getattr(settings, 'BOOK_CACHE_ALIAS', 'default')]
+
+
+def _initial_version():
+    # Seeded from the clock so a lost counter never restarts below a
+    # version that may still have live entries.
+    return int(time.time() * 1000)
+
+
+def is_shared():
+    # A per-process cache would give each worker its own catalog version,
+    # so one worker's writes would not invalidate the others' entries
+    return getattr(settings, 'BOOK_CACHE_SHARED', False)
+
+
+def _counter():
+    return CatalogVersion.objects.filter(pk=COUNTER_ID).values_list('version', flat=True)
+
+
+def get_catalog_version():
+    """
+    Version of the whole catalog, used in ETags and cache keys. Without a
+    shared cache it is read from the CatalogVersion row, a primary-key
+    lookup that every worker sees.
+    """
+    if not is_shared():
+        return f'db-{_counter().first() or 0}'
+    cache = get_cache()
+    version = cache.get(VERSION_KEY)
+    if version is None:
+        cache.add(VERSION_KEY, _initial_version(), timeout=None)
+        version = cache.get(VERSION_KEY, _initial_version())
+    return version
+
+
+async def aget_catalog_version():
+    if not is_shared():
+        return f'db-{await _counter().afirst() or 0}'
+    cache = get_cache()
+    version = await cache.aget(VERSION_KEY)
+    if version is None:
+        await cache.aadd(VERSION_KEY, _initial_version(), timeout=None)
+        version = await cache.aget(VERSION_KEY, _initial_version())
+    return version
+
+
+def bump_catalog_version():
+    """
+    Invalidates every cached book response by moving to a new catalog
+    version. Old entries are never read again and expire on their own.
+    Call it once the write has committed.
+    """
+    if not is_shared():
+        if not CatalogVersion.objects.filter(pk=COUNTER_ID).update(version=F('version') + 1):
+            CatalogVersion.objects.get_or_create(pk=COUNTER_ID, defaults={'version': 1})
+        return
+    cache = get_cache()
+    try:
+        cache.incr(VERSION_KEY)
+    except ValueError:
+        cache.add(VERSION_KEY, _initial_version(), timeout=None)
+
+
+def _record(outcome):
+    with _stats_lock:
+        _stats[outcome] += 1
+    record_cache(outcome)
+
+
+def get_cache_stats():
+    with _stats_lock:
+        return dict(_stats)
+
+
+def response_cache_key(request, version):
+    params = sorted(request.query_params.lists())
+    digest = hashlib.md5(repr((request.get_host(), request.path, params)).encode()).hexdigest()
+    return f'book_response:{version}:{digest}'
+
+
+def cached_response(request, build_response):
+    """
+    Read-through cache for book GET responses. `build_response` is only
+    called on a miss; successful responses are stored under the current
+    catalog version for BOOK_CACHE_TIMEOUT seconds. Bypassed unless
+    BOOK_CACHE_SHARED is set.
+    """
+    if not is_shared():
+        return build_response()
+    cache = get_cache()
+    key = response_cache_key(request, get_catalog_version())
+    data = cache.get(key)
+    if data is not None:
+        _record('hits')
+        return Response(data)
+
+    _record('misses')
+    response = build_response()
+    if response.status_code == 200:
+        cache.set(key, response.data, timeout=getattr(settings, 'BOOK_CACHE_TIMEOUT', 300))
+    return response
+
+
+async def acached_data(request, build_data):
+    """
+    `cached_response` for async views. Works on the response data and
+    shares cache entries with the sync views; `build_data` is awaited on a
+    miss and may return None for responses that must not be cached.
+    """
+    if not is_shared():
+        return await build_data()
+    cache = get_cache()
+    key = response_cache_key(request, await aget_catalog_version())
+    data = await cache.aget(key)
+    if data is not None:
+        _record('hits')
+        return data
+
+    _record('misses')
+    data = await build_data()
+    if data is not None:
+        await cache.aset(key, data, timeout=getattr(settings, 'BOOK_CACHE_TIMEOUT', 300))
+    return data
@@ -0,0 +1,93 @@
+import hashlib
+from django.db.models import Count, Max
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date
+from .models import ReadingList
+
+
+def make_etag(request, *validators):
+    """
+    A strong ETag for the current URL (cursor, page size and search
+    included) and the given validator values.
+    """
+    digest = hashlib.md5(repr((request.get_full_path(), validators)).encode()).hexdigest()
+    return f'"{digest}"'
+
+
+def latest(*timestamps):
+    timestamps = [timestamp for timestamp in timestamps if timestamp is not None]
+    return max(timestamps) if timestamps else None
+
+
+def book_validators(queryset):
+    """
+    (row count, newest updated_at) for a set of books, in one aggregate
+    query. The count catches deletions, which leave no timestamp behind.
+    """
+    result = queryset.order_by().aggregate(count=Count('id'), updated=Max('updated_at'))
+    return result['count'], result['updated']
+
+
+READING_LIST_AGGREGATES = {
+    'lists': Count('id', distinct=True),
+    'entries': Count('reading_list_books'),
+    'list_updated': Max('updated_at'),
+    'entry_updated': Max('reading_list_books__updated_at'),
+    'book_updated': Max('reading_list_books__book__updated_at'),
+}
+
+
+def reading_list_validators(user):
+    """
+    Counts and newest timestamps for a user's reading lists, their entries
+    and the books in them, in one aggregate query.
+    """
+    result = ReadingList.objects.filter(user=user).order_by().aggregate(**READING_LIST_AGGREGATES)
+    return reading_list_result(result)
+
+
+async def areading_list_validators(user):
+    result = await ReadingList.objects.filter(user=user).order_by().aaggregate(**READING_LIST_AGGREGATES)
+    return reading_list_result(result)
+
+
+def reading_list_result(result):
+    updated = latest(result['list_updated'], result['entry_updated'], result['book_updated'])
+    return (result['lists'], result['entries'], updated), updated
+
+
+def conditional_response(request, build_response, etag, last_modified=None):
+    """
+    Answers 304 Not Modified when the client's If-None-Match or
+    If-Modified-Since still matches, without calling `build_response`.
+    Otherwise builds the response and attaches the validators. Responses
+    are marked private and must be revalidated before reuse.
+    """
+    timestamp = int(last_modified.timestamp()) if last_modified else None
+    response = get_conditional_response(request, etag=etag, last_modified=timestamp)
+    if response is None:
+        response = build_response()
+        if response.status_code != 200:
+            return response
+    return add_validators(response, etag, timestamp)
+
+
+async def aconditional_response(request, build_response, etag, last_modified=None):
+    """
+    `conditional_response` for async views; `build_response` is awaited.
+    """
+    timestamp = int(last_modified.timestamp()) if last_modified else None
+    response = get_conditional_response(request, etag=etag, last_modified=timestamp)
+    if response is None:
+        response = await build_response()
+        if response.status_code != 200:
+            return response
+    return add_validators(response, etag, timestamp)
+
+
+def add_validators(response, etag, timestamp):
+    response['ETag'] = etag
+    if timestamp is not None:
+        response['Last-Modified'] = http_date(timestamp)
+    patch_cache_control(response, private=True, no_cache=True)
+    return response
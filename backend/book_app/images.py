@@ -0,0 +1,103 @@
+import os
+from io import BytesIO
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import transaction
+from django.utils import timezone
+from PIL import Image, ImageOps
+
+# Bounding boxes; covers are scaled down to fit and never enlarged.
+RENDITIONS = {
+    'thumbnail': (160, 240),
+    'card': (320, 480),
+    'full': (960, 1440),
+}
+
+FORMATS = {
+    'webp': ('WEBP', {'quality': 80, 'method': 4}),
+    'jpeg': ('JPEG', {'quality': 82, 'optimize': True, 'progressive': True}),
+}
+
+
+def rendition_name(cover_name, rendition, extension):
+    stem, _ = os.path.splitext(cover_name)
+    return f'{stem}_{rendition}.{extension}'
+
+
+def flatten(image):
+    # JPEG has no alpha channel; composite transparent covers onto white.
+    if image.mode in ('RGBA', 'LA') or (image.mode == 'P' and 'transparency' in image.info):
+        image = image.convert('RGBA')
+        background = Image.new('RGB', image.size, (255, 255, 255))
+        background.paste(image, mask=image.getchannel('A'))
+        return background
+    return image.convert('RGB')
+
+
+def render_cover(cover_name, storage):
+    """
+    Reads the cover from `storage` and writes every rendition to the
+    default storage, returning their names as {rendition: {extension: name}}.
+    Covers are deduplicated by content but renditions belong to one book,
+    so they can be deleted without reference counting.
+    """
+    with storage.open(cover_name, 'rb') as cover:
+        image = Image.open(cover)
+        image.load()
+    image = ImageOps.exif_transpose(image)
+    if image.mode not in ('RGB', 'RGBA'):
+        has_alpha = image.mode in ('LA', 'PA') or 'transparency' in image.info
+        image = image.convert('RGBA' if has_alpha else 'RGB')
+
+    renditions = {}
+    for rendition, size in RENDITIONS.items():
+        resized = image.copy()
+        resized.thumbnail(size, Image.LANCZOS)
+        renditions[rendition] = {}
+        for extension, (image_format, options) in FORMATS.items():
+            output = resized if image_format == 'WEBP' else flatten(resized)
+            buffer = BytesIO()
+            output.save(buffer, image_format, **options)
+            name = default_storage.save(rendition_name(cover_name, rendition, extension), ContentFile(buffer.getvalue()))
+            renditions[rendition][extension] = name
+    return renditions
+
+
+def delete_renditions(renditions):
+    for formats in renditions.values():
+        for name in formats.values():
+            default_storage.delete(name)
+
+
+def delete_book_renditions(sender, instance, **kwargs):
+    """
+    post_delete handler for Book. Renditions are not content-addressed
+    blobs, so gc_blobs never collects them; they are removed once the
+    delete commits.
+    """
+    renditions = instance.cover_renditions
+    if renditions:
+        transaction.on_commit(lambda: delete_renditions(renditions))
+
+
+def generate_cover_renditions(book):
+    """
+    Replaces the book's renditions with fresh ones for its current cover.
+    """
+    old_renditions = book.cover_renditions or {}
+    book.cover_renditions = render_cover(book.cover_image.name, book.cover_image.storage) if book.cover_image else {}
+    type(book).objects.filter(pk=book.pk).update(
+        cover_renditions=book.cover_renditions, updated_at=timezone.now()
+    )
+    delete_renditions(old_renditions)
+    return book.cover_renditions
+
+
+def rendition_urls(renditions, request=None):
+    urls = {}
+    for rendition, formats in (renditions or {}).items():
+        urls[rendition] = {}
+        for extension, name in formats.items():
+            url = default_storage.url(name)
+            urls[rendition][extension] = request.build_absolute_uri(url) if request else url
+    return urls
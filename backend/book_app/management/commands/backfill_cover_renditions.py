@@ -0,0 +1,66 @@
+from concurrent.futures import ProcessPoolExecutor
+import django
+from django.core.management.base import BaseCommand
+from django.db import connections
+from django.utils import timezone
+from book_app.cache import bump_catalog_version
+from book_app.images import delete_renditions, render_cover
+from book_app.models import Book
+
+
+def render_book_cover(job):
+    book_id, cover_name = job
+    storage = Book._meta.get_field('cover_image').storage
+    try:
+        return book_id, render_cover(cover_name, storage), None
+    except Exception as e:
+        return book_id, None, str(e)
+
+
+class Command(BaseCommand):
+    help = 'Generates cover renditions for books that do not have them yet, using a process pool.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=None,
+                            help='Worker processes (defaults to the CPU count).')
+        parser.add_argument('--batch-size', type=int, default=200,
+                            help='Books written back per bulk update.')
+        parser.add_argument('--force', action='store_true',
+                            help='Regenerate renditions for every book with a cover.')
+
+    def save_batch(self, books, old_renditions):
+        Book.objects.bulk_update(books, ['cover_renditions', 'updated_at'])
+        for book in books:
+            delete_renditions(old_renditions.get(book.pk, {}))
+        return len(books)
+
+    def handle(self, *args, **options):
+        books = Book.objects.exclude(cover_image='').exclude(cover_image__isnull=True)
+        if not options['force']:
+            books = books.filter(cover_renditions={})
+        rows = list(books.values_list('pk', 'cover_image', 'cover_renditions'))
+        jobs = [(book_id, cover_name) for book_id, cover_name, _ in rows]
+        old_renditions = {book_id: renditions for book_id, _, renditions in rows if renditions}
+        if not jobs:
+            self.stdout.write('No covers need renditions.')
+            return
+
+        # Forked workers must not share the parent's database connections
+        connections.close_all()
+        done = failed = 0
+        pending = []
+        with ProcessPoolExecutor(max_workers=options['workers'], initializer=django.setup) as executor:
+            for book_id, renditions, error in executor.map(render_book_cover, jobs, chunksize=8):
+                if error:
+                    failed += 1
+                    self.stderr.write(f'Book ID {book_id}: {error}')
+                    continue
+                pending.append(Book(pk=book_id, cover_renditions=renditions, updated_at=timezone.now()))
+                if len(pending) >= options['batch_size']:
+                    done += self.save_batch(pending, old_renditions)
+                    pending = []
+        if pending:
+            done += self.save_batch(pending, old_renditions)
+
+        bump_catalog_version()
+        self.stdout.write(self.style.SUCCESS(f'Generated renditions for {done} books, {failed} failed.'))
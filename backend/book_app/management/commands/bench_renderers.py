@@ -0,0 +1,49 @@
+import gzip
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework.renderers import JSONRenderer
+from backend.middleware import brotli
+from backend.renderers import FastJSONRenderer, orjson
+from book_app.benchmarks import best_of, rolled_back, seed_books
+from book_app.fast_serializers import FastBookSerializer
+
+
+class Command(BaseCommand):
+    help = (
+        'Renders catalog pages of several sizes with the stdlib and fast JSON '
+        'renderers and compares encode time and payload size with gzip and '
+        'brotli. Books are created inside a transaction that is rolled back.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', type=int, nargs='+', default=[20, 100, 1000, 10000],
+                            help='Books per rendered payload.')
+        parser.add_argument('--repeat', type=int, default=5, help='Runs per measurement; the best is reported.')
+
+    def handle(self, *args, **options):
+        rolled_back(lambda: self.run(options))
+
+    def run(self, options):
+        queryset = seed_books(max(options['sizes']))
+        rows = FastBookSerializer().serialize(FastBookSerializer.values(queryset))
+        stdlib, fast = JSONRenderer(), FastJSONRenderer()
+        self.stdout.write(f"JSON encoder: {'orjson' if orjson else 'stdlib (orjson not installed)'}, "
+                          f"brotli: {'available' if brotli else 'not installed'}")
+        self.stdout.write(f"{'books':>7} {'stdlib ms':>10} {'fast ms':>9} {'raw KB':>9} "
+                          f"{'gzip KB':>8} {'gzip ms':>8} {'br KB':>8} {'br ms':>7}")
+
+        for size in options['sizes']:
+            payload = {'next': None, 'results': rows[:size]}
+            stdlib_time, expected = best_of(options['repeat'], lambda: stdlib.render(payload))
+            fast_time, body = best_of(options['repeat'], lambda: fast.render(payload))
+            if body != expected:
+                raise CommandError(f'FastJSONRenderer output differs for {size} books')
+            gzip_time, gzipped = best_of(options['repeat'], lambda: gzip.compress(body, compresslevel=6))
+            if brotli:
+                br_time, compressed = best_of(options['repeat'], lambda: brotli.compress(body, quality=4))
+                br = f'{len(compressed) / 1024:8.1f} {br_time * 1000:7.2f}'
+            else:
+                br = f"{'-':>8} {'-':>7}"
+            self.stdout.write(
+                f'{size:>7} {stdlib_time * 1000:10.2f} {fast_time * 1000:9.2f} {len(body) / 1024:9.1f} '
+                f'{len(gzipped) / 1024:8.1f} {gzip_time * 1000:8.2f} {br}'
+            )
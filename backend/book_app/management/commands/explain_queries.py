@@ -0,0 +1,93 @@
+import re
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from auth_app.models import CustomUser
+from book_app.models import Book, ReadingList, ReadingListBook
+from book_app.search import get_search_engine
+
+# PostgreSQL prints "Seq Scan on table"; SQLite prints "SCAN table" for a
+# full table walk and "SEARCH"/"SCAN ... USING INDEX" when an index is used.
+SEQ_SCAN_PATTERNS = {
+    'postgresql': re.compile(r'Seq Scan on (\w+)'),
+    'sqlite': re.compile(r'\bSCAN (?:TABLE )?(\w+)\b(?! USING (?:COVERING )?INDEX)'),
+}
+
+
+class Command(BaseCommand):
+    help = (
+        'Runs EXPLAIN (ANALYZE on PostgreSQL) for the queries behind each book '
+        'and reading-list endpoint and flags sequential scans. Planners pick '
+        'sequential scans on tiny tables, so run it against realistic data.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--user', help='Email of the user whose data is queried.')
+        parser.add_argument('--search', default='the', help='Term used for the search query.')
+        parser.add_argument('--fail-on-seq-scan', action='store_true',
+                            help='Exit with an error when any sequential scan is found.')
+
+    def get_user(self, email):
+        if email:
+            try:
+                return CustomUser.objects.get(email=email)
+            except CustomUser.DoesNotExist:
+                raise CommandError(f'User not found: {email}')
+        user = CustomUser.objects.filter(reading_lists__isnull=False).first() or CustomUser.objects.first()
+        if user is None:
+            raise CommandError('No users found; seed some data first.')
+        return user
+
+    def get_querysets(self, user, search):
+        page = getattr(settings, 'API_PAGE_SIZE', 20) + 1
+        ordering = ('-created_at', '-id')
+        reading_list = ReadingList.objects.filter(user=user).first()
+        reading_list_id = reading_list.pk if reading_list else 0
+        book = Book.objects.order_by('-created_at').first()
+        return {
+            'BookListView': Book.objects.order_by(*ordering)[:page],
+            'BookListView (search)': get_search_engine().search(Book.objects.all(), search).order_by(
+                '-rank', *ordering
+            )[:page],
+            'MyBooksView': Book.objects.filter(created_by=user).order_by(*ordering)[:page],
+            'BookDetailView': Book.objects.filter(pk=book.pk if book else 0),
+            'ReadingListView': ReadingList.objects.filter(user=user).order_by(*ordering)[:page],
+            'ReadingListView (books prefetch)': ReadingListBook.objects.filter(
+                reading_list__in=ReadingList.objects.filter(user=user).order_by(*ordering)[:page].values('pk')
+            ).select_related('book'),
+            'ReadingList* (active books)': ReadingListBook.objects.filter(
+                reading_list_id=reading_list_id, is_completed=False
+            ).order_by('order'),
+            'ReadingList* (all books)': ReadingListBook.objects.filter(
+                reading_list_id=reading_list_id
+            ).order_by('order'),
+        }
+
+    def handle(self, *args, **options):
+        vendor = connection.vendor
+        pattern = SEQ_SCAN_PATTERNS.get(vendor)
+        if pattern is None:
+            raise CommandError(f'Unsupported database vendor: {vendor}')
+
+        user = self.get_user(options['user'])
+        flagged = []
+        for name, queryset in self.get_querysets(user, options['search']).items():
+            if vendor == 'postgresql':
+                plan = queryset.explain(analyze=True, buffers=True)
+            else:
+                plan = queryset.explain()
+            scans = sorted(set(pattern.findall(plan)))
+            self.stdout.write(self.style.MIGRATE_HEADING(name))
+            self.stdout.write(plan)
+            if scans:
+                flagged.append(name)
+                self.stdout.write(self.style.WARNING(f'Sequential scan on: {", ".join(scans)}'))
+            self.stdout.write('')
+
+        if flagged:
+            message = f'{len(flagged)} queries use sequential scans: {", ".join(flagged)}'
+            if options['fail_on_seq_scan']:
+                raise CommandError(message)
+            self.stdout.write(self.style.WARNING(message))
+        else:
+            self.stdout.write(self.style.SUCCESS('No sequential scans found.'))
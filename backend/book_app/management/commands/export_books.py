@@ -0,0 +1,47 @@
+import sys
+import zipfile
+from django.core.management.base import BaseCommand
+from book_app.bulk import FILE_FIELDS, export_books
+from book_app.models import Book
+
+
+class Command(BaseCommand):
+    help = 'Streams the catalog as JSONL, optionally with a zip of the referenced files.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--output', help='JSONL file to write (defaults to stdout).')
+        parser.add_argument('--files', help='Also write the PDFs and covers to this zip archive, '
+                                            'so the export can be loaded with import_books.')
+        parser.add_argument('--user', help='Only export books created by the user with this email.')
+
+    def handle(self, *args, **options):
+        books = Book.objects.all()
+        if options['user']:
+            books = books.filter(created_by__email=options['user'])
+
+        output = open(options['output'], 'w', encoding='utf-8') if options['output'] else sys.stdout
+        count = 0
+        try:
+            for line in export_books(books):
+                output.write(line)
+                count += 1
+        finally:
+            if options['output']:
+                output.close()
+
+        if options['files']:
+            self.write_archive(books, options['files'])
+        self.stderr.write(self.style.SUCCESS(f'Exported {count} books.'))
+
+    def write_archive(self, books, path):
+        # Content-addressed names repeat across books; each file is written once
+        written = set()
+        with zipfile.ZipFile(path, 'w', zipfile.ZIP_STORED, allowZip64=True) as archive:
+            for row in books.order_by('id').values_list(*FILE_FIELDS).iterator(chunk_size=2000):
+                for field, name in zip(FILE_FIELDS, row):
+                    if not name or name in written:
+                        continue
+                    storage = Book._meta.get_field(field).storage
+                    if storage.exists(name):
+                        archive.write(storage.path(name), name)
+                        written.add(name)
@@ -0,0 +1,26 @@
+from datetime import timedelta
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from book_app.blobs import collect_garbage, recount_references
+
+
+class Command(BaseCommand):
+    help = 'Deletes content-addressed PDFs and covers that no book references any more.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--grace-hours', type=int, default=getattr(settings, 'BLOB_GC_GRACE_HOURS', 24),
+                            help='How long a blob must have been unreferenced before it is deleted.')
+        parser.add_argument('--recount', action='store_true',
+                            help='Rebuild reference counts from the books table first.')
+        parser.add_argument('--dry-run', action='store_true',
+                            help='List the blobs that would be deleted without deleting them.')
+
+    def handle(self, *args, **options):
+        if options['recount']:
+            changed = recount_references()
+            self.stdout.write(f'Corrected {changed} reference counts.')
+        deleted = collect_garbage(timedelta(hours=options['grace_hours']), dry_run=options['dry_run'])
+        for name in deleted:
+            self.stdout.write(name)
+        verb = 'Would delete' if options['dry_run'] else 'Deleted'
+        self.stdout.write(self.style.SUCCESS(f'{verb} {len(deleted)} unreferenced blobs.'))
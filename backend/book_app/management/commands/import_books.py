@@ -0,0 +1,42 @@
+import os
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from book_app.bulk import BulkImportError, DirectorySource, ZipSource, detect_format, import_books, read_rows
+
+
+class Command(BaseCommand):
+    help = 'Imports books from a CSV or JSONL file, with PDFs and covers from a zip archive or directory.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='CSV or JSONL file with one book per row.')
+        parser.add_argument('--user', required=True, help='Email of the user the books are created for.')
+        parser.add_argument('--files', help='Zip archive or directory holding the referenced PDFs and covers.')
+        parser.add_argument('--format', choices=['csv', 'jsonl'], help='Defaults to the file extension.')
+        parser.add_argument('--batch-size', type=int, default=1000,
+                            help='Books inserted per bulk_create transaction.')
+
+    def handle(self, *args, **options):
+        try:
+            user = get_user_model().objects.get(email=options['user'])
+        except get_user_model().DoesNotExist:
+            raise CommandError(f"No user with email {options['user']}")
+
+        source = None
+        try:
+            file_format = detect_format(options['path'], options['format'])
+            if options['files']:
+                source = DirectorySource(options['files']) if os.path.isdir(options['files']) else ZipSource(options['files'])
+            with open(options['path'], 'rb') as f:
+                result = import_books(read_rows(f, file_format), user, source, batch_size=options['batch_size'])
+        except BulkImportError as e:
+            raise CommandError(str(e))
+        finally:
+            if source:
+                source.close()
+
+        for error in result['errors']:
+            self.stderr.write(f"Row {error['row']}: {error['errors']}")
+        self.stdout.write(self.style.SUCCESS(
+            f"Imported {result['created']} books, {len(result['errors'])} rows rejected. "
+            f"Run backfill_cover_renditions to generate cover renditions."
+        ))
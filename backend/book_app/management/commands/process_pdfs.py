@@ -0,0 +1,35 @@
+import time
+from datetime import timedelta
+from django.core.management.base import BaseCommand
+from book_app.pdf_processing import process_pending_pdfs, requeue_books
+
+
+class Command(BaseCommand):
+    help = 'Processes uploaded PDFs: structure check, page count, text extraction and preview.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=10)
+        parser.add_argument('--interval', type=float, default=2.0,
+                            help='Seconds to sleep when nothing is pending.')
+        parser.add_argument('--once', action='store_true',
+                            help='Process the pending books and exit.')
+        parser.add_argument('--retry-failed', action='store_true',
+                            help='Queue failed books and books left processing by a crashed worker again.')
+        parser.add_argument('--stale-after', type=int, default=None,
+                            help='Seconds after which a processing book counts as abandoned '
+                                 '(defaults to PDF_PROCESSING_STALE_AFTER).')
+
+    def handle(self, *args, **options):
+        if options['retry_failed']:
+            stale_after = options['stale_after']
+            requeued = requeue_books(None if stale_after is None else timedelta(seconds=stale_after))
+            self.stdout.write(f'Requeued {requeued} books')
+
+        while True:
+            processed = process_pending_pdfs(batch_size=options['batch_size'])
+            if processed:
+                self.stdout.write(f'Processed {processed} PDFs')
+                continue
+            if options['once']:
+                return
+            time.sleep(options['interval'])
@@ -0,0 +1,22 @@
+from datetime import timedelta
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from book_app.models import BookUpload
+from book_app.uploads import discard_upload
+
+
+class Command(BaseCommand):
+    help = 'Deletes chunked uploads that were never finalized, with their part files.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--hours', type=int, default=24,
+                            help='Age after which an unfinished upload is discarded.')
+
+    def handle(self, *args, **options):
+        cutoff = timezone.now() - timedelta(hours=options['hours'])
+        uploads = BookUpload.objects.filter(created_at__lt=cutoff)
+        count = 0
+        for upload in uploads.iterator():
+            discard_upload(upload)
+            count += 1
+        self.stdout.write(self.style.SUCCESS(f'Discarded {count} stale uploads.'))
@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+from book_app.progress import repair_progress
+
+
+class Command(BaseCommand):
+    help = 'Recomputes the denormalized progress counters of every reading list from its entries.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000, help='Lists corrected per bulk UPDATE.')
+        parser.add_argument('--dry-run', action='store_true',
+                            help='List the reading lists that have drifted without correcting them.')
+
+    def handle(self, *args, **options):
+        corrected = repair_progress(batch_size=options['batch_size'], dry_run=options['dry_run'])
+        for pk in corrected:
+            self.stdout.write(f'Reading list {pk}')
+        verb = 'Would correct' if options['dry_run'] else 'Corrected'
+        self.stdout.write(self.style.SUCCESS(f'{verb} {len(corrected)} reading lists.'))
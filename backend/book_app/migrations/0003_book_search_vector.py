@@ -0,0 +1,58 @@
+# Generated by Django 5.2.3 on 2026-10-18 09:12
+
+import django.contrib.postgres.search
+from django.db import migrations
+
+
+SEARCH_VECTOR_SQL = """
+CREATE OR REPLACE FUNCTION book_app_book_search_vector_update() RETURNS trigger AS $$
+BEGIN
+    NEW.search_vector :=
+        setweight(to_tsvector('english', coalesce(NEW.title, '')), 'A') ||
+        setweight(to_tsvector('english', coalesce(NEW.authors, '')), 'A') ||
+        setweight(to_tsvector('english', coalesce(NEW.genre, '')), 'B') ||
+        setweight(to_tsvector('english', coalesce(NEW.description, '')), 'C');
+    RETURN NEW;
+END
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER book_app_book_search_vector_trigger
+    BEFORE INSERT OR UPDATE ON book_app_book
+    FOR EACH ROW EXECUTE FUNCTION book_app_book_search_vector_update();
+
+UPDATE book_app_book SET id = id;
+
+CREATE INDEX book_app_book_search_vector_idx ON book_app_book USING gin (search_vector);
+"""
+
+DROP_SEARCH_VECTOR_SQL = """
+DROP INDEX IF EXISTS book_app_book_search_vector_idx;
+DROP TRIGGER IF EXISTS book_app_book_search_vector_trigger ON book_app_book;
+DROP FUNCTION IF EXISTS book_app_book_search_vector_update();
+"""
+
+
+def create_search_trigger(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute(SEARCH_VECTOR_SQL, params=None)
+
+
+def drop_search_trigger(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute(DROP_SEARCH_VECTOR_SQL, params=None)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('book_app', '0002_book_pdf_file'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='book',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.RunPython(create_search_trigger, drop_search_trigger),
+    ]
@@ -0,0 +1,47 @@
+# Generated by Django 5.2.3 on 2026-10-18 10:05
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('book_app', '0003_book_search_vector'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='book',
+            index=models.Index(fields=['-created_at', '-id'], name='book_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='book',
+            index=models.Index(fields=['created_by', '-created_at', '-id'], name='book_owner_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='readinglist',
+            index=models.Index(fields=['user', '-created_at', '-id'], name='readinglist_user_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='readinglistbook',
+            index=models.Index(fields=['reading_list', 'order'], name='rlb_list_order_idx'),
+        ),
+        migrations.AlterField(
+            model_name='book',
+            name='created_by',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='books', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AlterField(
+            model_name='readinglist',
+            name='user',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='reading_lists', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AlterField(
+            model_name='readinglistbook',
+            name='reading_list',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='reading_list_books', to='book_app.readinglist'),
+        ),
+    ]
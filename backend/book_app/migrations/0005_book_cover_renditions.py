@@ -0,0 +1,18 @@
+# Generated by Django 5.2.3 on 2026-10-18 10:31
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('book_app', '0004_book_book_created_idx_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='book',
+            name='cover_renditions',
+            field=models.JSONField(blank=True, default=dict, editable=False),
+        ),
+    ]
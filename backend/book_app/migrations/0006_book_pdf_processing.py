@@ -0,0 +1,74 @@
+# Generated by Django 5.2.3 on 2026-10-18 10:58
+
+from django.db import migrations, models
+
+
+SEARCH_VECTOR_FUNCTION_SQL = """
+CREATE OR REPLACE FUNCTION book_app_book_search_vector_update() RETURNS trigger AS $$
+BEGIN
+    NEW.search_vector :=
+        setweight(to_tsvector('english', coalesce(NEW.title, '')), 'A') ||
+        setweight(to_tsvector('english', coalesce(NEW.authors, '')), 'A') ||
+        setweight(to_tsvector('english', coalesce(NEW.genre, '')), 'B') ||
+        setweight(to_tsvector('english', coalesce(NEW.description, '')), 'C'){pdf_text};
+    RETURN NEW;
+END
+$$ LANGUAGE plpgsql;
+"""
+
+PDF_TEXT_SQL = " ||\n        setweight(to_tsvector('english', coalesce(NEW.pdf_text, '')), 'D')"
+
+
+def index_pdf_text(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute(SEARCH_VECTOR_FUNCTION_SQL.replace('{pdf_text}', PDF_TEXT_SQL), params=None)
+
+
+def unindex_pdf_text(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute(SEARCH_VECTOR_FUNCTION_SQL.replace('{pdf_text}', ''), params=None)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('book_app', '0005_book_cover_renditions'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='book',
+            name='pdf_status',
+            field=models.CharField(choices=[('pending', 'Pending'), ('processing', 'Processing'), ('ready', 'Ready'), ('failed', 'Failed')], default='pending', max_length=10),
+        ),
+        migrations.AddField(
+            model_name='book',
+            name='pdf_page_count',
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='book',
+            name='pdf_file_size',
+            field=models.PositiveBigIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='book',
+            name='pdf_text',
+            field=models.TextField(blank=True, default=''),
+        ),
+        migrations.AddField(
+            model_name='book',
+            name='pdf_preview',
+            field=models.ImageField(blank=True, null=True, upload_to='book_previews/'),
+        ),
+        migrations.AddField(
+            model_name='book',
+            name='pdf_error',
+            field=models.TextField(blank=True, default=''),
+        ),
+        migrations.AddIndex(
+            model_name='book',
+            index=models.Index(condition=models.Q(('pdf_status', 'pending')), fields=['created_at'], name='book_pdf_pending_idx'),
+        ),
+        migrations.RunPython(index_pdf_text, unindex_pdf_text),
+    ]
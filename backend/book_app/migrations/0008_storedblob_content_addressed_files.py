@@ -0,0 +1,36 @@
+# Generated by Django 5.2.3 on 2026-10-18 12:02
+
+import book_app.storage
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('book_app', '0007_bookupload_bookuploadchunk'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StoredBlob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=255, unique=True)),
+                ('ref_count', models.IntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'indexes': [models.Index(condition=models.Q(('ref_count__lte', 0)), fields=['updated_at'], name='storedblob_orphan_idx')],
+            },
+        ),
+        migrations.AlterField(
+            model_name='book',
+            name='cover_image',
+            field=models.ImageField(blank=True, null=True, storage=book_app.storage.get_book_file_storage, upload_to='book_covers/'),
+        ),
+        migrations.AlterField(
+            model_name='book',
+            name='pdf_file',
+            field=models.FileField(blank=True, null=True, storage=book_app.storage.get_book_file_storage, upload_to='book_pdfs/'),
+        ),
+    ]
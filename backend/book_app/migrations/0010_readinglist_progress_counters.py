@@ -0,0 +1,44 @@
+# Generated by Django 5.2.3 on 2026-10-18 16:05
+
+from django.db import migrations, models
+from django.db.models import Count, Max, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def backfill_progress(apps, schema_editor):
+    ReadingList = apps.get_model('book_app', 'ReadingList')
+    ReadingListBook = apps.get_model('book_app', 'ReadingListBook')
+    entries = ReadingListBook.objects.filter(reading_list=OuterRef('pk')).order_by().values('reading_list')
+    ReadingList.objects.update(
+        total_books=Coalesce(Subquery(entries.annotate(count=Count('pk')).values('count')), 0),
+        completed_books=Coalesce(
+            Subquery(entries.filter(is_completed=True).annotate(count=Count('pk')).values('count')), 0
+        ),
+        last_activity_at=Subquery(entries.annotate(latest=Max('updated_at')).values('latest')),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('book_app', '0009_book_updated_at_readinglist_updated_at_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='readinglist',
+            name='completed_books',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='readinglist',
+            name='last_activity_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='readinglist',
+            name='total_books',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(backfill_progress, migrations.RunPython.noop),
+    ]
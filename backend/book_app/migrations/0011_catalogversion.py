@@ -0,0 +1,26 @@
+# Generated by Django 5.2.3 on 2026-10-18 20:10
+
+from django.db import migrations, models
+
+
+def create_counter(apps, schema_editor):
+    CatalogVersion = apps.get_model('book_app', 'CatalogVersion')
+    CatalogVersion.objects.get_or_create(pk=1)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('book_app', '0010_readinglist_progress_counters'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CatalogVersion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('version', models.PositiveBigIntegerField(default=0)),
+            ],
+        ),
+        migrations.RunPython(create_counter, migrations.RunPython.noop),
+    ]
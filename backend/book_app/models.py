@@ -1,38 +1,186 @@
+import uuid
 from django.db import models
+from django.contrib.postgres.search import SearchVectorField
 from auth_app.models import CustomUser
+from .storage import get_book_file_storage
+
+class BookManager(models.Manager):
+    def get_queryset(self):
+        # The search vector and extracted PDF text are only ever used
+        # inside SQL; don't ship them to Python for every book.
+        return super().get_queryset().defer('search_vector', 'pdf_text')
 
 class Book(models.Model):
+    PDF_PENDING = 'pending'
+    PDF_PROCESSING = 'processing'
+    PDF_READY = 'ready'
+    PDF_FAILED = 'failed'
+    PDF_STATUS_CHOICES = [
+        (PDF_PENDING, 'Pending'),
+        (PDF_PROCESSING, 'Processing'),
+        (PDF_READY, 'Ready'),
+        (PDF_FAILED, 'Failed'),
+    ]
+
     title = models.CharField(max_length=200)
     authors = models.CharField(max_length=200)
     genre = models.CharField(max_length=100)
     publication_date = models.DateField()
     description = models.TextField(blank=True, null=True)
-    cover_image = models.ImageField(upload_to='book_covers/', blank=True, null=True)
-    pdf_file = models.FileField(upload_to='book_pdfs/', blank=True, null=True)
-    created_by = models.ForeignKey(CustomUser, on_delete=models.CASCADE, related_name='books')
+    # Covers and PDFs are deduplicated by content, see book_app.storage
+    cover_image = models.ImageField(upload_to='book_covers/', storage=get_book_file_storage, blank=True, null=True)
+    # {rendition: {extension: storage name}}, see book_app.images
+    cover_renditions = models.JSONField(default=dict, blank=True, editable=False)
+    pdf_file = models.FileField(upload_to='book_pdfs/', storage=get_book_file_storage, blank=True, null=True)
+    # Filled in by `manage.py process_pdfs`, see book_app.pdf_processing
+    pdf_status = models.CharField(max_length=10, choices=PDF_STATUS_CHOICES, default=PDF_PENDING)
+    pdf_page_count = models.PositiveIntegerField(null=True, blank=True)
+    pdf_file_size = models.PositiveBigIntegerField(null=True, blank=True)
+    pdf_text = models.TextField(blank=True, default='')
+    pdf_preview = models.ImageField(upload_to='book_previews/', blank=True, null=True)
+    pdf_error = models.TextField(blank=True, default='')
+    # book_owner_created_idx leads with this column, so no FK index
+    created_by = models.ForeignKey(CustomUser, on_delete=models.CASCADE, related_name='books', db_index=False)
     created_at = models.DateTimeField(auto_now_add=True)
+    # Also set by the queryset.update()/bulk_update() callers, which skip auto_now
+    updated_at = models.DateTimeField(auto_now=True)
+    # Maintained by a database trigger on PostgreSQL, see migration 0003.
+    search_vector = SearchVectorField(null=True, editable=False)
+
+    objects = BookManager()
+
+    class Meta:
+        indexes = [
+            # Catalog pages and my-books pages, newest first
+            models.Index(fields=['-created_at', '-id'], name='book_created_idx'),
+            models.Index(fields=['created_by', '-created_at', '-id'], name='book_owner_created_idx'),
+            models.Index(
+                fields=['created_at'],
+                condition=models.Q(pdf_status='pending'),
+                name='book_pdf_pending_idx',
+            ),
+        ]
 
     def __str__(self):
         return self.title
 
+class StoredBlob(models.Model):
+    """
+    Reference count for one content-addressed file. Maintained by the Book
+    signals in book_app.blobs; `manage.py gc_blobs` deletes blobs that
+    nothing references any more.
+    """
+    name = models.CharField(max_length=255, unique=True)
+    ref_count = models.IntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['updated_at'], condition=models.Q(ref_count__lte=0), name='storedblob_orphan_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.name} ({self.ref_count})"
+
+class CatalogVersion(models.Model):
+    """
+    Single-row counter behind the catalog ETags when no shared cache is
+    configured, see book_app.cache. Bumped by every catalog write path.
+    """
+    version = models.PositiveBigIntegerField(default=0)
+
+    def __str__(self):
+        return f"catalog v{self.version}"
+
+class BookUpload(models.Model):
+    """
+    A PDF being uploaded in numbered chunks, see book_app.uploads. The
+    bytes are written straight into a part file until the upload is
+    finalized into a Book.
+    """
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    user = models.ForeignKey(CustomUser, on_delete=models.CASCADE, related_name='book_uploads')
+    filename = models.CharField(max_length=255)
+    total_size = models.PositiveBigIntegerField()
+    chunk_size = models.PositiveIntegerField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    @property
+    def total_chunks(self):
+        return max(1, -(-self.total_size // self.chunk_size))
+
+    def __str__(self):
+        return f"{self.filename} by {self.user.email}"
+
+class BookUploadChunk(models.Model):
+    upload = models.ForeignKey(BookUpload, on_delete=models.CASCADE, related_name='chunks')
+    index = models.PositiveIntegerField()
+    size = models.PositiveIntegerField()
+    sha256 = models.CharField(max_length=64)
+
+    class Meta:
+        unique_together = ('upload', 'index')
+
+    def __str__(self):
+        return f"Chunk {self.index} of {self.upload_id}"
+
+class ReadingListQuerySet(models.QuerySet):
+    def with_books(self):
+        return self.prefetch_related(reading_list_books_prefetch())
+
 class ReadingList(models.Model):
     name = models.CharField(max_length=200)
-    user = models.ForeignKey(CustomUser, on_delete=models.CASCADE, related_name='reading_lists')
+    # readinglist_user_created_idx leads with this column, so no FK index
+    user = models.ForeignKey(CustomUser, on_delete=models.CASCADE, related_name='reading_lists', db_index=False)
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    # Denormalized progress, kept up to date by book_app.progress
+    total_books = models.PositiveIntegerField(default=0)
+    completed_books = models.PositiveIntegerField(default=0)
+    last_activity_at = models.DateTimeField(null=True, blank=True)
+
+    objects = ReadingListQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['user', '-created_at', '-id'], name='readinglist_user_created_idx'),
+        ]
 
     def __str__(self):
         return f"{self.name} by {self.user.email}"
 
 class ReadingListBook(models.Model):
-    reading_list = models.ForeignKey(ReadingList, on_delete=models.CASCADE, related_name='reading_list_books')
+    # Lookups by list use the (reading_list, order) and unique
+    # (reading_list, book) indexes, so the FK needs none of its own
+    reading_list = models.ForeignKey(
+        ReadingList, on_delete=models.CASCADE, related_name='reading_list_books', db_index=False
+    )
     book = models.ForeignKey(Book, on_delete=models.CASCADE, related_name='reading_list_books')
     order = models.PositiveIntegerField(default=0)
     is_completed = models.BooleanField(default=False)
     completed_at = models.DateTimeField(null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         unique_together = ('reading_list', 'book')
         ordering = ['order']
+        indexes = [
+            # Serves next_order()'s MAX(order), ordered entry reads and the
+            # active-books scan (is_completed=False is filtered within one
+            # list's rows)
+            models.Index(fields=['reading_list', 'order'], name='rlb_list_order_idx'),
+        ]
 
     def __str__(self):
-        return f"{self.book.title} in {self.reading_list.name}"
\ No newline at end of file
+        return f"{self.book.title} in {self.reading_list.name}"
+
+def reading_list_books_prefetch():
+    """
+    Prefetch plan for serializing reading lists: the list entries and their
+    books are loaded in one extra query regardless of how many lists or
+    books there are.
+    """
+    return models.Prefetch(
+        'reading_list_books',
+        queryset=ReadingListBook.objects.select_related('book').defer('book__search_vector', 'book__pdf_text'),
+    )
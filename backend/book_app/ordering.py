@@ -0,0 +1,96 @@
+from django.db import models
+from django.utils import timezone
+
+# Reading-list entries are ranked with gaps between them so a single move
+# can usually take the midpoint of its new neighbours and touch one row.
+ORDER_GAP = 1024
+
+
+def next_order(reading_list):
+    max_order = reading_list.reading_list_books.aggregate(models.Max('order'))['order__max'] or 0
+    return max_order + ORDER_GAP
+
+
+def active_entries(reading_list):
+    """
+    Entries still being read, in their current order. Completed books keep
+    their rank but no longer take part in reordering.
+    """
+    return list(reading_list.reading_list_books.filter(is_completed=False).order_by('order', 'pk'))
+
+
+def rebalance(entries):
+    """
+    Re-spaces `entries`, in the given sequence, ORDER_GAP apart with a
+    single bulk UPDATE covering only the rows whose rank changes.
+    """
+    changed = []
+    now = timezone.now()
+    for index, entry in enumerate(entries):
+        order = (index + 1) * ORDER_GAP
+        if entry.order != order:
+            entry.order = order
+            entry.updated_at = now
+            changed.append(entry)
+    if changed:
+        type(changed[0]).objects.bulk_update(changed, ['order', 'updated_at'])
+    return changed
+
+
+def move_entry(entries, entry, after=None):
+    """
+    Places `entry` directly after `after` (or first when None) within the
+    ordered `entries`. Takes the midpoint of the new neighbours when there
+    is room, otherwise rebalances the whole list.
+    """
+    others = [item for item in entries if item.pk != entry.pk]
+    position = 0 if after is None else others.index(after) + 1
+    previous_order = others[position - 1].order if position > 0 else 0
+    if position < len(others):
+        following_order = others[position].order
+    else:
+        following_order = previous_order + 2 * ORDER_GAP
+
+    others.insert(position, entry)
+    if following_order - previous_order >= 2:
+        entry.order = (previous_order + following_order) // 2
+        entry.save(update_fields=['order', 'updated_at'])
+        return [entry]
+    return rebalance(others)
+
+
+def find_single_move(current, target):
+    """
+    Returns (entry, after) when `target` is `current` with one entry moved,
+    None when more than one entry changed place.
+    """
+    start = next((i for i, (a, b) in enumerate(zip(current, target)) if a != b), None)
+    if start is None:
+        return None
+    end = max(i for i, (a, b) in enumerate(zip(current, target)) if a != b)
+    window, new_window = current[start:end + 1], target[start:end + 1]
+    if new_window == window[1:] + window[:1]:
+        # Moved down: window[0] now sits at the end of the window
+        return window[0], new_window[-2]
+    if new_window == window[-1:] + window[:-1]:
+        # Moved up: window[-1] now sits at the start of the window
+        return window[-1], target[start - 1] if start > 0 else None
+    return None
+
+
+def reorder_entries(reading_list, book_ids):
+    """
+    Applies a complete new ordering of the list's active books. Raises
+    ValueError unless `book_ids` is a permutation of exactly those books.
+    """
+    entries = active_entries(reading_list)
+    by_book = {entry.book_id: entry for entry in entries}
+    if len(book_ids) != len(set(book_ids)) or set(book_ids) != set(by_book):
+        raise ValueError('book_orders must list every unfinished book in the reading list exactly once.')
+
+    target = [by_book[book_id] for book_id in book_ids]
+    move = find_single_move(entries, target)
+    if move:
+        entry, after = move
+        return move_entry(entries, entry, after)
+    return rebalance(target)
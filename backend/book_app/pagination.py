@@ -0,0 +1,167 @@
+import base64
+import json
+from datetime import date
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.db import connections
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+def estimate_count(queryset):
+    """
+    Row count taken from the planner's estimate instead of running
+    `COUNT(*)`. Falls back to an exact count on non-PostgreSQL databases.
+    """
+    connection = connections[queryset.db]
+    if connection.vendor != 'postgresql':
+        return queryset.count()
+    sql, params = queryset.order_by().values('pk').query.sql_with_params()
+    with connection.cursor() as cursor:
+        cursor.execute(f'EXPLAIN (FORMAT JSON) {sql}', params)
+        plan = cursor.fetchone()[0]
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]['Plan']['Plan Rows'])
+
+
+class KeysetPagination:
+    """
+    Keyset (seek) pagination over a unique ordering, `(-created_at, -id)`
+    by default. Each page is fetched with a single `LIMIT page_size + 1`
+    query starting after the last row of the previous page, so the cost
+    of a request does not depend on how deep the client has paged.
+
+    Query parameters:
+        cursor     opaque position returned as `next` by the previous page
+        page_size  rows per page, capped at `API_MAX_PAGE_SIZE`
+        count      `exact` or `estimate` to include a total `count`
+    """
+    cursor_query_param = 'cursor'
+    page_size_query_param = 'page_size'
+    count_query_param = 'count'
+    count_modes = ('exact', 'estimate')
+
+    def __init__(self, ordering=('-created_at', '-id')):
+        self.ordering = tuple(ordering)
+
+    def ordering_fields(self):
+        # Columns a `.values()` queryset must include to build the cursor
+        return [field.lstrip('-') for field in self.ordering]
+
+    def get_page_size(self, request):
+        default = getattr(settings, 'API_PAGE_SIZE', 20)
+        maximum = getattr(settings, 'API_MAX_PAGE_SIZE', 100)
+        try:
+            page_size = int(request.query_params.get(self.page_size_query_param, default))
+        except (TypeError, ValueError):
+            page_size = default
+        return max(1, min(page_size, maximum))
+
+    def get_count_mode(self, request):
+        mode = request.query_params.get(
+            self.count_query_param, getattr(settings, 'API_PAGINATION_COUNT', None)
+        )
+        return mode if mode in self.count_modes else None
+
+    def encode_cursor(self, row):
+        values = []
+        for name in self.ordering_fields():
+            value = row[name] if isinstance(row, dict) else getattr(row, name)
+            if isinstance(value, date):
+                value = value.isoformat()
+            values.append(value)
+        data = json.dumps(values, separators=(',', ':')).encode()
+        return base64.urlsafe_b64encode(data).decode().rstrip('=')
+
+    def decode_cursor(self, cursor, queryset):
+        try:
+            padding = '=' * (-len(cursor) % 4)
+            values = json.loads(base64.urlsafe_b64decode(cursor + padding))
+        except (TypeError, ValueError):
+            raise NotFound('Invalid cursor')
+        if not isinstance(values, list) or len(values) != len(self.ordering):
+            raise NotFound('Invalid cursor')
+        if not all(isinstance(value, (str, int, float)) for value in values):
+            raise NotFound('Invalid cursor')
+        # Clean with the column's own field, so a forged value (wrong type,
+        # out of range) is rejected here instead of failing inside the query
+        try:
+            return [
+                self.get_output_field(queryset, name).clean(value, None)
+                for name, value in zip(self.ordering_fields(), values)
+            ]
+        except (ValidationError, TypeError, ValueError):
+            raise NotFound('Invalid cursor')
+
+    def get_output_field(self, queryset, name):
+        annotation = queryset.query.annotations.get(name)
+        if annotation is not None:
+            return annotation.output_field
+        return queryset.model._meta.get_field(name)
+
+    def get_seek_filter(self, values):
+        # (a, b, c) after (x, y, z) expands to
+        # a > x OR (a = x AND b > y) OR (a = x AND b = y AND c > z)
+        seek = Q()
+        equal = Q()
+        for field, value in zip(self.ordering, values):
+            name = field.lstrip('-')
+            lookup = 'lt' if field.startswith('-') else 'gt'
+            seek |= equal & Q(**{f'{name}__{lookup}': value})
+            equal &= Q(**{name: value})
+        return seek
+
+    def page_queryset(self, queryset, request):
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        queryset = queryset.order_by(*self.ordering)
+        cursor = request.query_params.get(self.cursor_query_param)
+        if cursor:
+            queryset = queryset.filter(self.get_seek_filter(self.decode_cursor(cursor, queryset)))
+        return queryset[:self.page_size + 1]
+
+    def paginate_queryset(self, queryset, request):
+        self.count = None
+        count_mode = self.get_count_mode(request)
+        if count_mode == 'exact':
+            self.count = queryset.count()
+        elif count_mode == 'estimate':
+            self.count = estimate_count(queryset)
+        return self.trim_page(list(self.page_queryset(queryset, request)))
+
+    async def apaginate_queryset(self, queryset, request):
+        """
+        `paginate_queryset` for async views, through the async ORM.
+        """
+        self.count = None
+        count_mode = self.get_count_mode(request)
+        if count_mode == 'exact':
+            self.count = await queryset.acount()
+        elif count_mode == 'estimate':
+            self.count = await sync_to_async(estimate_count)(queryset)
+        return self.trim_page([row async for row in self.page_queryset(queryset, request)])
+
+    def trim_page(self, rows):
+        self.has_next = len(rows) > self.page_size
+        rows = rows[:self.page_size]
+        self.next_cursor = self.encode_cursor(rows[-1]) if self.has_next else None
+        return rows
+
+    def get_next_link(self):
+        if not self.next_cursor:
+            return None
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, self.next_cursor)
+
+    def get_paginated_data(self, data):
+        payload = {'next': self.get_next_link(), 'results': data}
+        if self.count is not None:
+            payload['count'] = self.count
+        return payload
+
+    def get_paginated_response(self, data):
+        return Response(self.get_paginated_data(data))
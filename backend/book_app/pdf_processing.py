@@ -0,0 +1,172 @@
+import logging
+import os
+from datetime import timedelta
+from io import BytesIO
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+from .cache import bump_catalog_version
+from .models import Book
+
+logger = logging.getLogger(__name__)
+
+PREVIEW_WIDTH = 600
+
+
+class PDFProcessingError(Exception):
+    pass
+
+
+def check_structure(path):
+    """
+    Cheap sanity check before handing the file to a parser: a `%PDF-`
+    header near the start and an `%%EOF` marker near the end.
+    """
+    size = os.path.getsize(path)
+    with open(path, 'rb') as f:
+        head = f.read(1024)
+        f.seek(max(size - 1024, 0))
+        tail = f.read()
+    if b'%PDF-' not in head:
+        raise PDFProcessingError('Missing %PDF- header')
+    if b'%%EOF' not in tail:
+        raise PDFProcessingError('Missing %%EOF marker, the file looks truncated')
+    return size
+
+
+def extract_text(path):
+    """
+    Returns (page_count, text). Text is capped at PDF_TEXT_MAX_CHARS since
+    it is only used for search indexing.
+    """
+    from pypdf import PdfReader
+    from pypdf.errors import PdfReadError
+
+    max_chars = getattr(settings, 'PDF_TEXT_MAX_CHARS', 200000)
+    try:
+        reader = PdfReader(path)
+        page_count = len(reader.pages)
+        parts = []
+        length = 0
+        for page in reader.pages:
+            if length >= max_chars:
+                break
+            text = page.extract_text() or ''
+            parts.append(text)
+            length += len(text)
+    except PdfReadError as e:
+        raise PDFProcessingError(f'Unreadable PDF: {e}')
+    return page_count, '\n'.join(parts)[:max_chars]
+
+
+def render_preview(path):
+    """
+    Renders the first page to JPEG bytes, or returns None when the optional
+    pypdfium2 renderer is not installed.
+    """
+    try:
+        import pypdfium2 as pdfium
+    except ImportError:
+        logger.warning("pypdfium2 is not installed, skipping PDF preview")
+        return None
+
+    document = pdfium.PdfDocument(path)
+    try:
+        page = document[0]
+        scale = PREVIEW_WIDTH / page.get_width()
+        image = page.render(scale=scale).to_pil().convert('RGB')
+    finally:
+        document.close()
+    buffer = BytesIO()
+    image.save(buffer, 'JPEG', quality=80, optimize=True)
+    return buffer.getvalue()
+
+
+def discard_preview(name):
+    """
+    Deletes a replaced preview once the change commits. Previews are
+    rendered per book rather than stored as blobs, so gc_blobs never
+    collects them.
+    """
+    if name:
+        transaction.on_commit(lambda: default_storage.delete(name))
+
+
+def delete_book_preview(sender, instance, **kwargs):
+    """
+    post_delete handler for Book.
+    """
+    discard_preview(instance.pdf_preview.name)
+
+
+def process_book_pdf(book):
+    """
+    Fills in the PDF metadata for one book and marks it ready, or failed
+    with the reason in `pdf_error`.
+    """
+    old_preview = book.pdf_preview.name
+    try:
+        if not book.pdf_file:
+            raise PDFProcessingError('No PDF file uploaded')
+        path = book.pdf_file.path
+        book.pdf_file_size = check_structure(path)
+        book.pdf_page_count, book.pdf_text = extract_text(path)
+        preview = render_preview(path)
+        if preview:
+            book.pdf_preview.save(f'book_{book.pk}_preview.jpg', ContentFile(preview), save=False)
+        book.pdf_status = Book.PDF_READY
+        book.pdf_error = ''
+    except Exception as e:
+        logger.error("PDF processing failed for book ID %s: %s", book.pk, e)
+        book.pdf_status = Book.PDF_FAILED
+        book.pdf_error = str(e)
+    book.save(update_fields=[
+        'pdf_status', 'pdf_page_count', 'pdf_file_size', 'pdf_text', 'pdf_preview', 'pdf_error', 'updated_at',
+    ])
+    if old_preview != book.pdf_preview.name:
+        discard_preview(old_preview)
+    return book.pdf_status
+
+
+def claim_pending_books(batch_size):
+    """
+    Marks up to `batch_size` pending books as processing and returns them.
+    SKIP LOCKED keeps concurrent workers from claiming the same rows.
+    """
+    with transaction.atomic():
+        ids = list(
+            Book.objects.select_for_update(skip_locked=True)
+            .filter(pdf_status=Book.PDF_PENDING)
+            .order_by('created_at')
+            .values_list('pk', flat=True)[:batch_size]
+        )
+        Book.objects.filter(pk__in=ids).update(pdf_status=Book.PDF_PROCESSING, updated_at=timezone.now())
+    return list(Book.objects.filter(pk__in=ids))
+
+
+def requeue_books(stale_after=None):
+    """
+    Queues failed books again, together with books that have been
+    processing for longer than `stale_after` (PDF_PROCESSING_STALE_AFTER
+    seconds by default), i.e. claimed by a worker that crashed. Books a
+    live worker claimed more recently are left alone.
+    """
+    if stale_after is None:
+        stale_after = timedelta(seconds=getattr(settings, 'PDF_PROCESSING_STALE_AFTER', 3600))
+    now = timezone.now()
+    stale = Q(pdf_status=Book.PDF_PROCESSING, updated_at__lt=now - stale_after)
+    return Book.objects.filter(Q(pdf_status=Book.PDF_FAILED) | stale).update(
+        pdf_status=Book.PDF_PENDING, updated_at=now
+    )
+
+
+def process_pending_pdfs(batch_size=10):
+    books = claim_pending_books(batch_size)
+    for book in books:
+        process_book_pdf(book)
+    if books:
+        bump_catalog_version()
+    return len(books)
@@ -0,0 +1,76 @@
+from django.db.models import Case, Count, Exists, F, Max, OuterRef, Q, QuerySet, Value, When
+from django.utils import timezone
+from auth_app.models import CustomUser
+from .models import ReadingList, ReadingListBook
+
+PROGRESS_FIELDS = ('total_books', 'completed_books', 'last_activity_at')
+
+
+def change_progress(reading_list_id, total=0, completed=0):
+    """
+    Adjusts a list's counters in a single UPDATE with F() expressions, so
+    concurrent changes to the same list never overwrite each other. Call it
+    in the transaction that adds, removes or completes the entry.
+    """
+    now = timezone.now()
+    ReadingList.objects.filter(pk=reading_list_id).update(
+        total_books=F('total_books') + total,
+        completed_books=F('completed_books') + completed,
+        last_activity_at=now,
+        updated_at=now,
+    )
+
+
+def release_book_entries(sender, instance, origin=None, **kwargs):
+    """
+    pre_delete handler for Book: the cascade removes its reading-list
+    entries without going through the views, so take them off the counters
+    in one UPDATE. When a user is deleted, their own lists go with the same
+    cascade and are left alone.
+    """
+    lists = ReadingList.objects.filter(reading_list_books__book=instance)
+    if isinstance(origin, CustomUser):
+        lists = lists.exclude(user=origin)
+    elif isinstance(origin, QuerySet) and origin.model is CustomUser:
+        lists = lists.exclude(user__in=origin.values('pk'))
+    completed = ReadingListBook.objects.filter(reading_list=OuterRef('pk'), book=instance, is_completed=True)
+    lists.update(
+        total_books=F('total_books') - 1,
+        completed_books=F('completed_books') - Case(When(Exists(completed), then=Value(1)), default=Value(0)),
+        updated_at=timezone.now(),
+    )
+
+
+def repair_progress(queryset=None, batch_size=1000, dry_run=False):
+    """
+    Recounts every list's entries and corrects the lists whose stored
+    counters drifted, e.g. after bulk inserts that bypass the views.
+    `last_activity_at` only moves forward, to the newest entry change.
+    Returns the ids of the lists that were (or would be) corrected.
+    """
+    if queryset is None:
+        queryset = ReadingList.objects.all()
+    lists = queryset.order_by().only('pk', *PROGRESS_FIELDS).annotate(
+        entry_count=Count('reading_list_books'),
+        completed_count=Count('reading_list_books', filter=Q(reading_list_books__is_completed=True)),
+        latest_entry=Max('reading_list_books__updated_at'),
+    )
+    corrected = []
+    batch = []
+    for reading_list in lists.iterator(chunk_size=batch_size):
+        last_activity = reading_list.last_activity_at
+        if reading_list.latest_entry and (last_activity is None or last_activity < reading_list.latest_entry):
+            last_activity = reading_list.latest_entry
+        actual = (reading_list.entry_count, reading_list.completed_count, last_activity)
+        if actual == tuple(getattr(reading_list, field) for field in PROGRESS_FIELDS):
+            continue
+        reading_list.total_books, reading_list.completed_books, reading_list.last_activity_at = actual
+        corrected.append(reading_list.pk)
+        batch.append(reading_list)
+        if len(batch) >= batch_size:
+            if not dry_run:
+                ReadingList.objects.bulk_update(batch, PROGRESS_FIELDS)
+            batch = []
+    if batch and not dry_run:
+        ReadingList.objects.bulk_update(batch, PROGRESS_FIELDS)
+    return corrected
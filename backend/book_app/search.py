@@ -0,0 +1,88 @@
+import re
+from django.conf import settings
+from django.db import connection
+from django.db.models import Case, F, FloatField, Q, Value, When
+from django.utils.module_loading import import_string
+
+SEARCH_FIELDS = ('title', 'authors', 'genre', 'description')
+
+_engines = {}
+
+
+def tokenize(query):
+    return re.findall(r'\w+', query.lower())[:10]
+
+
+class BaseSearchEngine:
+    """
+    Filters a Book queryset down to the rows matching a free-text query.
+    Engines annotate every row with a `rank` and order best match first.
+    """
+    def search(self, queryset, query):
+        raise NotImplementedError
+
+
+class PostgresSearchEngine(BaseSearchEngine):
+    """
+    Full-text search against `Book.search_vector`, which is kept up to date
+    by a database trigger and backed by a GIN index. Every term is matched
+    as a prefix so results update while the user is still typing.
+    """
+    config = 'english'
+
+    def search(self, queryset, query):
+        from django.contrib.postgres.search import SearchQuery, SearchRank
+
+        terms = tokenize(query)
+        if not terms:
+            return queryset.none()
+        search_query = SearchQuery(
+            ' & '.join(f'{term}:*' for term in terms),
+            search_type='raw',
+            config=self.config,
+        )
+        return queryset.filter(search_vector=search_query).annotate(
+            rank=SearchRank(F('search_vector'), search_query)
+        ).order_by('-rank', '-created_at', '-id')
+
+
+class SimpleSearchEngine(BaseSearchEngine):
+    """
+    Portable fallback used on databases without full-text search (SQLite
+    test runs). Every term must appear in one of the search fields; rows
+    whose title matches rank higher.
+    """
+    def search(self, queryset, query):
+        terms = tokenize(query)
+        if not terms:
+            return queryset.none()
+        rank = Value(0.0)
+        for term in terms:
+            match = Q()
+            for field in SEARCH_FIELDS:
+                match |= Q(**{f'{field}__icontains': term})
+            queryset = queryset.filter(match)
+            rank = rank + Case(
+                When(title__icontains=term, then=Value(1.0)),
+                default=Value(0.0),
+                output_field=FloatField(),
+            )
+        return queryset.annotate(
+            rank=rank
+        ).order_by('-rank', '-created_at', '-id')
+
+
+def get_search_engine():
+    """
+    Returns the engine named by `settings.BOOK_SEARCH_ENGINE`, or picks one
+    based on the database vendor when the setting is not present.
+    """
+    path = getattr(settings, 'BOOK_SEARCH_ENGINE', None)
+    if not path:
+        if connection.vendor == 'postgresql':
+            path = 'book_app.search.PostgresSearchEngine'
+        else:
+            path = 'book_app.search.SimpleSearchEngine'
+    if path not in _engines:
+        _engines[path] = import_string(path)()
+    return _engines[path]
@@ -2,11 +2,18 @@ from rest_framework import serializers
 from .models import Book, ReadingList, ReadingListBook
 from rest_framework import serializers
 from django.core.validators import FileExtensionValidator
+from django.db import transaction
 from django.utils import timezone
 from datetime import date
 import re
 from .models import Book
 from PIL import Image
+from .cache import bump_catalog_version
+from .images import generate_cover_renditions, rendition_urls
+from .pdf_processing import discard_preview
+import logging
+
+logger = logging.getLogger(__name__)
 
 class BookSerializer(serializers.ModelSerializer):
     cover_image = serializers.ImageField(
@@ -17,15 +24,55 @@ class BookSerializer(serializers.ModelSerializer):
         required=True,
         validators=[FileExtensionValidator(allowed_extensions=['pdf'])]
     )
+    cover_renditions = serializers.SerializerMethodField()
     created_by = serializers.PrimaryKeyRelatedField(read_only=True)
 
     class Meta:
         model = Book
-        fields = ['id', 'title', 'authors', 'genre', 'publication_date', 'description', 'cover_image', 'pdf_file', 'created_by']
+        fields = [
+            'id', 'title', 'authors', 'genre', 'publication_date', 'description', 'cover_image', 'cover_renditions',
+            'pdf_file', 'pdf_status', 'pdf_page_count', 'pdf_file_size', 'pdf_preview', 'created_by',
+        ]
+        read_only_fields = ['pdf_status', 'pdf_page_count', 'pdf_file_size', 'pdf_preview']
+
+    def __init__(self, *args, fields=None, **kwargs):
+        # `fields` limits the output to a sparse fieldset (reads only)
+        super().__init__(*args, **kwargs)
+        if fields is not None:
+            for name in set(self.fields) - set(fields):
+                self.fields.pop(name)
 
     def create(self, validated_data):
         validated_data['created_by'] = self.context['request'].user
-        return super().create(validated_data)
+        book = super().create(validated_data)
+        if book.cover_image:
+            self.process_cover(book)
+        transaction.on_commit(bump_catalog_version)
+        return book
+
+    def update(self, instance, validated_data):
+        if 'pdf_file' in validated_data:
+            # A new file goes back through `manage.py process_pdfs`
+            discard_preview(instance.pdf_preview.name)
+            validated_data.update(
+                pdf_status=Book.PDF_PENDING, pdf_page_count=None, pdf_file_size=None,
+                pdf_text='', pdf_preview=None, pdf_error='',
+            )
+        book = super().update(instance, validated_data)
+        if 'cover_image' in validated_data:
+            self.process_cover(book)
+        transaction.on_commit(bump_catalog_version)
+        return book
+
+    def process_cover(self, book):
+        try:
+            generate_cover_renditions(book)
+        except Exception as e:
+            # The original cover is still served; backfill_cover_renditions can retry
+            logger.error("Cover renditions failed for book ID %s: %s", book.pk, e)
+
+    def get_cover_renditions(self, obj):
+        return rendition_urls(obj.cover_renditions, self.context.get('request'))
 
     def validate_title(self, value):
         if len(value.strip()) < 2:
@@ -100,4 +147,9 @@ class ReadingListSerializer(serializers.ModelSerializer):
 
     def create(self, validated_data):
         validated_data['user'] = self.context['request'].user
-        return super().create(validated_data)
\ No newline at end of file
+        return super().create(validated_data)
+
+class ReadingListSummarySerializer(serializers.ModelSerializer):
+    class Meta:
+        model = ReadingList
+        fields = ['id', 'name', 'total_books', 'completed_books', 'last_activity_at', 'created_at']
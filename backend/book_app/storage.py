@@ -0,0 +1,87 @@
+import hashlib
+import os
+import re
+import uuid
+from django.core.files.move import file_move_safe
+from django.core.files.storage import FileSystemStorage
+from django.utils.functional import SimpleLazyObject
+
+TMP_DIR = '.cas-tmp'
+
+BLOB_NAME_RE = re.compile(r'^[\w-]+/[0-9a-f]{2}/[0-9a-f]{2}/[0-9a-f]{64}(\.\w+)?$')
+
+
+def is_blob_name(name):
+    return bool(name) and bool(BLOB_NAME_RE.match(name))
+
+
+class ContentAddressedStorage(FileSystemStorage):
+    """
+    Stores every file under the SHA-256 of its content:
+    `<upload_to>/ab/cd/abcd...<ext>`. Identical uploads share one file on
+    disk. The hash is computed while the upload is streamed to a temporary
+    file, which is then renamed into place or dropped if the blob exists.
+
+    Files are never deleted through the storage. Book signals count the
+    references to each blob (StoredBlob) and `manage.py gc_blobs` removes
+    the unreferenced ones.
+    """
+    def get_available_name(self, name, max_length=None):
+        # The final name is derived from the content in _save
+        return name
+
+    def blob_name(self, name, digest):
+        directory = os.path.dirname(name) or 'blobs'
+        extension = os.path.splitext(name)[1].lower()
+        return f'{directory}/{digest[:2]}/{digest[2:4]}/{digest}{extension}'
+
+    def tmp_path(self):
+        directory = self.path(TMP_DIR)
+        os.makedirs(directory, exist_ok=True)
+        return os.path.join(directory, uuid.uuid4().hex)
+
+    def _save(self, name, content):
+        tmp_path = self.tmp_path()
+        digest = hashlib.sha256()
+        try:
+            if hasattr(content, 'temporary_file_path'):
+                # Already on disk: hash it in place, then move instead of copy
+                with open(content.temporary_file_path(), 'rb') as f:
+                    for block in iter(lambda: f.read(64 * 1024), b''):
+                        digest.update(block)
+                file_move_safe(content.temporary_file_path(), tmp_path)
+            else:
+                with open(tmp_path, 'wb') as f:
+                    for chunk in content.chunks():
+                        digest.update(chunk)
+                        f.write(chunk)
+
+            name = self.blob_name(name, digest.hexdigest())
+            full_path = self.path(name)
+            if os.path.exists(full_path):
+                # Duplicate content: keep the existing blob and mark it as
+                # recently used so gc_blobs leaves it alone.
+                os.utime(full_path)
+            else:
+                os.makedirs(os.path.dirname(full_path), exist_ok=True)
+                os.replace(tmp_path, full_path)
+                if self.file_permissions_mode is not None:
+                    os.chmod(full_path, self.file_permissions_mode)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+        return name
+
+    def delete(self, name):
+        # Shared blobs are only removed by gc_blobs once unreferenced
+        pass
+
+    def purge(self, name):
+        super().delete(name)
+
+
+_book_file_storage = SimpleLazyObject(ContentAddressedStorage)
+
+
+def get_book_file_storage():
+    return _book_file_storage
@@ -0,0 +1,147 @@
+import os
+import re
+from urllib.parse import quote
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.http import FileResponse, HttpResponse, StreamingHttpResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+
+CHUNK_SIZE = 64 * 1024
+
+RANGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+
+def file_etag(stat):
+    return quote_etag(f'{stat.st_mtime_ns:x}-{stat.st_size:x}')
+
+
+def parse_range(header, size):
+    """
+    Parses a single `bytes=` range into an inclusive (start, end) pair.
+    Returns None when the header should be ignored (absent, malformed or
+    multiple ranges) and raises ValueError when it cannot be satisfied.
+    """
+    match = RANGE_RE.match(header.strip()) if header else None
+    if not match:
+        return None
+    first, last = match.groups()
+    if not first and not last:
+        return None
+    if not first:
+        # Suffix range: the final N bytes
+        length = int(last)
+        if length == 0:
+            raise ValueError('Empty suffix range')
+        return max(size - length, 0), size - 1
+    start = int(first)
+    end = min(int(last), size - 1) if last else size - 1
+    if start >= size or start > end:
+        raise ValueError('Range not satisfiable')
+    return start, end
+
+
+def iter_file_range(path, start, length, chunk_size=CHUNK_SIZE):
+    with open(path, 'rb') as f:
+        f.seek(start)
+        remaining = length
+        while remaining > 0:
+            data = f.read(min(chunk_size, remaining))
+            if not data:
+                break
+            remaining -= len(data)
+            yield data
+
+
+async def aiter_file_range(path, start, length, chunk_size=CHUNK_SIZE):
+    """
+    `iter_file_range` for async responses. Each read borrows a pool thread
+    only for the read itself, so a slow client holds no thread while it
+    drains the socket.
+    """
+    f = await sync_to_async(open, thread_sensitive=False)(path, 'rb')
+    try:
+        await sync_to_async(f.seek, thread_sensitive=False)(start)
+        remaining = length
+        while remaining > 0:
+            data = await sync_to_async(f.read, thread_sensitive=False)(min(chunk_size, remaining))
+            if not data:
+                break
+            remaining -= len(data)
+            yield data
+    finally:
+        f.close()
+
+
+def sendfile_response(path, name, content_type):
+    """
+    Hands the transfer off to the front proxy. `x-accel-redirect` (nginx)
+    needs an internal location that maps PDF_SENDFILE_URL_PREFIX onto
+    MEDIA_ROOT; `x-sendfile` (Apache, lighttpd) takes the absolute path.
+    """
+    response = HttpResponse(content_type=content_type)
+    mode = settings.PDF_SENDFILE_MODE
+    if mode == 'x-accel-redirect':
+        prefix = getattr(settings, 'PDF_SENDFILE_URL_PREFIX', '/protected-media/')
+        response['X-Accel-Redirect'] = prefix.rstrip('/') + '/' + quote(name.lstrip('/'))
+    elif mode == 'x-sendfile':
+        response['X-Sendfile'] = path
+    else:
+        raise ValueError(f'Unknown PDF_SENDFILE_MODE: {mode}')
+    return response
+
+
+def serve_file(request, field_file, content_type, filename, asynchronous=False, stat=None):
+    """
+    Streams a stored file without reading it into memory. Supports
+    conditional requests (ETag / Last-Modified -> 304) and single byte
+    ranges (206) so viewers can fetch pages lazily. `asynchronous` streams
+    the body from an async iterator, for async views under ASGI; those
+    pass in the file's `stat` so no blocking call runs on the event loop.
+    """
+    path = field_file.path
+    if stat is None:
+        stat = os.stat(path)
+    etag = file_etag(stat)
+    last_modified = int(stat.st_mtime)
+
+    response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    if response is not None:
+        return response
+
+    if getattr(settings, 'PDF_SENDFILE_MODE', None):
+        response = sendfile_response(path, field_file.name, content_type)
+    else:
+        byte_range = None
+        if_range = request.META.get('HTTP_IF_RANGE')
+        if not if_range or if_range == etag:
+            try:
+                byte_range = parse_range(request.META.get('HTTP_RANGE'), stat.st_size)
+            except ValueError:
+                response = HttpResponse(status=416)
+                response['Content-Range'] = f'bytes */{stat.st_size}'
+                return response
+
+        iter_range = aiter_file_range if asynchronous else iter_file_range
+        if byte_range:
+            start, end = byte_range
+            length = end - start + 1
+            response = StreamingHttpResponse(
+                iter_range(path, start, length),
+                status=206,
+                content_type=content_type,
+            )
+            response['Content-Range'] = f'bytes {start}-{end}/{stat.st_size}'
+            response['Content-Length'] = str(length)
+        elif asynchronous:
+            response = StreamingHttpResponse(iter_range(path, 0, stat.st_size), content_type=content_type)
+            response['Content-Length'] = str(stat.st_size)
+        else:
+            response = FileResponse(open(path, 'rb'), content_type=content_type)
+
+    response['Content-Disposition'] = f'inline; filename="{filename}"'
+    response['Accept-Ranges'] = 'bytes'
+    response['ETag'] = etag
+    response['Last-Modified'] = http_date(last_modified)
+    response['Cache-Control'] = 'private, max-age=0, must-revalidate'
+    return response
@@ -1,3 +1,911 @@
-from django.test import TestCase
+import base64
+import gzip
+import hashlib
+import io
+import json
+import shutil
+import tempfile
+import zipfile
+from datetime import date, timedelta
+from urllib.parse import parse_qs, urlsplit
+from asgiref.sync import sync_to_async
+from django.core.cache import caches
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import connection, models
+from django.test import AsyncRequestFactory, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from PIL import Image
+from pypdf import PdfWriter
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient, APIRequestFactory
+from rest_framework_simplejwt.tokens import RefreshToken
+from auth_app.models import CustomUser
+from backend.metrics import registry
+from backend.renderers import FastJSONRenderer
+from .async_views import AsyncBookDetailView, AsyncBookListView, AsyncBookPDFView
+from .blobs import collect_garbage
+from .cache import bump_catalog_version, get_cache_stats
+from .fast_serializers import FastBookSerializer
+from .images import RENDITIONS, generate_cover_renditions, render_cover
+from .models import Book, ReadingList, ReadingListBook, StoredBlob
+from .ordering import ORDER_GAP
+from .pdf_processing import process_pending_pdfs, requeue_books
+from .progress import repair_progress
+from .search import SimpleSearchEngine
+from .serializers import BookSerializer
+from .streaming import parse_range, sendfile_response
 
-# Create your tests here.
+# Queries each endpoint may issue, independent of how many reading lists
+# and books the user has. Savepoints opened inside the test transaction
+# are counted too.
+QUERY_BUDGETS = {
+    'reading_list': 3,
+    'reading_list_detail': 3,
+    'reading_list_add_book': 8,
+    'reading_list_summary': 1,
+    'reading_list_reorder_books': 6,
+}
+
+
+class QueryBudgetMixin:
+    """
+    Asserts that a request stays within a fixed number of database queries.
+    """
+    def assertQueryBudget(self, budget, method, url, **kwargs):
+        with CaptureQueriesContext(connection) as context:
+            response = getattr(self.client, method)(url, **kwargs)
+        queries = '\n'.join(query['sql'] for query in context.captured_queries)
+        self.assertLessEqual(
+            len(context.captured_queries), budget,
+            f"{method.upper()} {url} ran {len(context.captured_queries)} queries, budget is {budget}:\n{queries}"
+        )
+        return response
+
+
+class MediaRootMixin:
+    """
+    Stores uploaded files in a temporary MEDIA_ROOT that is removed after
+    each test.
+    """
+    def setUp(self):
+        super().setUp()
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root, ignore_errors=True)
+        override = override_settings(MEDIA_ROOT=self.media_root)
+        override.enable()
+        self.addCleanup(override.disable)
+
+
+class BookTestCase(TestCase):
+    def setUp(self):
+        # Cached responses and the catalog version outlive the test
+        # transaction, and create_books() does not bump the version
+        caches['books'].clear()
+        self.user = CustomUser.objects.create_user(
+            email='reader@example.com', username='reader1', password='Password1'
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def create_book(self, title='Book', pdf=None, **fields):
+        if pdf is not None:
+            fields['pdf_file'] = SimpleUploadedFile(f'{title}.pdf', pdf)
+        return Book.objects.create(
+            title=title, authors='Author', genre='Fiction', publication_date=date(2020, 1, 1),
+            created_by=self.user, **fields,
+        )
+
+    def create_books(self, count):
+        return Book.objects.bulk_create([
+            Book(
+                title=f'Book {index}',
+                authors='Some Author',
+                genre='Fiction',
+                publication_date=date(2020, 1, 1),
+                created_by=self.user,
+            )
+            for index in range(count)
+        ])
+
+
+class ReadingListTestCase(BookTestCase):
+    def create_reading_lists(self, lists, books_per_list):
+        books = self.create_books(books_per_list)
+        reading_lists = []
+        for index in range(lists):
+            reading_list = ReadingList.objects.create(name=f'List {index}', user=self.user, total_books=len(books))
+            ReadingListBook.objects.bulk_create([
+                ReadingListBook(reading_list=reading_list, book=book, order=position + 1)
+                for position, book in enumerate(books)
+            ])
+            reading_lists.append(reading_list)
+        return reading_lists
+
+
+class ReadingListQueryBudgetTests(QueryBudgetMixin, ReadingListTestCase):
+    def test_reading_list_budget_is_constant(self):
+        for lists, books_per_list in ((1, 1), (5, 20)):
+            with self.subTest(lists=lists, books_per_list=books_per_list):
+                ReadingList.objects.all().delete()
+                self.create_reading_lists(lists, books_per_list)
+                response = self.assertQueryBudget(
+                    QUERY_BUDGETS['reading_list'], 'get', reverse('reading_list')
+                )
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(len(response.data['results']), lists)
+                self.assertEqual(len(response.data['results'][0]['reading_list_books']), books_per_list)
+
+    def test_reading_list_detail_budget_is_constant(self):
+        reading_list = self.create_reading_lists(1, 30)[0]
+        response = self.assertQueryBudget(
+            QUERY_BUDGETS['reading_list_detail'], 'put',
+            reverse('reading_list_detail', args=[reading_list.pk]),
+            data={'name': 'Renamed'}, format='json',
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data['reading_list_books']), 30)
+
+    def test_add_book_budget_is_constant(self):
+        reading_list = self.create_reading_lists(1, 30)[0]
+        book = self.create_books(1)[0]
+        response = self.assertQueryBudget(
+            QUERY_BUDGETS['reading_list_add_book'], 'post',
+            reverse('reading_list_add_book', args=[reading_list.pk]),
+            data={'book_id': book.pk}, format='json',
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data['reading_list_books']), 31)
+
+    def test_reorder_budget_is_constant(self):
+        reading_list = self.create_reading_lists(1, 50)[0]
+        book_ids = list(
+            reading_list.reading_list_books.order_by('order').values_list('book_id', flat=True)
+        )
+        book_ids[0], book_ids[-1] = book_ids[-1], book_ids[0]
+        response = self.assertQueryBudget(
+            QUERY_BUDGETS['reading_list_reorder_books'], 'post',
+            reverse('reading_list_reorder_books', args=[reading_list.pk]),
+            data={'book_orders': [
+                {'book_id': book_id, 'order': index + 1} for index, book_id in enumerate(book_ids)
+            ]},
+            format='json',
+        )
+        self.assertEqual(response.status_code, 200)
+        ordered = sorted(response.data['reading_list_books'], key=lambda item: item['order'])
+        self.assertEqual([item['book']['id'] for item in ordered], book_ids)
+
+
+
+class ReadingListProgressTests(QueryBudgetMixin, ReadingListTestCase):
+    def assertProgress(self, reading_list, total, completed):
+        reading_list.refresh_from_db()
+        self.assertEqual((reading_list.total_books, reading_list.completed_books), (total, completed))
+
+    def test_views_keep_the_counters_in_step(self):
+        reading_list = self.create_reading_lists(1, 2)[0]
+        book = self.create_books(1)[0]
+        self.client.post(reverse('reading_list_add_book', args=[reading_list.pk]), {'book_id': book.pk}, format='json')
+        self.assertProgress(reading_list, 3, 0)
+        self.assertIsNotNone(reading_list.last_activity_at)
+
+        url = reverse('reading_list_mark_completed', args=[reading_list.pk, book.pk])
+        self.client.post(url)
+        self.client.post(url)
+        self.assertProgress(reading_list, 3, 1)
+
+        self.client.delete(reverse('reading_list_remove_book', args=[reading_list.pk, book.pk]))
+        self.assertProgress(reading_list, 2, 0)
+
+    def test_deleting_a_book_releases_its_entries(self):
+        reading_list = self.create_reading_lists(1, 3)[0]
+        book = reading_list.reading_list_books.first().book
+        self.client.post(reverse('reading_list_mark_completed', args=[reading_list.pk, book.pk]))
+        self.client.delete(reverse('book_detail', args=[book.pk]))
+        self.assertProgress(reading_list, 2, 0)
+
+    def test_deleting_a_user_only_adjusts_other_users_lists(self):
+        other = CustomUser.objects.create_user(email='other@example.com', username='other1', password='Password1')
+        own = self.create_reading_lists(1, 2)[0]
+        theirs = ReadingList.objects.create(name='Theirs', user=other, total_books=2, completed_books=1)
+        ReadingListBook.objects.bulk_create([
+            ReadingListBook(reading_list=theirs, book=own.reading_list_books.get(order=1).book, order=1, is_completed=True),
+            ReadingListBook(reading_list=theirs, book=self.create_books(1)[0], order=2),
+        ])
+        self.user.delete()
+        self.assertFalse(ReadingList.objects.filter(pk=own.pk).exists())
+        self.assertProgress(theirs, 0, 0)
+
+    def test_summary_is_a_single_query(self):
+        self.create_reading_lists(3, 10)
+        response = self.assertQueryBudget(QUERY_BUDGETS['reading_list_summary'], 'get', reverse('reading_list_summary'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            set(response.data['results'][0]), {'id', 'name', 'total_books', 'completed_books', 'last_activity_at', 'created_at'}
+        )
+        self.assertEqual([item['total_books'] for item in response.data['results']], [10, 10, 10])
+
+    def test_repair_corrects_drifted_counters(self):
+        reading_list = self.create_reading_lists(1, 4)[0]
+        reading_list.reading_list_books.filter(order=1).update(is_completed=True)
+        ReadingList.objects.update(total_books=0)
+        self.assertEqual(repair_progress(dry_run=True), [reading_list.pk])
+        self.assertProgress(reading_list, 0, 0)
+        self.assertEqual(repair_progress(), [reading_list.pk])
+        self.assertProgress(reading_list, 4, 1)
+        self.assertEqual(repair_progress(), [])
+
+
+class ReadingListReorderTests(ReadingListTestCase):
+    def setUp(self):
+        super().setUp()
+        self.reading_list = self.create_reading_lists(1, 5)[0]
+        self.url = reverse('reading_list_reorder_books', args=[self.reading_list.pk])
+
+    def book_ids(self):
+        return list(
+            self.reading_list.reading_list_books.order_by('order').values_list('book_id', flat=True)
+        )
+
+    def test_single_move_updates_one_row(self):
+        ReadingListBook.objects.filter(reading_list=self.reading_list).update(order=models.F('order') * ORDER_GAP)
+        book_ids = self.book_ids()
+        before = dict(self.reading_list.reading_list_books.values_list('book_id', 'order'))
+
+        response = self.client.post(
+            self.url, {'book_id': book_ids[4], 'after_book_id': book_ids[0]}, format='json'
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.book_ids(), [book_ids[0], book_ids[4], book_ids[1], book_ids[2], book_ids[3]])
+        after = dict(self.reading_list.reading_list_books.values_list('book_id', 'order'))
+        self.assertEqual([book_id for book_id in before if before[book_id] != after[book_id]], [book_ids[4]])
+
+    def test_tight_ranks_are_rebalanced(self):
+        book_ids = self.book_ids()
+        response = self.client.post(self.url, {'book_id': book_ids[2]}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.book_ids(), [book_ids[2], book_ids[0], book_ids[1], book_ids[3], book_ids[4]])
+
+    def test_incomplete_permutation_is_rejected(self):
+        book_ids = self.book_ids()
+        response = self.client.post(self.url, {'book_orders': [
+            {'book_id': book_id, 'order': index + 1} for index, book_id in enumerate(book_ids[:-1])
+        ]}, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(self.book_ids(), book_ids)
+
+
+class ChunkedUploadTests(MediaRootMixin, BookTestCase):
+    def setUp(self):
+        super().setUp()
+        override = override_settings(CHUNKED_UPLOAD_DIR=f'{self.media_root}/uploads')
+        override.enable()
+        self.addCleanup(override.disable)
+        self.content = b'%PDF-1.4\n' + b'x' * 100000 + b'\n%%EOF\n'
+        self.chunk_size = 64 * 1024
+
+    def put_chunk(self, upload_id, index, checksum=None, data=None):
+        chunk = self.content[index * self.chunk_size:(index + 1) * self.chunk_size]
+        return self.client.put(
+            reverse('book_upload_chunk', args=[upload_id, index]),
+            data=chunk if data is None else data,
+            content_type='application/octet-stream',
+            HTTP_X_CHUNK_SHA256=checksum or hashlib.sha256(chunk).hexdigest(),
+        )
+
+    def test_resumed_upload_is_finalized_into_a_book(self):
+        response = self.client.post(reverse('book_upload'), {
+            'filename': 'novel.pdf', 'total_size': len(self.content), 'chunk_size': self.chunk_size,
+        }, format='json')
+        self.assertEqual(response.status_code, 201)
+        upload_id = response.data['id']
+        self.assertEqual(response.data['total_chunks'], 2)
+
+        self.assertEqual(self.put_chunk(upload_id, 1, checksum='0' * 64).status_code, 400)
+        self.assertEqual(self.put_chunk(upload_id, 0).status_code, 200)
+        status = self.client.get(reverse('book_upload_detail', args=[upload_id]))
+        self.assertEqual(status.data['received_chunks'], [0])
+
+        incomplete = self.client.post(reverse('book_upload_complete', args=[upload_id]), {}, format='json')
+        self.assertEqual(incomplete.status_code, 400)
+
+        self.assertEqual(self.put_chunk(upload_id, 1).status_code, 200)
+        response = self.client.post(reverse('book_upload_complete', args=[upload_id]), {
+            'title': 'A Novel', 'authors': 'Some Author', 'genre': 'Fiction', 'publication_date': '2020-01-01',
+        }, format='json')
+        self.assertEqual(response.status_code, 201)
+        book = Book.objects.get(pk=response.data['id'])
+        with book.pdf_file.open('rb') as f:
+            self.assertEqual(f.read(), self.content)
+
+    def test_bad_resend_of_an_accepted_chunk_must_be_sent_again(self):
+        upload_id = self.client.post(reverse('book_upload'), {
+            'filename': 'novel.pdf', 'total_size': len(self.content), 'chunk_size': self.chunk_size,
+        }, format='json').data['id']
+        self.assertEqual(self.put_chunk(upload_id, 0).status_code, 200)
+        self.assertEqual(self.put_chunk(upload_id, 1).status_code, 200)
+
+        self.assertEqual(self.put_chunk(upload_id, 0, data=b'z' * self.chunk_size).status_code, 400)
+        status = self.client.get(reverse('book_upload_detail', args=[upload_id]))
+        self.assertEqual(status.data['received_chunks'], [1])
+        metadata = {'title': 'A Novel', 'authors': 'Some Author', 'genre': 'Fiction', 'publication_date': '2020-01-01'}
+        complete = reverse('book_upload_complete', args=[upload_id])
+        self.assertEqual(self.client.post(complete, metadata, format='json').status_code, 400)
+
+        self.assertEqual(self.put_chunk(upload_id, 0).status_code, 200)
+        response = self.client.post(complete, metadata, format='json')
+        self.assertEqual(response.status_code, 201)
+        with Book.objects.get(pk=response.data['id']).pdf_file.open('rb') as f:
+            self.assertEqual(f.read(), self.content)
+
+
+class CoverRenditionTests(MediaRootMixin, BookTestCase):
+    def cover_file(self, size=(400, 600), mode='RGBA'):
+        buffer = io.BytesIO()
+        Image.new(mode, size, (200, 40, 40, 128)[:len(mode)]).save(buffer, 'PNG')
+        return SimpleUploadedFile('cover.png', buffer.getvalue(), content_type='image/png')
+
+    def create_covered_book(self, title, **kwargs):
+        return self.create_book(title, cover_image=self.cover_file(**kwargs))
+
+    def rendition_names(self, renditions):
+        return [name for formats in renditions.values() for name in formats.values()]
+
+    def test_every_rendition_fits_its_box_in_both_formats(self):
+        book = self.create_covered_book('Covered')
+        renditions = render_cover(book.cover_image.name, book.cover_image.storage)
+        self.assertEqual(set(renditions), set(RENDITIONS))
+        for rendition, (width, height) in RENDITIONS.items():
+            self.assertEqual(set(renditions[rendition]), {'webp', 'jpeg'})
+            with default_storage.open(renditions[rendition]['jpeg']) as f:
+                image = Image.open(f)
+                self.assertEqual(image.mode, 'RGB')
+                self.assertLessEqual(image.width, width)
+                self.assertLessEqual(image.height, height)
+
+    def test_small_covers_are_not_enlarged(self):
+        book = self.create_covered_book('Tiny', size=(50, 80), mode='RGB')
+        renditions = render_cover(book.cover_image.name, book.cover_image.storage)
+        with default_storage.open(renditions['full']['webp']) as f:
+            self.assertEqual(Image.open(f).size, (50, 80))
+
+    def test_regenerating_and_deleting_remove_old_renditions(self):
+        book = self.create_covered_book('Covered')
+        first = self.rendition_names(generate_cover_renditions(book))
+        second = self.rendition_names(generate_cover_renditions(book))
+        self.assertFalse(any(default_storage.exists(name) for name in first if name not in second))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            book.delete()
+        self.assertFalse(any(default_storage.exists(name) for name in second))
+
+    def test_backfill_renders_missing_renditions(self):
+        books = [self.create_covered_book('First'), self.create_covered_book('Second')]
+        out = io.StringIO()
+        call_command('backfill_cover_renditions', workers=1, stdout=out)
+        self.assertIn('Generated renditions for 2 books, 0 failed.', out.getvalue())
+        for book in books:
+            book.refresh_from_db()
+            self.assertTrue(all(default_storage.exists(name) for name in self.rendition_names(book.cover_renditions)))
+
+        out = io.StringIO()
+        call_command('backfill_cover_renditions', workers=1, stdout=out)
+        self.assertIn('No covers need renditions.', out.getvalue())
+
+
+class PDFProcessingTests(MediaRootMixin, BookTestCase):
+    def valid_pdf(self, pages=2):
+        writer = PdfWriter()
+        for _ in range(pages):
+            writer.add_blank_page(width=200, height=300)
+        buffer = io.BytesIO()
+        writer.write(buffer)
+        return buffer.getvalue()
+
+    def test_pending_books_are_processed(self):
+        content = self.valid_pdf(pages=2)
+        ready = self.create_book('Ready', pdf=content)
+        headless = self.create_book('Headless', pdf=b'not a pdf\n%%EOF\n')
+        truncated = self.create_book('Truncated', pdf=b'%PDF-1.4\n' + b'x' * 2000)
+
+        self.assertEqual(process_pending_pdfs(batch_size=10), 3)
+        for book in (ready, headless, truncated):
+            book.refresh_from_db()
+        self.assertEqual(
+            (ready.pdf_status, ready.pdf_page_count, ready.pdf_file_size), (Book.PDF_READY, 2, len(content))
+        )
+        self.assertEqual(headless.pdf_status, Book.PDF_FAILED)
+        self.assertIn('%PDF- header', headless.pdf_error)
+        self.assertIn('truncated', truncated.pdf_error)
+        self.assertEqual(process_pending_pdfs(batch_size=10), 0)
+
+    def test_retry_only_requeues_abandoned_processing_books(self):
+        content = self.valid_pdf()
+        failed, abandoned, active = (self.create_book(title, pdf=content) for title in ('Failed', 'Abandoned', 'Active'))
+        Book.objects.filter(pk=failed.pk).update(pdf_status=Book.PDF_FAILED)
+        Book.objects.filter(pk__in=[abandoned.pk, active.pk]).update(pdf_status=Book.PDF_PROCESSING)
+        Book.objects.filter(pk=abandoned.pk).update(updated_at=timezone.now() - timedelta(hours=2))
+
+        self.assertEqual(requeue_books(timedelta(hours=1)), 2)
+        statuses = dict(Book.objects.values_list('title', 'pdf_status'))
+        self.assertEqual(statuses, {'Failed': Book.PDF_PENDING, 'Abandoned': Book.PDF_PENDING, 'Active': Book.PDF_PROCESSING})
+
+    def test_replaced_and_deleted_previews_are_removed(self):
+        book = self.create_book('Previewed', pdf=self.valid_pdf())
+        with self.captureOnCommitCallbacks(execute=True):
+            process_pending_pdfs()
+            Book.objects.filter(pk=book.pk).update(pdf_status=Book.PDF_PENDING)
+            process_pending_pdfs()
+        book.refresh_from_db()
+        self.assertEqual(len(default_storage.listdir('book_previews')[1]), 1)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.put(
+                reverse('book_detail', args=[book.pk]),
+                {'pdf_file': SimpleUploadedFile('new.pdf', self.valid_pdf(pages=3))}, format='multipart',
+            )
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(default_storage.exists(book.pdf_preview.name))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            process_pending_pdfs()
+        book.refresh_from_db()
+        self.assertTrue(default_storage.exists(book.pdf_preview.name))
+        with self.captureOnCommitCallbacks(execute=True):
+            book.delete()
+        self.assertEqual(default_storage.listdir('book_previews')[1], [])
+
+
+class ContentAddressedStorageTests(MediaRootMixin, BookTestCase):
+    def setUp(self):
+        super().setUp()
+        self.content = b'%PDF-1.4\n' + b'y' * 5000 + b'\n%%EOF\n'
+
+    def test_identical_pdfs_share_one_blob(self):
+        first = self.create_book('First', pdf=self.content)
+        second = self.create_book('Second', pdf=self.content)
+        digest = hashlib.sha256(self.content).hexdigest()
+        self.assertEqual(first.pdf_file.name, f'book_pdfs/{digest[:2]}/{digest[2:4]}/{digest}.pdf')
+        self.assertEqual(second.pdf_file.name, first.pdf_file.name)
+        self.assertEqual(StoredBlob.objects.get(name=first.pdf_file.name).ref_count, 2)
+
+        first.delete()
+        self.assertEqual(StoredBlob.objects.get(name=second.pdf_file.name).ref_count, 1)
+        self.assertEqual(collect_garbage(timedelta(0)), [])
+        self.assertTrue(second.pdf_file.storage.exists(second.pdf_file.name))
+
+    def test_unreferenced_blob_is_collected(self):
+        book = self.create_book('Only', pdf=self.content)
+        name = book.pdf_file.name
+        book.pdf_file = SimpleUploadedFile('other.pdf', b'%PDF-1.4\nother\n%%EOF\n')
+        book.save()
+        self.assertEqual(StoredBlob.objects.get(name=name).ref_count, 0)
+
+        self.assertEqual(collect_garbage(timedelta(hours=1)), [])
+        self.assertEqual(collect_garbage(timedelta(0)), [name])
+        self.assertFalse(book.pdf_file.storage.exists(name))
+        self.assertTrue(book.pdf_file.storage.exists(book.pdf_file.name))
+
+
+class BulkImportExportTests(MediaRootMixin, BookTestCase):
+    def setUp(self):
+        super().setUp()
+        self.user.is_staff = True
+        self.user.save(update_fields=['is_staff'])
+
+    def post_import(self, content, name):
+        metadata = io.BytesIO(content)
+        metadata.name = name
+        return self.client.post(reverse('book_import'), {'file': metadata})
+
+    def archive(self):
+        buffer = io.BytesIO()
+        with zipfile.ZipFile(buffer, 'w') as archive:
+            archive.writestr('pdfs/one.pdf', b'%PDF-1.4\none\n%%EOF\n')
+        buffer.seek(0)
+        buffer.name = 'files.zip'
+        return buffer
+
+    def test_csv_import_reports_row_errors_and_exports_jsonl(self):
+        metadata = io.BytesIO(
+            b'title,authors,genre,publication_date,description,pdf_file\n'
+            b'First Book,Some Author,Fiction,2020-01-01,,pdfs/one.pdf\n'
+            b'Second Book,Some Author,Fiction,2020-02-01,Same file,pdfs/one.pdf\n'
+            b'X,Some Author,Fiction,2020-01-01,,pdfs/missing.pdf\n'
+        )
+        metadata.name = 'books.csv'
+        response = self.client.post(reverse('book_import'), {'file': metadata, 'archive': self.archive()})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['created'], 2)
+        self.assertEqual([error['row'] for error in response.data['errors']], [3])
+        self.assertIn('title', response.data['errors'][0]['errors'])
+        self.assertIn('pdf_file', response.data['errors'][0]['errors'])
+
+        books = Book.objects.filter(created_by=self.user)
+        self.assertEqual(books.count(), 2)
+        pdf_name = books.first().pdf_file.name
+        self.assertEqual(StoredBlob.objects.get(name=pdf_name).ref_count, 2)
+
+        response = self.client.get(reverse('book_export'), {'mine': 'true'})
+        lines = [json.loads(line) for line in b''.join(response.streaming_content).splitlines()]
+        self.assertEqual([line['title'] for line in lines], ['First Book', 'Second Book'])
+        self.assertEqual(lines[0]['pdf_file'], pdf_name)
+
+    @override_settings(BOOK_IMPORT_MAX_ROWS=2)
+    def test_bad_and_oversized_files_are_rejected(self):
+        header = b'title,authors,genre,publication_date\n'
+        row = b'Some Book,Some Author,Fiction,2020-01-01\n'
+        for content, name, message in (
+            (header + row * 3, 'books.csv', 'At most 2 rows'),
+            (header + b'Caf\xe9,Some Author,Fiction,2020-01-01\n', 'books.csv', 'not UTF-8'),
+            (b'[{"title": "Some Book"}]', 'books.json', 'JSON arrays are not supported'),
+        ):
+            with self.subTest(name=name, message=message):
+                response = self.post_import(content, name)
+                self.assertEqual(response.status_code, 400)
+                self.assertIn(message, response.data['detail'])
+        self.assertFalse(Book.objects.exists())
+
+        self.assertEqual(self.post_import(header + row * 2, 'books.csv').data['created'], 2)
+        self.user.is_staff = False
+        self.user.save(update_fields=['is_staff'])
+        self.assertEqual(self.post_import(header + row, 'books.csv').status_code, 403)
+
+
+class BookResponseCacheTests(QueryBudgetMixin, BookTestCase):
+    def titles(self):
+        return [book['title'] for book in self.client.get(reverse('book_list')).json()['results']]
+
+    @override_settings(BOOK_CACHE_SHARED=True)
+    def test_responses_are_cached_until_the_catalog_version_changes(self):
+        books = self.create_books(2)
+        self.assertEqual(self.titles(), ['Book 1', 'Book 0'])
+        response = self.assertQueryBudget(0, 'get', reverse('book_list'))
+        self.assertEqual(len(response.json()['results']), 2)
+
+        Book.objects.filter(pk=books[1].pk).update(title='Renamed')
+        self.assertEqual(self.titles(), ['Book 1', 'Book 0'])
+        bump_catalog_version()
+        self.assertEqual(self.titles(), ['Renamed', 'Book 0'])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.delete(reverse('book_detail', args=[books[0].pk]))
+        self.assertEqual(self.titles(), ['Renamed'])
+
+    @override_settings(BOOK_CACHE_SHARED=False)
+    def test_process_local_cache_is_bypassed(self):
+        books = self.create_books(2)
+        stats = get_cache_stats()
+        etag = self.client.get(reverse('book_list'))['ETag']
+        # A write made by another worker bumps the shared counter row
+        Book.objects.filter(pk=books[1].pk).update(title='Renamed', updated_at=timezone.now())
+        bump_catalog_version()
+        response = self.client.get(reverse('book_list'), HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['results'][0]['title'], 'Renamed')
+        Book.objects.filter(pk=books[0].pk).delete()
+        self.assertEqual(self.titles(), ['Renamed'])
+        self.assertEqual(get_cache_stats(), stats)
+
+
+class KeysetPaginationTests(BookTestCase):
+    def forge_cursor(self, values):
+        return base64.urlsafe_b64encode(json.dumps(values).encode()).decode().rstrip('=')
+
+    def test_cursors_walk_every_book_once(self):
+        books = self.create_books(7)
+        seen, params = [], {'page_size': 3}
+        while True:
+            data = self.client.get(reverse('my_books'), params).json()
+            seen.extend(book['id'] for book in data['results'])
+            if not data['next']:
+                break
+            params['cursor'] = parse_qs(urlsplit(data['next']).query)['cursor'][0]
+        self.assertEqual(seen, sorted((book.pk for book in books), reverse=True))
+
+    def test_forged_cursors_are_not_found(self):
+        self.create_books(2)
+        for cursor in ('not-base64!', self.forge_cursor(['garbage', 1]), self.forge_cursor([1, 2]),
+                       self.forge_cursor(['2020-01-01T00:00:00Z', 'x']), self.forge_cursor([None, 1])):
+            with self.subTest(cursor=cursor):
+                for name in ('book_list', 'my_books'):
+                    self.assertEqual(self.client.get(reverse(name), {'cursor': cursor}).status_code, 404)
+        search_cursor = self.forge_cursor(['high', '2020-01-01T00:00:00Z', 1])
+        response = self.client.get(reverse('book_list'), {'search': 'Book', 'cursor': search_cursor})
+        self.assertEqual(response.status_code, 404)
+
+    @override_settings(API_PAGE_SIZE=2, API_MAX_PAGE_SIZE=4)
+    def test_page_size_is_capped(self):
+        self.create_books(6)
+        for page_size, expected in ((None, 2), (3, 3), (50, 4), (0, 1), ('x', 2)):
+            with self.subTest(page_size=page_size):
+                params = {} if page_size is None else {'page_size': page_size}
+                self.assertEqual(len(self.client.get(reverse('my_books'), params).json()['results']), expected)
+
+    def test_count_is_only_included_when_asked_for(self):
+        self.create_books(3)
+        url = reverse('my_books')
+        self.assertNotIn('count', self.client.get(url, {'page_size': 1}).json())
+        self.assertEqual(self.client.get(url, {'page_size': 1, 'count': 'exact'}).json()['count'], 3)
+        # SQLite has no planner estimate and falls back to an exact count
+        self.assertEqual(self.client.get(url, {'page_size': 1, 'count': 'estimate'}).json()['count'], 3)
+        self.assertNotIn('count', self.client.get(url, {'count': 'bogus'}).json())
+
+
+class SimpleSearchEngineTests(BookTestCase):
+    def setUp(self):
+        super().setUp()
+        books = self.create_books(3)
+        for book, title, description in zip(books, ('Dune Messiah', 'Children of Dune', 'Foundation'), (
+            'Desert planet sequel', 'Messiah returns to the desert', 'Galactic empire',
+        )):
+            book.title, book.description = title, description
+        Book.objects.bulk_update(books, ['title', 'description'])
+        self.books = books
+
+    def search(self, query):
+        return [book.title for book in SimpleSearchEngine().search(Book.objects.all(), query)]
+
+    def test_every_term_must_match(self):
+        self.assertEqual(sorted(self.search('dune desert')), ['Children of Dune', 'Dune Messiah'])
+        self.assertEqual(self.search('dune empire'), [])
+
+    def test_title_matches_rank_first(self):
+        self.assertEqual(self.search('messiah'), ['Dune Messiah', 'Children of Dune'])
+
+    def test_query_without_terms_matches_nothing(self):
+        self.assertEqual(self.search('  !? '), [])
+
+    def test_book_list_search_parameter(self):
+        response = self.client.get(reverse('book_list'), {'search': 'Foundation'})
+        self.assertEqual([book['title'] for book in response.json()['results']], ['Foundation'])
+
+
+class PDFStreamingTests(MediaRootMixin, BookTestCase):
+    def setUp(self):
+        super().setUp()
+        self.content = b'%PDF-1.4\n' + b'p' * 1000 + b'\n%%EOF\n'
+        self.book = self.create_book('Ranged', pdf=self.content)
+        self.url = reverse('book_pdf', args=[self.book.pk])
+
+    def get(self, **headers):
+        response = self.client.get(self.url, **headers)
+        self.addCleanup(response.close)
+        return response
+
+    def test_parse_range(self):
+        self.assertEqual(parse_range('bytes=0-99', 1000), (0, 99))
+        self.assertEqual(parse_range('bytes=900-', 1000), (900, 999))
+        self.assertEqual(parse_range('bytes=-100', 1000), (900, 999))
+        self.assertEqual(parse_range('bytes=990-2000', 1000), (990, 999))
+        for header in (None, '', 'bytes=-', 'items=0-1', 'bytes=0-1,5-6'):
+            self.assertIsNone(parse_range(header, 1000))
+        for header in ('bytes=1000-', 'bytes=5-4', 'bytes=-0'):
+            with self.assertRaises(ValueError):
+                parse_range(header, 1000)
+
+    def test_full_and_partial_content(self):
+        response = self.get()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Accept-Ranges'], 'bytes')
+        self.assertEqual(b''.join(response.streaming_content), self.content)
+
+        response = self.get(HTTP_RANGE='bytes=10-19')
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(response['Content-Range'], f'bytes 10-19/{len(self.content)}')
+        self.assertEqual(b''.join(response.streaming_content), self.content[10:20])
+
+    def test_unsatisfiable_and_multiple_ranges(self):
+        response = self.get(HTTP_RANGE=f'bytes={len(self.content)}-')
+        self.assertEqual(response.status_code, 416)
+        self.assertEqual(response['Content-Range'], f'bytes */{len(self.content)}')
+        # Multiple ranges are not supported; the whole file is sent instead
+        response = self.get(HTTP_RANGE='bytes=0-1,5-6')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(b''.join(response.streaming_content), self.content)
+
+    def test_conditional_requests(self):
+        response = self.get()
+        self.assertEqual(self.get(HTTP_IF_NONE_MATCH=response['ETag']).status_code, 304)
+        self.assertEqual(self.get(HTTP_IF_MODIFIED_SINCE=response['Last-Modified']).status_code, 304)
+        # A stale If-Range validator ignores the range
+        self.assertEqual(self.get(HTTP_RANGE='bytes=0-9', HTTP_IF_RANGE='"stale"').status_code, 200)
+        self.assertEqual(self.get(HTTP_RANGE='bytes=0-9', HTTP_IF_RANGE=response['ETag']).status_code, 206)
+
+    def test_sendfile_headers(self):
+        with override_settings(PDF_SENDFILE_MODE='x-accel-redirect', PDF_SENDFILE_URL_PREFIX='/protected/'):
+            response = self.get()
+            self.assertEqual(response['X-Accel-Redirect'], f'/protected/{self.book.pdf_file.name}')
+            self.assertFalse(response.content)
+            quoted = sendfile_response('/srv/a b.pdf', 'book_pdfs/a b#1.pdf', 'application/pdf')
+            self.assertEqual(quoted['X-Accel-Redirect'], '/protected/book_pdfs/a%20b%231.pdf')
+        with override_settings(PDF_SENDFILE_MODE='x-sendfile'):
+            self.assertEqual(self.get()['X-Sendfile'], self.book.pdf_file.path)
+
+
+class FastBookSerializerTests(BookTestCase):
+    def test_output_matches_book_serializer(self):
+        books = self.create_books(3)
+        Book.objects.filter(pk=books[0].pk).update(
+            pdf_file='book_pdfs/ab/cd/file name.pdf', cover_image='book_covers/cover.png',
+            cover_renditions={'thumbnail': {'webp': 'book_covers/cover_thumbnail.webp'}},
+            pdf_preview='book_previews/preview.jpg', description='Described', pdf_status=Book.PDF_READY,
+            pdf_page_count=12, pdf_file_size=3456,
+        )
+        queryset = Book.objects.order_by('-created_at', '-id')
+        expected = JSONRenderer().render(BookSerializer(queryset, many=True).data)
+        rows = FastBookSerializer.values(queryset)
+        self.assertEqual(JSONRenderer().render(FastBookSerializer().serialize(rows)), expected)
+
+        request = APIRequestFactory().get('/api/books/')
+        expected = JSONRenderer().render(BookSerializer(queryset, many=True, context={'request': request}).data)
+        self.assertEqual(JSONRenderer().render(FastBookSerializer(request).serialize(rows)), expected)
+
+
+class RenderingAndCompressionTests(BookTestCase):
+    def test_fast_renderer_matches_stdlib_renderer(self):
+        data = {'title': 'Caf\u00e9 \u2028 line', 'date': date(2020, 1, 2), 'count': 3, 'items': [None, 1.5, True]}
+        self.assertEqual(FastJSONRenderer().render(data), JSONRenderer().render(data))
+
+    def test_large_list_response_is_gzipped(self):
+        self.create_books(20)
+        response = self.client.get(reverse('book_list'), HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertIn('Accept-Encoding', response['Vary'])
+        self.assertEqual(len(json.loads(gzip.decompress(response.content))['results']), 20)
+
+        identity = self.client.get(reverse('book_list'))
+        self.assertFalse(identity.has_header('Content-Encoding'))
+        self.assertEqual(json.loads(identity.content), json.loads(gzip.decompress(response.content)))
+
+
+class ConditionalGetTests(ReadingListTestCase):
+    def assertRevalidates(self, url, change):
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        etag = response['ETag']
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        self.assertEqual(
+            self.client.get(url, HTTP_IF_MODIFIED_SINCE=response['Last-Modified']).status_code, 304
+        )
+        change()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_my_books_revalidates_until_a_book_is_deleted(self):
+        books = self.create_books(3)
+        self.assertRevalidates(reverse('my_books'), lambda: books[1].delete())
+
+    def test_reading_lists_revalidate_until_an_entry_changes(self):
+        self.create_reading_lists(2, 3)
+        entry = ReadingListBook.objects.first()
+
+        def complete():
+            entry.is_completed = True
+            entry.save()
+        self.assertRevalidates(reverse('reading_list'), complete)
+
+    @override_settings(BOOK_CACHE_SHARED=True)
+    def test_catalog_etag_changes_with_the_catalog_version(self):
+        self.create_books(2)
+        etag = self.client.get(reverse('book_list'))['ETag']
+        self.assertEqual(self.client.get(reverse('book_list'), HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        bump_catalog_version()
+        self.assertEqual(self.client.get(reverse('book_list'), HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+
+class PerformanceMetricsTests(ReadingListTestCase):
+    @override_settings(METRICS_TOKEN='scrape-token')
+    def test_requests_are_timed_and_exported_per_view(self):
+        registry.reset()
+        self.create_reading_lists(1, 3)
+        response = self.client.get(reverse('reading_list'))
+        self.assertRegex(response['Server-Timing'], r'app;dur=[\d.]+, db;dur=[\d.]+;desc="3 queries"')
+        self.assertIn('serialize;dur=', response['Server-Timing'])
+
+        metrics = self.client.get(reverse('metrics'), HTTP_AUTHORIZATION='Bearer scrape-token').content.decode()
+        self.assertIn('http_request_duration_seconds_count{view="ReadingListView",method="GET",status="2xx"} 1', metrics)
+        self.assertIn('http_db_queries_total{view="ReadingListView",method="GET",status="2xx"} 3', metrics)
+
+    @override_settings(METRICS_TOKEN='scrape-token')
+    def test_metrics_need_the_token_even_from_an_allowed_ip(self):
+        self.assertEqual(self.client.get(reverse('metrics')).status_code, 403)
+        response = self.client.get(reverse('metrics'), HTTP_AUTHORIZATION='Bearer wrong')
+        self.assertEqual(response.status_code, 403)
+        with self.settings(METRICS_TOKEN=''):
+            self.assertEqual(self.client.get(reverse('metrics'), HTTP_AUTHORIZATION='Bearer ').status_code, 403)
+
+
+class BatchAndSparseFieldsetTests(QueryBudgetMixin, BookTestCase):
+    @override_settings(BOOK_CACHE_SHARED=True)
+    def test_ids_return_books_in_the_requested_order_in_one_query(self):
+        books = self.create_books(4)
+        ids = f'{books[2].pk},{books[0].pk},{books[2].pk},999999'
+        response = self.assertQueryBudget(1, 'get', reverse('book_list'), data={'ids': ids})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([book['id'] for book in response.json()['results']], [books[2].pk, books[0].pk])
+
+    def test_invalid_ids_are_rejected(self):
+        self.assertEqual(self.client.get(reverse('book_list'), {'ids': '1,x'}).status_code, 400)
+        too_many = ','.join(str(index) for index in range(1, 102))
+        self.assertEqual(self.client.get(reverse('book_list'), {'ids': too_many}).status_code, 400)
+
+    def test_sparse_fieldsets_match_the_full_representation(self):
+        self.create_books(3)
+        full = self.client.get(reverse('book_list')).json()['results']
+        response = self.client.get(reverse('book_list'), {'fields': 'title,publication_date,pdf_file'})
+        sparse = response.json()['results']
+        self.assertEqual(sparse, [
+            {key: book[key] for key in ('id', 'title', 'publication_date', 'pdf_file')} for book in full
+        ])
+        self.assertLess(len(response.content), len(JSONRenderer().render({'results': full})) / 2)
+
+    def test_detail_and_my_books_accept_fields(self):
+        book = self.create_books(1)[0]
+        detail = self.client.get(reverse('book_detail', args=[book.pk]), {'fields': 'title,authors'})
+        self.assertEqual(detail.json(), {'id': book.pk, 'title': book.title, 'authors': book.authors})
+        mine = self.client.get(reverse('my_books'), {'fields': 'genre'})
+        self.assertEqual(mine.json()['results'], [{'id': book.pk, 'genre': 'Fiction'}])
+        self.assertEqual(self.client.get(reverse('book_list'), {'fields': 'title,secret'}).status_code, 400)
+
+
+class AsyncViewTests(MediaRootMixin, BookTestCase):
+    def setUp(self):
+        super().setUp()
+        self.factory = AsyncRequestFactory()
+        self.token = str(RefreshToken.for_user(self.user).access_token)
+
+    def authorized(self, method, path, headers=None, **extra):
+        # AsyncRequestFactory turns extra kwargs into raw header names, so
+        # headers must be passed as `headers`, not as HTTP_* META keys
+        headers = {'Authorization': f'Bearer {self.token}', **(headers or {})}
+        return getattr(self.factory, method)(path, headers=headers, **extra)
+
+    async def test_book_list_matches_the_sync_view(self):
+        await sync_to_async(self.create_books)(3)
+        response = await AsyncBookListView.as_view()(self.factory.get(reverse('book_list'), {'page_size': 2}))
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response['ETag'])
+
+        await sync_to_async(bump_catalog_version)()
+        expected = await sync_to_async(self.client.get)(reverse('book_list'), {'page_size': 2})
+        self.assertEqual(json.loads(response.content), expected.json())
+
+    async def test_book_detail_requires_a_token(self):
+        book = (await sync_to_async(self.create_books)(1))[0]
+        url = reverse('book_detail', args=[book.pk])
+        view = AsyncBookDetailView.as_view()
+
+        self.assertEqual((await view(self.factory.get(url), pk=book.pk)).status_code, 401)
+        response = await view(self.authorized('get', url), pk=book.pk)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(json.loads(response.content)['title'], book.title)
+        missing = book.pk + 1000
+        response = await view(self.authorized('get', reverse('book_detail', args=[missing])), pk=missing)
+        self.assertEqual(response.status_code, 404)
+
+    async def test_other_methods_go_to_the_sync_view(self):
+        book = (await sync_to_async(self.create_books)(1))[0]
+        url = reverse('book_detail', args=[book.pk])
+        response = await AsyncBookDetailView.as_view()(self.authorized('delete', url), pk=book.pk)
+        self.assertEqual(response.status_code, 204)
+        self.assertFalse(await Book.objects.filter(pk=book.pk).aexists())
+
+    async def test_pdf_is_streamed_asynchronously(self):
+        content = b'%PDF-1.4\n' + b'z' * 200000 + b'\n%%EOF\n'
+        book = await sync_to_async(self.create_book)('Streamed', pdf=content)
+        url = reverse('book_pdf', args=[book.pk])
+        view = AsyncBookPDFView.as_view()
+
+        response = await view(self.authorized('get', url), pk=book.pk)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.is_async)
+        self.assertEqual(b''.join([chunk async for chunk in response.streaming_content]), content)
+
+        response = await view(self.authorized('get', url, headers={'Range': 'bytes=100-199'}), pk=book.pk)
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(b''.join([chunk async for chunk in response.streaming_content]), content[100:200])
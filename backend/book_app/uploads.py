@@ -0,0 +1,94 @@
+import hashlib
+import os
+from django.conf import settings
+from django.core.files import File
+from .models import BookUploadChunk
+
+BLOCK_SIZE = 64 * 1024
+
+
+class UploadError(Exception):
+    pass
+
+
+class AssembledUpload(File):
+    """
+    The finished part file. Exposing `temporary_file_path` lets
+    FileSystemStorage move it into place instead of copying it.
+    """
+    def temporary_file_path(self):
+        return self.file.name
+
+
+def upload_dir():
+    path = getattr(settings, 'CHUNKED_UPLOAD_DIR', None) or os.path.join(settings.MEDIA_ROOT, 'uploads')
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def part_path(upload):
+    return os.path.join(upload_dir(), f'{upload.pk}.part')
+
+
+def create_part_file(upload):
+    # Sparse file of the final size; chunks are written at their offsets
+    with open(part_path(upload), 'wb') as f:
+        f.truncate(upload.total_size)
+
+
+def expected_chunk_size(upload, index):
+    if index >= upload.total_chunks:
+        raise UploadError(f'Chunk index must be below {upload.total_chunks}.')
+    return min(upload.chunk_size, upload.total_size - index * upload.chunk_size)
+
+
+def write_chunk(upload, index, stream, checksum):
+    """
+    Streams one chunk from `stream` into the part file at its offset,
+    hashing it on the way. The chunk is only recorded when its size and
+    SHA-256 match, so a failed or corrupted chunk can simply be re-sent.
+    """
+    expected = expected_chunk_size(upload, index)
+    # The bytes at this offset are about to be overwritten, so a bad
+    # re-send of an accepted chunk must not leave it recorded as received
+    BookUploadChunk.objects.filter(upload=upload, index=index).delete()
+    digest = hashlib.sha256()
+    written = 0
+    with open(part_path(upload), 'r+b') as f:
+        f.seek(index * upload.chunk_size)
+        while written < expected:
+            block = stream.read(min(BLOCK_SIZE, expected - written))
+            if not block:
+                break
+            digest.update(block)
+            f.write(block)
+            written += len(block)
+        if stream.read(1):
+            raise UploadError(f'Chunk {index} is larger than {expected} bytes.')
+    if written != expected:
+        raise UploadError(f'Chunk {index} has {written} bytes, expected {expected}.')
+    if digest.hexdigest() != checksum.lower():
+        raise UploadError(f'Chunk {index} checksum mismatch.')
+
+    BookUploadChunk.objects.update_or_create(
+        upload=upload, index=index, defaults={'size': written, 'sha256': digest.hexdigest()}
+    )
+    return written
+
+
+def received_chunks(upload):
+    return sorted(upload.chunks.values_list('index', flat=True))
+
+
+def assembled_file(upload):
+    missing = sorted(set(range(upload.total_chunks)) - set(received_chunks(upload)))
+    if missing:
+        raise UploadError(f'Missing chunks: {missing[:20]}')
+    return AssembledUpload(open(part_path(upload), 'rb'), name=upload.filename)
+
+
+def discard_upload(upload):
+    path = part_path(upload)
+    if os.path.exists(path):
+        os.remove(path)
+    upload.delete()
@@ -1,12 +1,26 @@
+from django.conf import settings
 from django.urls import path
 from .views import *
 
+if settings.ASYNC_VIEWS:
+    # Native async read paths for ASGI; other methods still reach the sync views
+    from .async_views import AsyncBookDetailView, AsyncBookListView, AsyncBookPDFView, AsyncReadingListView
+    BookListView, BookDetailView = AsyncBookListView, AsyncBookDetailView
+    BookPDFView, ReadingListView = AsyncBookPDFView, AsyncReadingListView
+
 urlpatterns = [
     path('books/', BookListView.as_view(), name='book_list'),
     path('books/my-books/', MyBooksView.as_view(), name='my_books'),
+    path('books/import/', BookImportView.as_view(), name='book_import'),
+    path('books/export/', BookExportView.as_view(), name='book_export'),
     path('books/<int:pk>/', BookDetailView.as_view(), name='book_detail'),
     path('books/<int:pk>/pdf/', BookPDFView.as_view(), name='book_pdf'),
+    path('books/uploads/', BookUploadView.as_view(), name='book_upload'),
+    path('books/uploads/<uuid:upload_id>/', BookUploadDetailView.as_view(), name='book_upload_detail'),
+    path('books/uploads/<uuid:upload_id>/chunks/<int:index>/', BookUploadChunkView.as_view(), name='book_upload_chunk'),
+    path('books/uploads/<uuid:upload_id>/complete/', BookUploadCompleteView.as_view(), name='book_upload_complete'),
     path('reading-lists/', ReadingListView.as_view(), name='reading_list'),
+    path('reading-lists/summary/', ReadingListSummaryView.as_view(), name='reading_list_summary'),
     path('reading-lists/<int:pk>/', ReadingListDetailView.as_view(), name='reading_list_detail'),
     path('reading-lists/<int:pk>/add-book/', ReadingListAddBookView.as_view(), name='reading_list_add_book'),
     path('reading-lists/<int:list_id>/remove-book/<int:book_id>/', ReadingListRemoveBookView.as_view(), name='reading_list_remove_book'),
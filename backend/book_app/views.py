@@ -1,35 +1,75 @@
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
-from rest_framework.permissions import IsAuthenticated, AllowAny
+from rest_framework.permissions import IsAuthenticated, IsAdminUser, AllowAny
 from .serializers import *
+from .models import BookUpload, reading_list_books_prefetch
+from .search import get_search_engine
+from .pagination import KeysetPagination
+from .fast_serializers import BOOK_FIELDS, FastBookSerializer, in_id_order, requested_fields, requested_ids
+from .streaming import serve_file
+from .cache import cached_response, bump_catalog_version, get_catalog_version
+from .conditional import conditional_response, make_etag, book_validators, reading_list_validators
+from .ordering import next_order, active_entries, move_entry, reorder_entries
+from .progress import change_progress
+from .bulk import BulkImportError, ZipSource, detect_format, limit_rows, read_rows, import_books, export_books
+from .uploads import UploadError, create_part_file, write_chunk, received_chunks, assembled_file, discard_upload
+from django.conf import settings
 import logging
 from django.db import transaction
-from datetime import datetime
+from django.utils import timezone
 from django.db import models, IntegrityError
-from django.db.models import Q
-from django.http import HttpResponse, Http404
+from django.db.models import Q, prefetch_related_objects
+from django.http import HttpResponse, Http404, StreamingHttpResponse
 import os
+from io import BytesIO
+from auth_app.authentication import JWTCookieStatelessAuthentication
+from backend.metrics import timed
 
 
 logger = logging.getLogger(__name__)
 
+def upload_status(upload):
+    return {
+        'id': str(upload.pk),
+        'filename': upload.filename,
+        'total_size': upload.total_size,
+        'chunk_size': upload.chunk_size,
+        'total_chunks': upload.total_chunks,
+        'received_chunks': received_chunks(upload),
+    }
+
+def serialize_reading_list(reading_list):
+    prefetch_related_objects([reading_list], reading_list_books_prefetch())
+    return ReadingListSerializer(reading_list).data
+
 class BookListView(APIView):
     permission_classes = [AllowAny]
     
     def get(self, request):
+        # Every book change bumps the catalog version, so it doubles as the validator
+        etag = make_etag(request, get_catalog_version())
+        return conditional_response(request, lambda: cached_response(request, lambda: self.list_books(request)), etag)
+
+    def list_books(self, request):
+        fields = requested_fields(request)
+        ids = requested_ids(request)
+        if ids is not None:
+            # Batch lookup: many books by id in one query, in the order asked for
+            rows = in_id_order(FastBookSerializer.values(Book.objects.filter(pk__in=ids), fields=fields), ids)
+            return Response({'next': None, 'results': FastBookSerializer(fields=fields).serialize(rows)})
+
         search_query = request.query_params.get('search', '')
         books = Book.objects.all()
+        paginator = KeysetPagination()
         
         if search_query:
-            books = books.filter(
-                Q(title__icontains=search_query) |
-                Q(authors__icontains=search_query) |
-                Q(genre__icontains=search_query)
-            )
+            books = get_search_engine().search(books, search_query)
+            paginator = KeysetPagination(ordering=('-rank', '-created_at', '-id'))
         
-        serializer = BookSerializer(books, many=True)
-        return Response(serializer.data)
+        rows = FastBookSerializer.values(books, *paginator.ordering_fields(), fields=fields)
+        page = paginator.paginate_queryset(rows, request)
+        return paginator.get_paginated_response(FastBookSerializer(fields=fields).serialize(page))
 
     def post(self, request):
         if not request.user.is_authenticated:
@@ -39,118 +79,185 @@ class BookListView(APIView):
         if serializer.is_valid():
             serializer.save()
             return Response(serializer.data, status=status.HTTP_201_CREATED)
-        logger.error(f"Book creation failed: {serializer.errors}")
+        logger.error("Book creation failed: %s", serializer.errors)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 class MyBooksView(APIView):
+    authentication_classes = [JWTCookieStatelessAuthentication]
     permission_classes = [IsAuthenticated]
     
     def get(self, request):
-        books = Book.objects.filter(created_by=request.user)
-        serializer = BookSerializer(books, many=True)
-        return Response(serializer.data)
+        books = Book.objects.filter(created_by_id=request.user.id)
+        count, updated = book_validators(books)
+        etag = make_etag(request, request.user.id, count, updated)
+        return conditional_response(request, lambda: self.list_books(request, books), etag, updated)
+
+    def list_books(self, request, books):
+        fields = requested_fields(request)
+        paginator = KeysetPagination()
+        rows = FastBookSerializer.values(books, *paginator.ordering_fields(), fields=fields)
+        page = paginator.paginate_queryset(rows, request)
+        return paginator.get_paginated_response(FastBookSerializer(fields=fields).serialize(page))
 
 class BookDetailView(APIView):
     permission_classes = [IsAuthenticated]
     
     def get(self, request, pk):
+        etag = make_etag(request, get_catalog_version())
+        return conditional_response(request, lambda: cached_response(request, lambda: self.retrieve_book(request, pk)), etag)
+
+    def retrieve_book(self, request, pk):
+        fields = requested_fields(request)
         try:
-            book = Book.objects.get(pk=pk)
-            serializer = BookSerializer(book)
+            book = Book.objects.only(*(fields or BOOK_FIELDS)).get(pk=pk)
+            serializer = BookSerializer(book, fields=fields)
             return Response(serializer.data)
         except Book.DoesNotExist:
-            logger.error(f"Book not found: ID {pk}")
+            logger.error("Book not found: ID %s", pk)
             return Response({'detail': 'Book not found'}, status=status.HTTP_404_NOT_FOUND)
     
     def put(self, request, pk):
         try:
             book = Book.objects.get(pk=pk)
-            if book.created_by != request.user:
-                logger.warning(f"Unauthorized update attempt by {request.user} on book ID {pk}")
+            if book.created_by_id != request.user.pk:
+                logger.warning("Unauthorized update attempt by %s on book ID %s", request.user, pk)
                 return Response({'detail': 'Not authorized to edit this book'}, status=status.HTTP_403_FORBIDDEN)
             serializer = BookSerializer(book, data=request.data, context={'request': request}, partial=True)
             if serializer.is_valid():
                 serializer.save()
-                logger.info(f"Book updated successfully: {book.title}")
+                logger.info("Book updated successfully: %s", book.title)
                 return Response(serializer.data)
-            logger.error(f"Book update failed: {serializer.errors}")
+            logger.error("Book update failed: %s", serializer.errors)
             return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
         except Book.DoesNotExist:
-            logger.error(f"Book not found for update: ID {pk}")
+            logger.error("Book not found for update: ID %s", pk)
             return Response({'detail': 'Book not found'}, status=status.HTTP_404_NOT_FOUND)
     
     def delete(self, request, pk):
         try:
             book = Book.objects.get(pk=pk)
-            if book.created_by != request.user:
-                logger.warning(f"Unauthorized delete attempt by {request.user} on book ID {pk}")
+            if book.created_by_id != request.user.pk:
+                logger.warning("Unauthorized delete attempt by %s on book ID %s", request.user, pk)
                 return Response({'detail': 'Not authorized to delete this book'}, status=status.HTTP_403_FORBIDDEN)
             book.delete()
+            transaction.on_commit(bump_catalog_version)
             return Response(status=status.HTTP_204_NO_CONTENT)
         except Book.DoesNotExist:
-            logger.error(f"Book not found for deletion: ID {pk}")
+            logger.error("Book not found for deletion: ID %s", pk)
             return Response({'detail': 'Book not found'}, status=status.HTTP_404_NOT_FOUND)
 
 class BookPDFView(APIView):
+    authentication_classes = [JWTCookieStatelessAuthentication]
     permission_classes = [IsAuthenticated]
     
     def get(self, request, pk):
-        logger.info(f"User {request.user} requesting PDF for book ID {pk}")
+        logger.info("User %s requesting PDF for book ID %s", request.user, pk)
         try:
             book = Book.objects.get(pk=pk)
             if not book.pdf_file:
-                logger.warning(f"No PDF file available for book ID {pk}")
+                logger.warning("No PDF file available for book ID %s", pk)
                 return Response({'detail': 'PDF file not available'}, status=status.HTTP_404_NOT_FOUND)
             
             if not os.path.exists(book.pdf_file.path):
-                logger.error(f"PDF file not found on server for book ID {pk}")
+                logger.error("PDF file not found on server for book ID %s", pk)
                 return Response({'detail': 'PDF file not found'}, status=status.HTTP_404_NOT_FOUND)
             
-            with open(book.pdf_file.path, 'rb') as pdf_file:
-                response = HttpResponse(pdf_file.read(), content_type='application/pdf')
-                response['Content-Disposition'] = f'inline; filename="{book.title}.pdf"'
-                logger.info(f"PDF served successfully for book: {book.title}")
-                return response
+            response = serve_file(request, book.pdf_file, 'application/pdf', f'{book.title}.pdf')
+            logger.info("PDF served successfully for book: %s", book.title)
+            return response
                 
         except Book.DoesNotExist:
-            logger.error(f"Book not found for PDF request: ID {pk}")
+            logger.error("Book not found for PDF request: ID %s", pk)
             return Response({'detail': 'Book not found'}, status=status.HTTP_404_NOT_FOUND)
         except Exception as e:
-            logger.error(f"Error serving PDF for book ID {pk}: {str(e)}")
+            logger.error("Error serving PDF for book ID %s: %s", pk, e)
             return Response({'detail': 'Error serving PDF file'}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
+class BookImportView(APIView):
+    # Runs inside the request, so it is capped at BOOK_IMPORT_MAX_ROWS;
+    # larger catalogs go through `manage.py import_books`
+    permission_classes = [IsAdminUser]
+
+    def post(self, request):
+        metadata = request.FILES.get('file')
+        if not metadata:
+            return Response({'detail': 'A CSV or JSONL file is required'}, status=status.HTTP_400_BAD_REQUEST)
+        source = None
+        try:
+            file_format = detect_format(metadata.name, request.data.get('format'))
+            if request.FILES.get('archive'):
+                source = ZipSource(request.FILES['archive'])
+            rows = limit_rows(read_rows(metadata.file, file_format), getattr(settings, 'BOOK_IMPORT_MAX_ROWS', 1000))
+            result = import_books(rows, request.user, source)
+        except BulkImportError as e:
+            return Response({'detail': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        finally:
+            if source:
+                source.close()
+        logger.info("Bulk import by %s: %s created, %s rejected", request.user, result['created'], len(result['errors']))
+        return Response(result)
+
+class BookExportView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        books = Book.objects.all()
+        if request.query_params.get('mine') in ('1', 'true'):
+            books = books.filter(created_by_id=request.user.pk)
+        response = StreamingHttpResponse(export_books(books), content_type='application/x-ndjson')
+        response['Content-Disposition'] = 'attachment; filename="books.jsonl"'
+        return response
+
 class ReadingListView(APIView):
     permission_classes = [IsAuthenticated]
     
     def get(self, request):
-        reading_lists = ReadingList.objects.filter(user=request.user)
-        serializer = ReadingListSerializer(reading_lists, many=True)
-        return Response(serializer.data)
+        validators, updated = reading_list_validators(request.user)
+        etag = make_etag(request, request.user.pk, validators)
+        return conditional_response(request, lambda: self.list_reading_lists(request), etag, updated)
+
+    def list_reading_lists(self, request):
+        reading_lists = ReadingList.objects.filter(user=request.user).with_books()
+        paginator = KeysetPagination()
+        page = paginator.paginate_queryset(reading_lists, request)
+        with timed('serialize'):
+            data = ReadingListSerializer(page, many=True).data
+        return paginator.get_paginated_response(data)
 
     def post(self, request):
         serializer = ReadingListSerializer(data=request.data, context={'request': request})
         if serializer.is_valid():
             serializer.save()
-            logger.info(f"Reading list created successfully")
+            logger.info("Reading list created successfully")
             return Response(serializer.data, status=status.HTTP_201_CREATED)
-        logger.error(f"Reading list creation failed: {serializer.errors}")
+        logger.error("Reading list creation failed: %s", serializer.errors)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
+class ReadingListSummaryView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        # Progress counters only, from the reading-list rows in one query
+        reading_lists = ReadingList.objects.filter(user=request.user).only(*ReadingListSummarySerializer.Meta.fields)
+        paginator = KeysetPagination()
+        page = paginator.paginate_queryset(reading_lists, request)
+        return paginator.get_paginated_response(ReadingListSummarySerializer(page, many=True).data)
+
 class ReadingListDetailView(APIView):
     permission_classes = [IsAuthenticated]
     
     def put(self, request, pk):
         try:
-            reading_list = ReadingList.objects.get(pk=pk, user=request.user)
+            reading_list = ReadingList.objects.with_books().get(pk=pk, user=request.user)
             serializer = ReadingListSerializer(reading_list, data=request.data, partial=True)
             if serializer.is_valid():
                 serializer.save()
-                logger.info(f"Reading list updated successfully: ID {pk}")
+                logger.info("Reading list updated successfully: ID %s", pk)
                 return Response(serializer.data)
-            logger.error(f"Reading list update failed: {serializer.errors}")
+            logger.error("Reading list update failed: %s", serializer.errors)
             return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
         except ReadingList.DoesNotExist:
-            logger.error(f"Reading list not found: ID {pk}")
+            logger.error("Reading list not found: ID %s", pk)
             return Response({'detail': 'Reading list not found'}, status=status.HTTP_404_NOT_FOUND)
 
     def delete(self, request, pk):
@@ -159,7 +266,7 @@ class ReadingListDetailView(APIView):
             reading_list.delete()
             return Response(status=status.HTTP_204_NO_CONTENT)
         except ReadingList.DoesNotExist:
-            logger.error(f"Reading list not found for deletion: ID {pk}")
+            logger.error("Reading list not found for deletion: ID %s", pk)
             return Response({'detail': 'Reading list not found'}, status=status.HTTP_404_NOT_FOUND)
 
 class ReadingListAddBookView(APIView):
@@ -170,21 +277,22 @@ class ReadingListAddBookView(APIView):
             reading_list = ReadingList.objects.get(pk=pk, user=request.user)
             book_id = request.data.get('book_id')
             book = Book.objects.get(pk=book_id)
-            max_order = reading_list.reading_list_books.aggregate(models.Max('order'))['order__max'] or 0
-            ReadingListBook.objects.create(
-                reading_list=reading_list,
-                book=book,
-                order=max_order + 1
-            )
-            return Response(ReadingListSerializer(reading_list).data)
+            with transaction.atomic():
+                ReadingListBook.objects.create(
+                    reading_list=reading_list,
+                    book=book,
+                    order=next_order(reading_list)
+                )
+                change_progress(reading_list.pk, total=1)
+            return Response(serialize_reading_list(reading_list))
         except ReadingList.DoesNotExist:
-            logger.error(f"Reading list not found: ID {pk}")
+            logger.error("Reading list not found: ID %s", pk)
             return Response({'detail': 'Reading list not found'}, status=status.HTTP_404_NOT_FOUND)
         except Book.DoesNotExist:
-            logger.error(f"Book not found: ID {book_id}")
+            logger.error("Book not found: ID %s", book_id)
             return Response({'detail': 'Book not found'}, status=status.HTTP_404_NOT_FOUND)
         except IntegrityError:
-            logger.warning(f"Book ID {book_id} already in reading list ID {pk}")
+            logger.warning("Book ID %s already in reading list ID %s", book_id, pk)
             return Response({'detail': 'Book already in reading list'}, status=status.HTTP_400_BAD_REQUEST)
 
 class ReadingListRemoveBookView(APIView):
@@ -193,17 +301,18 @@ class ReadingListRemoveBookView(APIView):
     def delete(self, request, list_id, book_id):
         try:
             reading_list = ReadingList.objects.get(pk=list_id, user=request.user)
-            reading_list_book = reading_list.reading_list_books.get(book=book_id)
-            reading_list_book.delete()
-            for index, item in enumerate(reading_list.reading_list_books.order_by('order')):
-                item.order = index + 1
-                item.save()
-            return Response(ReadingListSerializer(reading_list).data)
+            with transaction.atomic():
+                # The row lock makes a concurrent mark-completed (or remove)
+                # wait, so is_completed is still current when counted
+                reading_list_book = reading_list.reading_list_books.select_for_update().get(book=book_id)
+                ReadingListBook.objects.filter(pk=reading_list_book.pk).delete()
+                change_progress(reading_list.pk, total=-1, completed=-int(reading_list_book.is_completed))
+            return Response(serialize_reading_list(reading_list))
         except ReadingList.DoesNotExist:
-            logger.error(f"Reading list not found: ID {list_id}")
+            logger.error("Reading list not found: ID %s", list_id)
             return Response({'detail': 'Reading list not found'}, status=status.HTTP_404_NOT_FOUND)
         except ReadingListBook.DoesNotExist:
-            logger.error(f"Book ID {book_id} not in reading list ID {list_id}")
+            logger.error("Book ID %s not in reading list ID %s", book_id, list_id)
             return Response({'detail': 'Book not in reading list'}, status=status.HTTP_404_NOT_FOUND)
 
 class ReadingListReorderBooksView(APIView):
@@ -212,20 +321,42 @@ class ReadingListReorderBooksView(APIView):
     def post(self, request, pk):
         try:
             reading_list = ReadingList.objects.get(pk=pk, user=request.user)
-            book_orders = request.data.get('book_orders', [])
-            with transaction.atomic():
-                for item in book_orders:
-                    reading_list_book = reading_list.reading_list_books.get(book=item['book_id'])
-                    reading_list_book.order = item['order']
-                    reading_list_book.save()
-            logger.info(f"Books reordered successfully in reading list ID {pk}")
-            return Response(ReadingListSerializer(reading_list).data)
         except ReadingList.DoesNotExist:
-            logger.error(f"Reading list not found: ID {pk}")
+            logger.error("Reading list not found: ID %s", pk)
             return Response({'detail': 'Reading list not found'}, status=status.HTTP_404_NOT_FOUND)
-        except ReadingListBook.DoesNotExist:
-            logger.error(f"Book not found in reading list ID {pk}")
-            return Response({'detail': 'Book not in reading list'}, status=status.HTTP_404_NOT_FOUND)
+
+        try:
+            if 'book_orders' in request.data:
+                # Full ordering of the unfinished books: [{book_id, order}, ...]
+                book_orders = sorted(request.data['book_orders'], key=lambda item: item['order'])
+                book_ids = [int(item['book_id']) for item in book_orders]
+            else:
+                # Single move: {book_id, after_book_id}; no after_book_id moves it first
+                book_id = int(request.data['book_id'])
+                after_book_id = request.data.get('after_book_id')
+                after_book_id = int(after_book_id) if after_book_id is not None else None
+        except (KeyError, TypeError, ValueError):
+            logger.error("Invalid reorder request for reading list ID %s: %s", pk, request.data)
+            return Response({
+                'detail': 'Send book_orders as [{book_id, order}, ...] or a single book_id with after_book_id.'
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        with transaction.atomic():
+            if 'book_orders' in request.data:
+                try:
+                    reorder_entries(reading_list, book_ids)
+                except ValueError as e:
+                    logger.error("Invalid book order for reading list ID %s: %s", pk, e)
+                    return Response({'detail': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+            else:
+                entries = active_entries(reading_list)
+                by_book = {entry.book_id: entry for entry in entries}
+                if book_id not in by_book or (after_book_id is not None and after_book_id not in by_book):
+                    logger.error("Book not found in reading list ID %s", pk)
+                    return Response({'detail': 'Book not in reading list'}, status=status.HTTP_404_NOT_FOUND)
+                move_entry(entries, by_book[book_id], by_book.get(after_book_id))
+        logger.info("Books reordered successfully in reading list ID %s", pk)
+        return Response(serialize_reading_list(reading_list))
 
 class ReadingListMarkCompletedView(APIView):
     permission_classes = [IsAuthenticated]
@@ -234,19 +365,106 @@ class ReadingListMarkCompletedView(APIView):
         try:
             reading_list = ReadingList.objects.get(pk=list_id, user=request.user)
             reading_list_book = reading_list.reading_list_books.get(book=book_id)
-            reading_list_book.is_completed = True
-            reading_list_book.completed_at = datetime.now()
-            reading_list_book.save()
-            for index, item in enumerate(
-                reading_list.reading_list_books.filter(is_completed=False).order_by('order')
-            ):
-                item.order = index + 1
-                item.save()
-            logger.info(f"Book ID {book_id} marked as completed in reading list ID {list_id}")
-            return Response(ReadingListSerializer(reading_list).data)
+            now = timezone.now()
+            with transaction.atomic():
+                # Conditional update, so a book completed twice is counted once
+                completed = ReadingListBook.objects.filter(pk=reading_list_book.pk, is_completed=False).update(
+                    is_completed=True, completed_at=now, updated_at=now
+                )
+                if completed:
+                    change_progress(reading_list.pk, completed=1)
+            logger.info("Book ID %s marked as completed in reading list ID %s", book_id, list_id)
+            return Response(serialize_reading_list(reading_list))
         except ReadingList.DoesNotExist:
-            logger.error(f"Reading list not found: ID {list_id}")
+            logger.error("Reading list not found: ID %s", list_id)
             return Response({'detail': 'Reading list not found'}, status=status.HTTP_404_NOT_FOUND)
         except ReadingListBook.DoesNotExist:
-            logger.error(f"Book ID {book_id} not in reading list ID {list_id}")
-            return Response({'detail': 'Book not in reading list'}, status=status.HTTP_404_NOT_FOUND)
\ No newline at end of file
+            logger.error("Book ID %s not in reading list ID %s", book_id, list_id)
+            return Response({'detail': 'Book not in reading list'}, status=status.HTTP_404_NOT_FOUND)
+
+class BookUploadView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request):
+        filename = os.path.basename(str(request.data.get('filename', '')))
+        try:
+            total_size = int(request.data.get('total_size'))
+            chunk_size = int(request.data.get('chunk_size', settings.CHUNKED_UPLOAD_CHUNK_SIZE))
+        except (TypeError, ValueError):
+            return Response({'detail': 'total_size and chunk_size must be integers'}, status=status.HTTP_400_BAD_REQUEST)
+        if not filename.lower().endswith('.pdf'):
+            return Response({'detail': 'Only PDF files are allowed.'}, status=status.HTTP_400_BAD_REQUEST)
+        if not 0 < total_size <= settings.CHUNKED_UPLOAD_MAX_SIZE:
+            return Response({'detail': f'total_size must be between 1 and {settings.CHUNKED_UPLOAD_MAX_SIZE} bytes.'}, status=status.HTTP_400_BAD_REQUEST)
+        if not 64 * 1024 <= chunk_size <= settings.CHUNKED_UPLOAD_MAX_CHUNK_SIZE:
+            return Response({'detail': f'chunk_size must be between 65536 and {settings.CHUNKED_UPLOAD_MAX_CHUNK_SIZE} bytes.'}, status=status.HTTP_400_BAD_REQUEST)
+
+        upload = BookUpload.objects.create(
+            user=request.user, filename=filename, total_size=total_size, chunk_size=chunk_size
+        )
+        create_part_file(upload)
+        logger.info("Chunked upload %s started by %s for %s", upload.pk, request.user, filename)
+        return Response(upload_status(upload), status=status.HTTP_201_CREATED)
+
+class BookUploadDetailView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request, upload_id):
+        try:
+            upload = BookUpload.objects.get(pk=upload_id, user=request.user)
+            return Response(upload_status(upload))
+        except BookUpload.DoesNotExist:
+            return Response({'detail': 'Upload not found'}, status=status.HTTP_404_NOT_FOUND)
+
+    def delete(self, request, upload_id):
+        try:
+            upload = BookUpload.objects.get(pk=upload_id, user=request.user)
+            discard_upload(upload)
+            return Response(status=status.HTTP_204_NO_CONTENT)
+        except BookUpload.DoesNotExist:
+            return Response({'detail': 'Upload not found'}, status=status.HTTP_404_NOT_FOUND)
+
+class BookUploadChunkView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    def put(self, request, upload_id, index):
+        # The body is the raw chunk; request.data is never touched so DRF
+        # does not parse or buffer it.
+        checksum = request.META.get('HTTP_X_CHUNK_SHA256')
+        if not checksum:
+            return Response({'detail': 'X-Chunk-SHA256 header is required'}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            upload = BookUpload.objects.get(pk=upload_id, user=request.user)
+            size = write_chunk(upload, index, request.stream or BytesIO(), checksum)
+            return Response({'index': index, 'size': size})
+        except BookUpload.DoesNotExist:
+            return Response({'detail': 'Upload not found'}, status=status.HTTP_404_NOT_FOUND)
+        except UploadError as e:
+            logger.warning("Rejected chunk %s of upload %s: %s", index, upload_id, e)
+            return Response({'detail': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+class BookUploadCompleteView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request, upload_id):
+        try:
+            upload = BookUpload.objects.get(pk=upload_id, user=request.user)
+            pdf_file = assembled_file(upload)
+        except BookUpload.DoesNotExist:
+            return Response({'detail': 'Upload not found'}, status=status.HTTP_404_NOT_FOUND)
+        except UploadError as e:
+            return Response({'detail': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        data = {key: request.data.get(key) for key in request.data if key != 'pdf_file'}
+        data['pdf_file'] = pdf_file
+        serializer = BookSerializer(data=data, context={'request': request})
+        try:
+            if not serializer.is_valid():
+                logger.error("Book creation from upload %s failed: %s", upload_id, serializer.errors)
+                return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+            serializer.save()
+        finally:
+            pdf_file.close()
+        discard_upload(upload)
+        logger.info("Chunked upload %s finalized as book ID %s", upload_id, serializer.instance.pk)
+        return Response(serializer.data, status=status.HTTP_201_CREATED)
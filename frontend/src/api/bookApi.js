@@ -1,17 +1,29 @@
 import axiosInstance from "./axiosInstance";
 
+// Collection endpoints are cursor-paginated; follow `next` until the last page.
+const getAllPages = async (url, params = {}) => {
+  let res = await axiosInstance.get(url, { params });
+  const results = [...res.data.results];
+  while (res.data.next) {
+    res = await axiosInstance.get(res.data.next);
+    results.push(...res.data.results);
+  }
+  return { ...res, data: results };
+};
+
 const bookApi = {
   getBooks: (searchQuery = '') => {
     const params = searchQuery ? { search: searchQuery } : {};
     return axiosInstance.get('books/', { params });
   },
-  getBooksByUser: () => axiosInstance.get('books/my-books/'),
+  getNextPage: (nextUrl) => axiosInstance.get(nextUrl),
+  getBooksByUser: () => getAllPages('books/my-books/'),
   getBook: (id) => axiosInstance.get(`books/${id}/`),
   createBook: (data) => axiosInstance.post('books/', data),
   updateBook: (id, data) => axiosInstance.put(`books/${id}/`, data),
   deleteBook: (id) => axiosInstance.delete(`books/${id}/`),
   getBookPDF: (id) => axiosInstance.get(`books/${id}/pdf/`, { responseType: 'blob' }),
-  getReadingLists: () => axiosInstance.get('reading-lists/'),
+  getReadingLists: () => getAllPages('reading-lists/'),
   createReadingList: (data) => axiosInstance.post('reading-lists/', data),
   updateReadingList: (id, data) => axiosInstance.put(`reading-lists/${id}/`, data),
   deleteReadingList: (id) => axiosInstance.delete(`reading-lists/${id}/`),
@@ -6,6 +6,7 @@ import bookApi from '../api/bookApi';
 const Books = () => {
   const { user, isLoading } = useAuth();
   const [books, setBooks] = useState([]);
+  const [nextPage, setNextPage] = useState(null);
   const [readingLists, setReadingLists] = useState([]);
   const [searchQuery, setSearchQuery] = useState('');
   const [error, setError] = useState('');
@@ -27,7 +28,18 @@ const Books = () => {
   const fetchBooks = async () => {
     try {
       const res = await bookApi.getBooks(searchQuery);
-      setBooks(res.data);
+      setBooks(res.data.results);
+      setNextPage(res.data.next);
+    } catch (err) {
+      setError('Failed to fetch books');
+    }
+  };
+
+  const fetchMoreBooks = async () => {
+    try {
+      const res = await bookApi.getNextPage(nextPage);
+      setBooks((current) => [...current, ...res.data.results]);
+      setNextPage(res.data.next);
     } catch (err) {
       setError('Failed to fetch books');
     }
@@ -241,6 +253,16 @@ const Books = () => {
             </div>
           )}
         </div>
+        {nextPage && (
+          <div className="text-center mt-8">
+            <button
+              onClick={fetchMoreBooks}
+              className="px-6 py-2 bg-slate-700 text-white rounded-lg hover:bg-slate-600 transition-colors"
+            >
+              Load more
+            </button>
+          </div>
+        )}
       </div>
     </div>
   );